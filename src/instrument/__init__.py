@@ -14,7 +14,7 @@ import warnings
 from abc import abstractmethod, ABC
 
 from base import Object
-from constants import ON, OFF
+from constants import ON, OFF, TUPLE_ON, TUPLE_OFF
 
 
 class Ieee488:
@@ -150,6 +150,8 @@ class Instrument(Object, Ieee488, ABC):
         super().__init__(**kwargs)
         self._resource_name = None
         self._info = None
+        self._cache = None
+        self._instrument = None
         self._instrument = self.open(resource_name)
         self._instrument._timeout = timeout
 
@@ -174,6 +176,62 @@ class Instrument(Object, Ieee488, ABC):
     def info(self):
         return self._info
 
+    def cache(self, on_off: str = None) -> bool:
+        """
+        设置缓存开关, 开启后记录每项设置最后一次确认的值, 设置值不变时不再发送写命令及回读查询;
+        仪器复位(*RST), 调用保存的设置(*RCL), 重新连接或切换到本地操作模式时缓存失效.
+        注意: 缓存开启期间不应在前面板或通过其他方式修改仪器设置
+        :param on_off: (type str) 可选值 {ON|1|OFF|0}, None时只返回当前状态
+        :return: (type bool) 缓存是否开启
+        """
+        if on_off in TUPLE_ON:
+            if self._cache is None:
+                self._cache = {}
+        elif on_off in TUPLE_OFF:
+            self._cache = None
+        return self._cache is not None
+
+    def cache_clear(self):
+        """
+        清除缓存, 不改变缓存开关
+        :return: None
+        """
+        if self._cache is not None:
+            self._cache.clear()
+
+    def _cache_hit(self, key, value) -> bool:
+        """
+        判断设置值是否与缓存的值相同
+        :param key: 设置项
+        :param value: 设置值, None表示不设置, 此时不会命中
+        :return: (type bool) 缓存开启且值相同时返回True
+        """
+        return self._cache is not None and value is not None and key in self._cache and self._cache[key] == value
+
+    def _cache_get(self, key, default=None):
+        """
+        获取缓存的值
+        :param key: 设置项
+        :param default: 缓存关闭或没有缓存时的返回值
+        :return: 缓存的值
+        """
+        if self._cache is None:
+            return default
+        return self._cache.get(key, default)
+
+    def _cache_put(self, key, value):
+        """
+        记录确认后的设置值(或回读结果), value为None时删除该项
+        :param key: 设置项
+        :param value: 设置值
+        :return: None
+        """
+        if self._cache is not None:
+            if value is None:
+                self._cache.pop(key, None)
+            else:
+                self._cache[key] = value
+
     # @abstractmethod
     def initialize(self):
         self.remote(ON)
@@ -206,6 +264,7 @@ class Instrument(Object, Ieee488, ABC):
     def close(self):
         """关闭仪器资源
         """
+        self.cache_clear()
         if self._instrument is not None:
             try:
                 self._instrument.close()
@@ -0,0 +1,225 @@
+# -*- encoding: utf-8 -*-
+"""
+@File    : async_frame.py
+@Time    : 2026/10/17 19:10
+@Author  : blockish
+@Email   : blockish@yeah.net
+"""
+__all__ = {
+    'AsyncFrameInstrument',
+}
+
+import asyncio
+from abc import ABC
+from typing import Union
+
+import serial
+
+from base import Object
+from constants import ON, OFF
+from errors import ResourceException
+from instrument.frame import FrameProtocol
+
+
+class AsyncFrameInstrument(FrameProtocol, Object, ABC):
+    """
+    asyncio版本的串口(帧协议)仪器, 串口工作在非阻塞模式, 由事件循环等待数据,
+    一个事件循环可以同时驱动多台串口仪器
+    使用示例:
+    async with AsyncIt8500PlusFrame('COM12') as load:
+        content = await load.content()
+    """
+
+    # 不支持文件描述符(如Windows)时等待数据的轮询间隔
+    POLL_INTERVAL = 0.002
+
+    def __init__(self,
+                 resource_name: str,
+                 address: int,
+                 baudrate: int,
+                 timeout: float,
+                 supported_baudrate: Union[list, tuple],
+                 frame_size: int = None,
+                 frame_tail: int = None, **kwargs):
+        super().__init__(**kwargs)
+        assert baudrate in supported_baudrate
+        self._supported_baudrate = supported_baudrate
+        self._frame_cache = {}
+        self._address = address
+        self._timeout = timeout
+        self._frame_size = frame_size
+        self._frame_tail = None if frame_tail is None else bytes([frame_tail])
+        self._buffer = bytearray()
+        self._lock = asyncio.Lock()
+        self._info = None
+        self._resource_name = resource_name
+        try:
+            self._instrument = serial.Serial(port=resource_name, baudrate=baudrate, timeout=0)
+        except Exception as e:
+            raise ResourceException(e)
+        try:
+            self._fileno = self._instrument.fileno()
+        except (AttributeError, OSError, NotImplementedError):
+            self._fileno = None
+
+    async def __aenter__(self):
+        await self.initialize()
+        return self
+
+    async def __aexit__(self, err_type, err_val, err_tb):
+        await self.finalize()
+        if err_type is not None:
+            self._logger.error('Error exit:')
+            self._logger.error('\terror type: %s, error value: %s, error trace back: %s', err_type, err_val, err_tb)
+
+    def __str__(self):
+        return '<IDN: {} at {}>'.format(self._info, self._resource_name)
+
+    @property
+    def resource_name(self):
+        return self._resource_name
+
+    @property
+    def info(self):
+        return self._info
+
+    @property
+    def address(self):
+        return self._address
+
+    @address.setter
+    def address(self, address: int):
+        if address != self._address:
+            self._address = address
+            self._frame_cache.clear()
+
+    @property
+    def supported_baudrate(self):
+        return self._supported_baudrate
+
+    async def initialize(self):
+        await self.remote(ON)
+        self._info = await self.idn()
+
+    async def finalize(self):
+        await self.remote(OFF)
+        self.close()
+
+    async def remote(self, on_off):
+        pass
+
+    async def idn(self):
+        return None
+
+    async def read(self, retry=10):
+        """
+        异步读取一帧数据, 总超时时间为 timeout * retry
+        :param retry: type int, 与同步版本一致的重试次数
+        :return: 二进制数据list
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._timeout * max(retry, 1)
+        while True:
+            frame = self._extract_frame()
+            if frame is not None:
+                self._logger.info("recv: %s", frame.hex(' ').upper())
+                return list(frame)
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                if len(self._buffer) == 0:
+                    raise IOError("can't read data after retrying %d times" % retry)
+                raise IOError("incomplete frame: %s" % self._buffer.hex(' ').upper())
+            try:
+                await asyncio.wait_for(self._wait_readable(), remaining)
+            except asyncio.TimeoutError:
+                continue
+            self._buffer += self._instrument.read(max(self._instrument.in_waiting, 1))
+
+    async def write(self, cmd, *args, **kwargs):
+        """
+        写命令(帧数据较短, 直接写入串口)
+        :param cmd: 命令数据
+        :return: None
+        """
+        if cmd is not None:
+            self._send(cmd)
+
+    async def query(self, cmd, *args, **kwargs):
+        """
+        查询数据, 同一仪器的命令/响应过程互斥执行
+        :param cmd: 命令数据
+        :return: 二进制数据list
+        """
+        if cmd is not None:
+            async with self._lock:
+                self._send(cmd)
+                return await self.read()
+
+    async def _run(self, proc):
+        """
+        执行命令过程, 与同步版本FrameInstrument._run共用同一命令过程(生成器)
+        :param proc: (type generator) 命令过程
+        :return: 命令过程的返回值
+        """
+        try:
+            request = next(proc)
+            while True:
+                request = proc.send(await getattr(self, request[0])(*request[1:]))
+        except StopIteration as e:
+            return e.value
+
+    def close(self):
+        """关闭串口资源
+        """
+        if self._instrument is not None:
+            self._instrument.close()
+            self._instrument = None
+
+    def _send(self, cmd):
+        """
+        清除接收缓存并发送命令
+        :param cmd: 命令数据
+        :return: None
+        """
+        if not isinstance(cmd, (bytes, bytearray)):
+            cmd = bytearray(cmd)
+        self._logger.info("send: %s", cmd.hex(' ').upper())
+        self._buffer.clear()
+        self._instrument.reset_input_buffer()
+        self._instrument.write(cmd)
+
+    def _extract_frame(self):
+        """
+        从接收缓存中取出一帧完整的数据
+        :return: (type bytearray) 完整的帧, 没有完整帧时返回None
+        """
+        if self._frame_size is not None:
+            if len(self._buffer) < self._frame_size:
+                return None
+            end = self._frame_size
+        else:
+            end = self._buffer.find(self._frame_tail)
+            while end >= 0 and not self._frame_complete(self._buffer[:end + 1]):
+                end = self._buffer.find(self._frame_tail, end + 1)
+            if end < 0:
+                return None
+            end += 1
+        frame = self._buffer[:end]
+        del self._buffer[:end]
+        return frame
+
+    async def _wait_readable(self):
+        """等待串口有数据可读"""
+        if self._instrument.in_waiting > 0:
+            return
+        if self._fileno is None:
+            while self._instrument.in_waiting == 0:
+                await asyncio.sleep(self.POLL_INTERVAL)
+            return
+        loop = asyncio.get_running_loop()
+        readable = loop.create_future()
+        loop.add_reader(self._fileno, lambda: readable.done() or readable.set_result(None))
+        try:
+            await readable
+        finally:
+            loop.remove_reader(self._fileno)
@@ -0,0 +1,223 @@
+# -*- encoding: utf-8 -*-
+"""
+@File    : async_scpi.py
+@Time    : 2026/10/17 20:05
+@Author  : blockish
+@Email   : blockish@yeah.net
+"""
+__all__ = {
+    'AsyncScpiInstrument',
+}
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from base import Object
+from errors import InstrumentException
+from instrument.scpi import CMD_ESR, CMD_OPC, ESR_OPC, ScpiInstrument
+
+ESR_ERRORS = 0x3C      # 标准事件状态寄存器的错误位: 查询错误, 设备相关错误, 执行错误, 命令错误
+
+
+class AsyncScpiInstrument(Object):
+    """
+    SCPI仪器的asyncio接口, 包装一个同步的ScpiInstrument对象, VISA I/O在有界线程池中执行,
+    同一台仪器的I/O依次执行, 不同仪器之间并行执行.
+    除了下面定义的方法外, 同步仪器的其他方法(如Mdo3000Scpi.waveform_export)均可直接await调用
+    使用示例:
+    async with AsyncScpiInstrument(Mdo3000Scpi('USB0::...')) as scope, \\
+            AsyncScpiInstrument(Wt300eScpi('USB0::...')) as meter:
+        await asyncio.gather(scope.auto_set(), meter.numeric_normal_value())
+    """
+
+    MAX_WORKERS = 8             # 默认线程池大小
+    POLL_INTERVAL = 0.005       # 状态轮询的初始间隔, 单位S
+    POLL_MAX_INTERVAL = 0.2     # 状态轮询的最大间隔, 单位S
+
+    __executor = None
+
+    def __init__(self, instrument: ScpiInstrument, executor: ThreadPoolExecutor = None, **kwargs):
+        """
+        :param instrument: (type ScpiInstrument) 同步SCPI仪器对象
+        :param executor: (type ThreadPoolExecutor) 执行VISA I/O的线程池, 默认所有仪器共用一个大小为MAX_WORKERS的线程池,
+                共享线程池在每次调用时获取, executor(max_workers)重新创建后所有仪器都使用新的线程池
+        """
+        super().__init__(**kwargs)
+        self._instrument = instrument
+        self._executor = executor
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def executor(cls, max_workers: int = None) -> ThreadPoolExecutor:
+        """
+        获取默认的共享线程池, 指定max_workers时重新创建线程池,
+        原线程池中已提交的I/O继续执行完成, 之后的调用均提交到新的线程池
+        :param max_workers: (type int) 线程池大小
+        :return: (type ThreadPoolExecutor) 线程池
+        """
+        if cls.__executor is None or max_workers is not None:
+            if cls.__executor is not None:
+                cls.__executor.shutdown(wait=False)
+            AsyncScpiInstrument.__executor = ThreadPoolExecutor(
+                max_workers=cls.MAX_WORKERS if max_workers is None else max_workers,
+                thread_name_prefix='visa-io')
+        return cls.__executor
+
+    async def __aenter__(self):
+        await self.initialize()
+        return self
+
+    async def __aexit__(self, err_type, err_val, err_tb):
+        await self.finalize()
+        if err_type is not None:
+            self._logger.error('Error exit:')
+            self._logger.error('\terror type: %s, error value: %s, error trace back: %s', err_type, err_val, err_tb)
+
+    def __str__(self):
+        return self._instrument.__str__()
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        attr = getattr(self._instrument, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def wrapper(*args, **kwargs):
+            return await self._call(attr, *args, **kwargs)
+        return wrapper
+
+    @property
+    def instrument(self):
+        """被包装的同步仪器对象"""
+        return self._instrument
+
+    async def _call(self, func, *args, **kwargs):
+        """
+        在线程池中执行同步仪器的方法
+        :param func: 同步方法
+        :return: 方法的返回值
+        """
+        async with self._lock:
+            executor = AsyncScpiInstrument.executor() if self._executor is None else self._executor
+            return await asyncio.get_running_loop().run_in_executor(
+                executor, functools.partial(func, *args, **kwargs))
+
+    async def initialize(self):
+        await self._call(self._instrument.initialize)
+
+    async def finalize(self):
+        await self._call(self._instrument.finalize)
+
+    async def remote(self, on_off):
+        await self._call(self._instrument.remote, on_off)
+
+    async def write(self, cmd, *args, **kwargs):
+        await self._call(self._instrument.write, cmd, *args, **kwargs)
+
+    async def read(self):
+        return await self._call(self._instrument.read)
+
+    async def query(self, cmd, *args, **kwargs):
+        return await self._call(self._instrument.query, cmd, *args, **kwargs)
+
+    async def wait_complete(self, timeout: float = 10) -> int:
+        """
+        等待所有未完成的操作执行完成: 先读取*ESR?清除之前遗留的OPC位, 写入*OPC后轮询*ESR?的第0位(OPC),
+        等待期间不占用线程池, 轮询间隔从POLL_INTERVAL开始倍增至POLL_MAX_INTERVAL;
+        读取ESR会清除其中的错误位, 出现错误位时记录警告日志, 调用方可由返回值判断
+        :param timeout: (type float) 超时时间, 单位S
+        :return: (type int) 等待之前及完成时读取的ESR值的按位或(不含之前遗留的OPC位)
+        :raise InstrumentException: 超时
+        """
+        before = int(await self.query(CMD_ESR)) & ~ESR_OPC
+        await self.write(CMD_OPC)
+        esr = before | int(await self._poll(lambda value: int(value) & ESR_OPC, CMD_ESR, timeout=timeout))
+        if esr & ESR_ERRORS:
+            self._logger.warning('standard event status errors while waiting for operation complete: 0x%02X', esr)
+        return esr
+
+    async def wait_idle(self, cmd: str = 'BUSY?', timeout: float = 10):
+        """
+        轮询忙状态查询命令(如示波器的BUSY?), 直到返回0
+        :param cmd: (type str) 忙状态查询命令
+        :param timeout: (type float) 超时时间, 单位S
+        :return: None
+        :raise InstrumentException: 超时
+        """
+        await self._poll(lambda busy: int(busy) == 0, cmd, timeout=timeout)
+
+    async def _poll(self, ready, cmd, *args, timeout: float = 10):
+        """
+        以指数退避的间隔轮询查询命令, 直到ready(返回值)为True
+        :param ready: (type callable) 判断函数
+        :param cmd: (type str) 查询命令
+        :param timeout: (type float) 超时时间, 单位S
+        :return: 最后一次查询的返回值
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        interval = self.POLL_INTERVAL
+        while True:
+            result = await self.query(cmd, *args)
+            if ready(result):
+                return result
+            if loop.time() + interval > deadline:
+                raise InstrumentException('waiting for "%s" timeout after %ss' % (cmd, timeout))
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, self.POLL_MAX_INTERVAL)
+
+    # 以下为IEE488指令
+    async def cal(self):
+        await self._call(self._instrument.cal)
+
+    async def cls(self):
+        await self._call(self._instrument.cls)
+
+    async def ese(self, nrf: int = None):
+        return await self._call(self._instrument.ese, nrf)
+
+    async def esr(self):
+        return await self._call(self._instrument.esr)
+
+    async def idn(self):
+        return await self._call(self._instrument.idn)
+
+    async def opc(self, query: bool = False):
+        """
+        当query为True时发送*OPC?并返回仪器的响应, 等待期间占用线程池中的一个线程,
+        不占用线程池的等待参考wait_complete
+        """
+        return await self._call(self._instrument.opc, query)
+
+    async def opt(self):
+        return await self._call(self._instrument.opt)
+
+    async def psc(self, on_off: str = None):
+        return await self._call(self._instrument.psc, on_off)
+
+    async def rcl(self, nrf: int = 1):
+        await self._call(self._instrument.rcl, nrf)
+
+    async def rst(self):
+        await self._call(self._instrument.rst)
+
+    async def sav(self, nrf: int = 1):
+        await self._call(self._instrument.sav, nrf)
+
+    async def sre(self, nrf: int = None):
+        return await self._call(self._instrument.sre, nrf)
+
+    async def stb(self):
+        return await self._call(self._instrument.stb)
+
+    async def trg(self):
+        await self._call(self._instrument.trg)
+
+    async def tst(self):
+        return await self._call(self._instrument.tst)
+
+    async def wai(self):
+        await self._call(self._instrument.wai)
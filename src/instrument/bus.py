@@ -0,0 +1,152 @@
+# -*- encoding: utf-8 -*-
+"""
+@File    : bus.py
+@Time    : 2026/10/17 18:30
+@Author  : blockish
+@Email   : blockish@yeah.net
+"""
+__all__ = {
+    'SerialBus',
+}
+
+import threading
+import serial
+
+from base import Object
+from errors import ResourceException, ParamException, InstrumentException
+
+
+class SerialBus(Object):
+    """
+    RS-485多机总线, 多台不同地址的帧协议仪器共用一个串口
+    使用示例:
+    with SerialBus('COM3', baudrate=9600) as bus:
+        loads = [bus.device(It8500PlusFrame, addr) for addr in range(1, 17)]
+        for address, content in bus.poll('content', cycles=10):
+            操作逻辑...
+    """
+
+    def __init__(self, resource_name: str, baudrate: int = 9600, timeout: float = 0.1, **kwargs):
+        super().__init__(**kwargs)
+        try:
+            self._serial = serial.Serial(port=resource_name, baudrate=baudrate, timeout=timeout)
+        except Exception as e:
+            raise ResourceException(e)
+        self._resource_name = resource_name
+        self._lock = threading.RLock()
+        self._devices = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, err_type, err_val, err_tb):
+        self.close()
+
+    def __str__(self):
+        return '<SerialBus: {} devices at {}>'.format(len(self._devices), self._resource_name)
+
+    @property
+    def resource_name(self):
+        return self._resource_name
+
+    @property
+    def serial(self):
+        return self._serial
+
+    @property
+    def lock(self):
+        """总线锁, 一次完整的命令/响应过程需持有该锁"""
+        return self._lock
+
+    @property
+    def baudrate(self):
+        return self._serial.baudrate
+
+    @property
+    def timeout(self):
+        return self._serial.timeout
+
+    @property
+    def devices(self):
+        """总线上已连接的仪器, 按地址排序"""
+        return [self._devices[address] for address in sorted(self._devices)]
+
+    def device(self, cls, address: int, *args, **kwargs):
+        """
+        获取总线上指定地址的仪器, 同一地址只创建一次
+        :param cls: (type class) 帧协议仪器类, 如It8500PlusFrame
+        :param address: (type int) 仪器地址
+        :param args: 仪器类的其他参数(波特率及超时时间除外)
+        :param kwargs: 仪器类的其他参数(波特率及超时时间除外)
+        :return: 仪器对象
+        """
+        with self._lock:
+            instrument = self._devices.get(address)
+            if instrument is None:
+                instrument = cls(self, address, self.baudrate, self.timeout, *args, **kwargs)
+                self._devices[address] = instrument
+            elif not isinstance(instrument, cls):
+                raise ParamException('address %s is already used by %s' % (address, instrument.__class__.__name__))
+            return instrument
+
+    def readdress(self, instrument, address: int):
+        """
+        仪器地址修改后在总线上按新地址重新登记, 由仪器的address属性调用
+        :param instrument: 总线上的仪器
+        :param address: (type int) 新地址
+        :return: None
+        :raise ParamException: 新地址已被其他仪器使用
+        """
+        with self._lock:
+            other = self._devices.get(address)
+            if other is not None and other is not instrument:
+                raise ParamException('address %s is already used by %s' % (address, other.__class__.__name__))
+            if self._devices.get(instrument.address) is instrument:
+                del self._devices[instrument.address]
+            self._devices[address] = instrument
+
+    def release(self, address: int):
+        """
+        从总线上移除指定地址的仪器, 串口不关闭
+        :param address: (type int) 仪器地址
+        :return: None
+        """
+        with self._lock:
+            self._devices.pop(address, None)
+
+    def poll(self, method: str = 'content', *args, cycles: int = None, **kwargs):
+        """
+        按地址顺序轮询总线上的所有仪器, 每台仪器的一次调用独占总线,
+        调用之间释放总线锁, 其他线程的命令可以插入执行
+        :param method: (type str) 仪器方法名称, 默认为'content'
+        :param args: 方法参数
+        :param cycles: (type int) 轮询次数, None为无限轮询
+        :param kwargs: 方法参数
+        :return: (type generator) 依次生成(地址, 结果), 调用出错时结果为异常对象
+        """
+        count = 0
+        while cycles is None or count < cycles:
+            devices = self.devices
+            if len(devices) == 0:
+                return
+            for instrument in devices:
+                try:
+                    with self._lock:
+                        result = getattr(instrument, method)(*args, **kwargs)
+                except (IOError, InstrumentException, AssertionError) as e:
+                    self._logger.error('poll %s at address %s error: %s', method, instrument.address, e)
+                    result = e
+                yield instrument.address, result
+            count += 1
+
+    def close(self):
+        """
+        关闭总线串口, 总线上的仪器同时失效
+        :return: None
+        """
+        with self._lock:
+            for instrument in self.devices:
+                instrument.close()
+            self._devices.clear()
+            if self._serial.is_open:
+                self._serial.close()
@@ -16,6 +16,9 @@ BRACE = '{}'
 
 SEMICOLON = ';'
 COLON = ':'
+ASTERISK = '*'
+# 多条SCPI命令拼接的分隔符, 每条命令都从根节点开始解析
+ROOT_SEPARATOR = SEMICOLON + COLON
 
 
 class Ieee488Cmd:
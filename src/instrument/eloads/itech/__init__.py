@@ -1,4 +1,6 @@
 # -*- encoding: utf-8 -*-
 from .it8500_frame import It8500Frame
 from .it8500_frame import It8500PlusFrame
+from .it8500_frame import AsyncIt8500Frame
+from .it8500_frame import AsyncIt8500PlusFrame
 from .const import *
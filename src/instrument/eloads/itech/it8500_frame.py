@@ -8,6 +8,8 @@
 __all__ = {
     'It8500Frame',
     'It8500PlusFrame',
+    'AsyncIt8500Frame',
+    'AsyncIt8500PlusFrame',
 }
 
 from abc import ABC
@@ -16,17 +18,117 @@ from errors import ParamException, InstrumentException
 from instrument import utils
 from instrument.eloads.itech.it8500 import It85xx
 from instrument.frame import FrameInstrument
+from instrument.async_frame import AsyncFrameInstrument
 from constants import TUPLE_ON, TUPLE_OFF
 from .it8500_frame_const import *
 
 
-class It8500Series(FrameInstrument, It85xx, ABC):
+class It8500Protocol:
+    """
+    IT8500系列的帧构建, 校验及命令过程, 同步(It8500Series)与异步(AsyncIt8500Series)版本共用
+    """
+
+    def _check_ack(self, cmd: list, data: list) -> None:
+        """
+        校验设置命令的响应帧
+        :param cmd: 命令数据
+        :param data: 响应帧
+        :return: None
+        :raise InstrumentException
+        """
+        It85xxCmd.CODEC.decode(data)
+        assert It85xxCmd.VALIDATE == data[2]
+        response = data[3]
+        if response != 0x80:
+            self._logger.error('command: %s, response of code: 0x%s', ('%02x' % cmd[0]), ('%02x' % response))
+            if response == 0x90:  # 校验和错误
+                raise InstrumentException('Checksum error')
+            elif response == 0xa0:  # 设置参数错误或参数溢出
+                raise InstrumentException('Parameter error or overflow')
+            elif response == 0xb0:  # 命令不能被执行
+                raise InstrumentException('Can\'t execute the command')
+            elif response == 0xc0:  # 命令是无效的
+                raise InstrumentException('Command is invalid')
+            elif response == 0xd0:  # 命令是未知的
+                raise InstrumentException('Command is unknown')
+            else:
+                raise InstrumentException('Unknown error')
+        else:
+            self._logger.info('write response code: 0x%s', ('%02x' % response))
+
+    def _command(self, op_value):
+        """
+        构建命令, 无参数的命令(只有命令字)构建一次后按(命令字, 地址)缓存
+        """
+        if op_value is not None:
+            assert isinstance(op_value, list)
+            if len(op_value) != 1:
+                return It85xxCmd.CODEC.encode(self._address, op_value)
+            key = (op_value[0], self._address)
+            frame = self._frame_cache.get(key)
+            if frame is None:
+                frame = self._frame_cache[key] = bytes(It85xxCmd.CODEC.encode(self._address, op_value))
+            return frame
+
+    def _remote_proc(self, on_off):
+        if on_off in TUPLE_ON:
+            yield 'write', [It85xxCmd.LOCAL_REMOTE_SET, 1]
+            yield 'write', [It85xxCmd.LOCAL_EN_SET, 1]
+        elif on_off in TUPLE_OFF:
+            yield 'write', [It85xxCmd.LOCAL_REMOTE_SET, 0]
+            yield 'write', [It85xxCmd.LOCAL_REMOTE_SET, 0]
+        else:
+            self._logger.error('Error remote parameter, value is %s' % on_off)
+            raise ParamException(
+                'The param "on_off" expect value "ON", "OFF", "0" or "1" not: %s' % on_off)
+
+    def _trigger_source_proc(self, source):
+        if source is not None:
+            cmd = It85xxCmd.DICT_TRIG_MODE.get(source)
+            yield 'write', cmd
+        data = yield 'query', [It85xxCmd.TRIG_MODE_GET, ]
+        return_src = TUPLE_TRIGGER_MODE[data[3]]
+        self._logger.info('current trigger source: "%s"', return_src)
+        return return_src
+
+    def _content_proc(self, is_plus):
+        # 读取负载的输入电压,输入电流,输入功率及操作状态寄存器,查询状态寄存器,散热器温度,工作模式,当前LIST的步数,当前LIST的循环次数
+        data = yield 'query', [It85xxCmd.CONTENT_1_GET, ]
+        in_volt, in_curr, in_power, operation_register, query_register, \
+            temperature, work_mode, list_step, list_repeat = It85xxCmd.CODEC.unpack(It85xxCmd.CONTENT_1_FMT, data, 1)
+        in_volt /= 1000
+        in_curr /= 10000
+        in_power /= 1000
+        if is_plus is True:
+            # 带载容量[3:7], 带载时间或上升/下降时间[7:11], 定时器剩余时间[11:15]
+            data = yield 'query', [It8500PlusCmd.CONTENT_2_GET, ]
+            load_cap, rf_time, remain_time = It85xxCmd.CODEC.unpack(It8500PlusCmd.CONTENT_2_FMT, data, 1)
+            load_cap /= 10000
+            rf_time /= 10000
+            remain_time /= 1000     # TODO magif?
+            # 最大输入电压值[3:7], 最小输入电压值[7:11], 最大输入电流值[11:15], 最小输入电流值[15:19]
+            data = yield 'query', [It8500PlusCmd.CONTENT_3_GET, ]
+            max_in_volt, min_in_volt, max_in_curr, min_in_curr = \
+                It85xxCmd.CODEC.unpack(It8500PlusCmd.CONTENT_3_FMT, data, 1)
+            max_in_volt /= 1000
+            min_in_volt /= 1000
+            max_in_curr /= 10000
+            min_in_curr /= 10000
+            return in_volt, in_curr, in_power, operation_register, query_register, \
+                temperature, work_mode, list_step, list_repeat, load_cap, rf_time, \
+                remain_time, max_in_volt, min_in_volt, max_in_curr, min_in_curr
+        else:
+            return in_volt, in_curr, in_power, operation_register, query_register, \
+                   temperature, work_mode, list_step, list_repeat
+
+
+class It8500Series(It8500Protocol, FrameInstrument, It85xx, ABC):
 
     def __init__(self, resource_name, address=0, baudrate=9600, timeout=0.1):
         assert 0 <= address < 32 or address == 0xff
         assert baudrate in It85xxCmd.BAUDRATE_TUPLE
         super().__init__(resource_name, address, baudrate, timeout, It85xxCmd.BAUDRATE_TUPLE,
-                         It85xxCmd.RW_DELAY_TUPLE)
+                         It85xxCmd.RW_DELAY_TUPLE, frame_size=It85xxCmd.FRAME_SIZE)
 
     def write(self, cmd: list, queryable: bool = False) -> None:
         """
@@ -35,28 +137,10 @@ class It8500Series(FrameInstrument, It85xx, ABC):
         :param queryable: 对于有返回值的则queryable为True, 否则为false
         :return: None
         """
-        super().write(self._command(cmd))
-        if cmd is not None and queryable is False:
-            data = self.read()
-            assert It85xxCmd.VALIDATE == data[2]
-            response = data[3]
-            if response != 0x80:
-                self._logger.error('command: %s, response of code: 0x%s', ('%02x' % cmd[2]), ('%02x' % response))
-                if response == 0x90:  # 校验和错误
-                    raise InstrumentException('Checksum error')
-                elif response == 0xa0:  # 设置参数错误或参数溢出
-                    raise InstrumentException('Parameter error or overflow')
-                elif response == 0xb0:  # 命令不能被执行
-                    raise InstrumentException('Can\'t execute the command')
-                elif response == 0xc0:  # 命令是无效的
-                    raise InstrumentException('Command is invalid')
-                elif response == 0xd0:  # 命令是未知的
-                    raise InstrumentException('Command is unknown')
-                else:
-                    raise InstrumentException('Unknown error')
-            else:
-                self._logger.info('write response code: 0x%s', ('%02x' % response))
-            # return response
+        with self._lock:
+            super().write(self._command(cmd))
+            if cmd is not None and queryable is False:
+                self._check_ack(cmd, self.read())
 
     def query(self, cmd: list) -> list:
         """
@@ -67,34 +151,16 @@ class It8500Series(FrameInstrument, It85xx, ABC):
         if cmd is None:
             self._logger.warning('query command is None')
             return
-        self.write(cmd, queryable=True)
-        return self.read()
-
-    def _command(self, op_value):
-        """构建命令"""
-        if op_value is not None:
-            assert isinstance(op_value, list)
-            cmd = [*It85xxCmd.IT85XX_CMD]
-            cmd[1] = self._address
-            for i in range(len(op_value)):
-                cmd[2 + i] = op_value[i]
-            cmd_last = len(cmd) - 1
-            chk = sum(cmd[:24])
-            chk &= 0xFF
-            cmd[cmd_last] = chk
-            return cmd
+        with self._lock:
+            self.write(cmd, queryable=True)
+            data = self.read()
+        It85xxCmd.CODEC.decode(data)
+        return data
 
     def remote(self, on_off) -> None:
-        if on_off in TUPLE_ON:
-            self.write([It85xxCmd.LOCAL_REMOTE_SET, 1])
-            self.write([It85xxCmd.LOCAL_EN_SET, 1])
-        elif on_off in TUPLE_OFF:
-            self.write([It85xxCmd.LOCAL_REMOTE_SET, 0])
-            self.write([It85xxCmd.LOCAL_REMOTE_SET, 0])
-        else:
-            self._logger.error('Error remote parameter, value is %s' % on_off)
-            raise ParamException(
-                'The param "on_off" expect value "ON", "OFF", "0" or "1" not: %s' % on_off)
+        if on_off in TUPLE_OFF:
+            self.cache_clear()
+        self._run(self._remote_proc(on_off))
 
     def initialize(self) -> None:
         super().initialize()
@@ -159,6 +225,7 @@ class It8500Series(FrameInstrument, It85xx, ABC):
         :return: None
         """
         self.write([It85xxCmd.SETTINGS_CALL, nrf])
+        self.cache_clear()
 
     def load(self, on_off: str) -> None:
         """
@@ -195,11 +262,14 @@ class It8500Series(FrameInstrument, It85xx, ABC):
         :return:
             (type str) fix|short|tran|list|batt
         """
+        if self._cache_hit('work_mode', mode):
+            return self._cache_get('work_mode')
         cmd = It85xxCmd.DICT_WORK_MODE_SET.get(mode)
         self.write(cmd)
         data = self.query([It85xxCmd.WORK_MODE_GET, ])
         return_mode = TUPLE_WORK_MODE[data[3]]
         self._logger.info('work mode changed to: "%s"', return_mode)
+        self._cache_put('work_mode', return_mode)
         return return_mode
 
     def list_mode(self, eload_mode: str = CC, curr_range: float = None, repeat: int = 1, *steps) -> tuple:
@@ -316,16 +386,38 @@ class It8500Series(FrameInstrument, It85xx, ABC):
         return return_level_a, return_a_time, return_level_b, return_time_b, TUPLE_TRAN_MODE[return_tran]
 
     def _load_mode(self, mode: str):
+        if self._cache_hit('work_mode', FIXED) and self._cache_hit('load_mode', mode):
+            return self._cache_get('load_mode')
         if mode is not None:
             # 设置工作模式为 fixed
             self._work_mode(FIXED)
             cmd = It85xxCmd.DICT_ELOAD_MODE.get(mode)
             self.write(cmd)
         data = self.query([It85xxCmd.LOAD_MODE_GET, ])
-        return_mode = TUPLE_WORK_MODE[data[3]]
+        return_mode = TUPLE_ELOAD_MODE[data[3]]
         self._logger.info('current e-load mode: "%s"', return_mode)
+        self._cache_put('load_mode', return_mode)
         return return_mode
 
+    def _value(self, key, value, set_op, get_op, magnif):
+        """
+        设置并回读4字节数值参数, 开启缓存且设置值不变时直接返回缓存的回读值
+        :param key: 缓存的设置项
+        :param value: (type float) 设置值, None时只回读
+        :param set_op: (type list) 设置命令字
+        :param get_op: (type list) 回读命令字
+        :param magnif: (type int) 数值倍数
+        :return: (type float) 回读值
+        """
+        if self._cache_hit(key, value):
+            return self._cache_get((key, 'readback'))
+        self.write(_value_command(set_op, value, magnif=magnif))
+        data = self.query(get_op)
+        result = utils.hex_to_value(data=data[3:7], endian='little', magnif=magnif)
+        self._cache_put(key, value)
+        self._cache_put((key, 'readback'), result)
+        return result
+
     def load_mode(self, mode: str, value: float = None, lower: float = None, upper: float = None) -> tuple:
         """
             设置获取负载的负载模式
@@ -338,35 +430,26 @@ class It8500Series(FrameInstrument, It85xx, ABC):
             ('CC', 'CV', 'CW' or 'CR'), value, lower, upper
         """
         return_mode = self._load_mode(mode)
+        magnif = 10000 if CC == mode else 1000
         # 设置相关参数
-        self.write(_value_command(It85xxCmd.CC_VALUE_SET if CC == mode else
-                                  It85xxCmd.CV_VALUE_SET if CV == mode else
-                                  It85xxCmd.CR_VALUE_SET if CR == mode else
-                                  It85xxCmd.CW_VALUE_SET if CW == mode else
-                                  utils.raiser(ParamException('Unsupported load mode')),
-                                  value=value, endian='little', size=4,
-                                  magnif=10000 if CC == mode else 1000))
-
-        data = self.query(It85xxCmd.CC_VALUE_GET if CC == mode else
-                          It85xxCmd.CV_VALUE_GET if CV == mode else
-                          It85xxCmd.CR_VALUE_GET if CR == mode else
-                          It85xxCmd.CW_VALUE_GET if CW == mode else
-                          utils.raiser(ParamException('Unsupported load mode')))
-        return_value = utils.hex_to_value(data=data[3:7], endian='little',
-                                          magnif=10000 if CC == mode else 1000)
+        return_value = self._value(('value', mode), value,
+                                   [It85xxCmd.CC_VALUE_SET if CC == mode else
+                                    It85xxCmd.CV_VALUE_SET if CV == mode else
+                                    It85xxCmd.CR_VALUE_SET if CR == mode else
+                                    It85xxCmd.CW_VALUE_SET if CW == mode else
+                                    utils.raiser(ParamException('Unsupported load mode')), ],
+                                   [It85xxCmd.CC_VALUE_GET if CC == mode else
+                                    It85xxCmd.CV_VALUE_GET if CV == mode else
+                                    It85xxCmd.CR_VALUE_GET if CR == mode else
+                                    It85xxCmd.CW_VALUE_GET, ],
+                                   magnif)
         return_lower, return_upper = (None, None)
         if lower is not None:
-            self.write(_value_command(It8500PlusCmd.DICT_CM_LOWER_SET_SET.get(mode), upper,
-                                      magnif=10000 if CC == mode else 1000))
-            data = self.query(It8500PlusCmd.DICT_CM_LOWER_GET.get(mode))
-            return_lower = utils.hex_to_value(data=data[3:7], endian='little',
-                                              magnif=10000 if CC == mode else 1000)
+            return_lower = self._value(('lower', mode), lower, It8500PlusCmd.DICT_CM_LOWER_SET.get(mode),
+                                       It8500PlusCmd.DICT_CM_LOWER_GET.get(mode), magnif)
         if upper is not None:
-            self.write(_value_command(It8500PlusCmd.DICT_CM_UPPER_SET_SET.get(mode), upper,
-                                      magnif=10000 if CC == mode else 1000))
-            data = self.query(It8500PlusCmd.DICT_CM_UPPER_GET.get(mode))
-            return_upper = utils.hex_to_value(data=data[3:7], endian='little',
-                                              magnif=10000 if CC == mode else 1000)
+            return_upper = self._value(('upper', mode), upper, It8500PlusCmd.DICT_CM_UPPER_SET.get(mode),
+                                       It8500PlusCmd.DICT_CM_UPPER_GET.get(mode), magnif)
         return return_mode, return_value, return_lower, return_upper
 
     def input_limit(self, volt=None, curr=None, power=None, res=None):
@@ -405,45 +488,10 @@ class It8500Series(FrameInstrument, It85xx, ABC):
         :param source: (type str): 触发源, 可选值为{manu|ext|bus|hold}
         :return: (type str): 'MANual', 'EXTernal', 'BUS' or 'HOLD'
         """
-        if source is not None:
-            cmd = It85xxCmd.DICT_TRIG_MODE.get(source)
-            self.write(cmd)
-        data = self.query([It85xxCmd.TRIG_MODE_GET, ])
-        return_src = TUPLE_TRIGGER_MODE[data[3]]
-        self._logger.info('current trigger source: "%s"', return_src)
-        return return_src
+        return self._run(self._trigger_source_proc(source))
 
     def _content(self, is_plus):
-        # 读取负载的输入电压,输入电流,输入功率及操作状态寄存器,查询状态寄存器,散热器温度,工作模式,当前LIST的步数,当前LIST的循环次数
-        data = self.query([It85xxCmd.CONTENT_1_GET, ])
-        in_volt = utils.hex_to_value(data[3:7], magnif=1000)
-        in_curr = utils.hex_to_value(data[7:11], magnif=10000)
-        in_power = utils.hex_to_value(data[11:15], magnif=1000)
-        operation_register = data[15]
-        query_register = data[16] | (data[17] << 8)
-        temperature = data[20]
-        work_mode = data[21]
-        list_step = data[22]
-        list_repeat = data[23] | (data[24] << 8)
-        if is_plus is True:
-            # 带载容量[3:7], 带载时间或上升/下降时间[7:11], 定时器剩余时间[11:15]
-            data = self.query([It8500PlusCmd.CONTENT_2_GET, ])
-            load_cap = utils.hex_to_value(data[3:7], magnif=10000)
-            rf_time = utils.hex_to_value(data[7:11], magnif=10000)
-            remain_time = utils.hex_to_value(data[11:15], magnif=1000)     # TODO magif?
-            # 最大输入电压值[3:7], 最小输入电压值[7:11], 最大输入电流值[11:15], 最小输入电流值[15:19]
-            data = self.query([It8500PlusCmd.CONTENT_3_GET, ])
-            max_in_volt = utils.hex_to_value(data[3:7], magnif=1000)
-            min_in_volt = utils.hex_to_value(data[7:11], magnif=1000)
-            max_in_curr = utils.hex_to_value(data[11:15], magnif=10000)
-            min_in_curr = utils.hex_to_value(data[15:19], magnif=10000)
-            return in_volt, in_curr, in_power, operation_register, query_register, \
-                temperature, work_mode, list_step, list_repeat, load_cap, rf_time, \
-                remain_time, max_in_volt, min_in_volt, max_in_curr, min_in_curr
-        else:
-            return in_volt, in_curr, in_power, operation_register, query_register, \
-                   temperature, work_mode, list_step, list_repeat
-
+        return self._run(self._content_proc(is_plus))
 
 class It8500Frame(It8500Series):
 
@@ -826,3 +874,110 @@ def _value_command(op, value, endian='little', size=4, magnif=1000):
     cmd.extend(utils.value_to_hex(value, endian, size, magnif))
 
     return cmd
+
+
+class AsyncIt8500Series(It8500Protocol, AsyncFrameInstrument, ABC):
+    """
+    IT8500系列电子负载的asyncio版本, 帧的构建, 校验及解析与同步版本共用(It8500Protocol)
+    """
+
+    def __init__(self, resource_name, address=0, baudrate=9600, timeout=0.1):
+        assert 0 <= address < 32 or address == 0xff
+        super().__init__(resource_name, address, baudrate, timeout, It85xxCmd.BAUDRATE_TUPLE,
+                         frame_size=It85xxCmd.FRAME_SIZE)
+
+    async def write(self, cmd: list, queryable: bool = False) -> None:
+        """
+            写命令
+        :param cmd: 命令数据
+        :param queryable: 对于有返回值的则queryable为True, 否则为false
+        :return: None
+        """
+        if cmd is None:
+            return
+        async with self._lock:
+            self._send(self._command(cmd))
+            if queryable is False:
+                self._check_ack(cmd, await self.read())
+
+    async def query(self, cmd: list) -> list:
+        """
+            查询返回值数据
+        :param cmd: 命令数据
+        :return: (type list)返回值数据
+        """
+        if cmd is None:
+            self._logger.warning('query command is None')
+            return
+        async with self._lock:
+            self._send(self._command(cmd))
+            data = await self.read()
+        It85xxCmd.CODEC.decode(data)
+        return data
+
+    async def remote(self, on_off) -> None:
+        await self._run(self._remote_proc(on_off))
+
+    async def load(self, on_off: str) -> None:
+        """
+            负载开启关断
+        :param on_off: (type str): 可选值为 {ON|1|OFF|0}
+        :return:
+            None
+        """
+        await self.write(It85xxCmd.DICT_LOAD_ON_OFF_SET.get(on_off))
+
+    async def trigger_source(self, source: str = None) -> str:
+        """
+            设置电子负载的触发源
+        :param source: (type str): 触发源, 可选值为{manu|ext|bus|hold}
+        :return: (type str): 'MANual', 'EXTernal', 'BUS' or 'HOLD'
+        """
+        return await self._run(self._trigger_source_proc(source))
+
+
+class AsyncIt8500Frame(AsyncIt8500Series):
+
+    def __init__(self, resource_name, addr=0, baudrate=9600, timeout=0.1):
+        super().__init__(resource_name, addr, baudrate, timeout)
+
+    async def trg(self) -> None:
+        """
+            发送一个Bus触发信号
+        :return: None
+        """
+        await self.write([It85xxCmd.TRIG_BUS, ])
+
+    async def content(self):
+        """
+        获取仪器所有状态值, 参见It8500Frame.content
+        """
+        return await self._run(self._content_proc(False))
+
+
+class AsyncIt8500PlusFrame(AsyncIt8500Series):
+
+    def __init__(self, resource_name, addr=0, baudrate=9600, timeout=0.1):
+        super().__init__(resource_name, addr, baudrate, timeout)
+
+    async def cls(self) -> None:
+        """
+        清除保护状态
+        :return:
+            None
+        """
+        await self.write([It8500PlusCmd.PROT_STATUS_CLEAR, ])
+
+    async def trg(self) -> None:
+        """
+            发送一个任意触发信号, 不论设置的触发源为什么, 均产生触发
+        :return:
+            None
+        """
+        await self.write([It8500PlusCmd.TRIGGER, ])
+
+    async def content(self):
+        """
+        获取仪器所有状态值, 参见It8500PlusFrame.content
+        """
+        return await self._run(self._content_proc(True))
@@ -1,6 +1,7 @@
 # -*- encoding: utf-8 -*-
 from constants import ON, ONE, ZERO, OFF
 from instrument.eloads.itech.const import *
+from instrument.frame_codec import FrameCodec
 
 FIXED = 'fix'
 SHORT = 'short'
@@ -29,6 +30,9 @@ class It85xxCmd:
                   0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,
                   0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,
                   ]
+    FRAME_SIZE = len(IT85XX_CMD)    # 帧长度固定26字节
+    # 帧编解码器, 校验和为前25字节之和的低8位
+    CODEC = FrameCodec(head=IT85XX_CMD[0], address_fmt='B', size=FRAME_SIZE)
 
     VALIDATE = 0x12                 # 校验命令
 
@@ -108,6 +112,8 @@ class It85xxCmd:
     WORK_MODE_GET = 0x5e            # 读取负载的工作模式 (FIXED, SHORT, TRAN, LIST,BATTERY)
     # 读取负载的输入电压,输入电流,输入功率及操作状态寄存器,查询状态寄存器,散热器温度,工作模式,当前LIST的步数,当前LIST的循环次数
     CONTENT_1_GET = 0x5f            # 读取负载的输入电压, 输入电流, 输入功率及相关状态
+    # 电压, 电流, 功率, 操作状态寄存器, 查询状态寄存器, (保留2字节), 温度, 工作模式, list步数, list循环次数
+    CONTENT_1_FMT = '<3IBH2x3BH'
 
     CAL_PSTATUS_SET = 0x60          # 设置负载的校准保护状态
     CAL_PSTATUS_GET = 0x61          # 读取负载的校准保护状态
@@ -206,6 +212,8 @@ class It8500PlusCmd:
     # ********************************************************************* #
     CONTENT_2_GET = 0xa0            # 读取负载内容 2, 带载容量[3:7], 带载时间或上升/下降时间[7:11], 定时器剩余时间[11:15]
     CONTENT_3_GET = 0xa1            # 读取负载内容 3, 最大输入电压值, 最小输入电压值, 最大输入电流值, 最小输入电流值
+    CONTENT_2_FMT = '<3I'
+    CONTENT_3_FMT = '<4I'
     MAX_VOLT_GET = 0xa2             # 读取负载最大电压值
     MIN_VOLT_GET = 0xa3             # 读取负载最小电压值
     MAX_CURR_GET = 0xa4             # 读取负载最大电流值
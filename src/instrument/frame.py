@@ -5,6 +5,7 @@
 @Author  : blockish
 @Email   : blockish@yeah.net
 """
+import threading
 import time
 from abc import ABC
 from typing import Union
@@ -12,23 +13,64 @@ import serial.tools.list_ports
 
 from errors import ResourceException, InstrumentException
 from instrument import Instrument
+from instrument.bus import SerialBus
 
 
-class FrameInstrument(Instrument, ABC):
+class FrameProtocol:
+    """
+    帧协议的公共实现, 同步(FrameInstrument)与异步(AsyncFrameInstrument)仪器共用,
+    使用该类的仪器需设置_frame_size及_frame_tail
+    """
+
+    def _frame_complete(self, frame: bytearray):
+        """
+        判断是否已收到完整的一帧, 子类可根据协议中的长度字段覆盖该方法
+        :param frame: 已接收的数据
+        :return: True为完整帧
+        """
+        if self._frame_size is not None:
+            return len(frame) >= self._frame_size
+        return frame.endswith(self._frame_tail)
+
+
+class FrameInstrument(FrameProtocol, Instrument, ABC):
 
     def __init__(self,
-                 resource_name: int,
+                 resource_name: Union[str, SerialBus],
                  address: int,
                  baudrate: int,
                  timeout: float,
                  supported_baudrate: Union[list, tuple],
-                 rw_delay: Union[list, tuple], **kwargs):
+                 rw_delay: Union[list, tuple],
+                 frame_size: int = None,
+                 frame_tail: int = None, **kwargs):
         super().__init__(resource_name, timeout, **kwargs)
+        self._frame_cache = {}
         self._address = address
         self._instrument.baudrate = baudrate
+        self._instrument.timeout = timeout
         self._supported_baudrate = supported_baudrate
         assert baudrate in supported_baudrate
         self._rw_delay = rw_delay
+        self._frame_size = frame_size
+        self._frame_tail = None if frame_tail is None else bytes([frame_tail])
+
+    @property
+    def address(self):
+        return self._address
+
+    @address.setter
+    def address(self, address: int):
+        """
+        修改仪器地址, 同时清除已缓存的命令帧, 在SerialBus总线上时按新地址重新登记
+        :param address: (type int) 仪器地址
+        :raise ParamException: 总线上的新地址已被其他仪器使用
+        """
+        if address != self._address:
+            if self._bus is not None:
+                self._bus.readdress(self, address)
+            self._address = address
+            self._frame_cache.clear()
 
     @property
     def supported_baudrate(self):
@@ -38,6 +80,14 @@ class FrameInstrument(Instrument, ABC):
     def rw_delay(self):
         return self._rw_delay
 
+    @property
+    def frame_size(self):
+        return self._frame_size
+
+    @property
+    def frame_tail(self):
+        return self._frame_tail
+
     @staticmethod
     def list_resources():
         """
@@ -52,33 +102,71 @@ class FrameInstrument(Instrument, ABC):
 
     def read(self, retry=10):
         """
-        串口读数据
-        :param retry: type int, 重试次数
+        串口读数据, 若指定了帧长度或帧尾, 则按帧读取, 读取到完整的一帧后立即返回;
+        否则按波特率对应的延时轮询读取
+        :param retry: type int, 重试次数(按帧读取时为连续超时未收到数据的次数)
         :return: 二进制数据list
         """
         if retry < 1:
             retry = 1
+        if self._frame_size is None and self._frame_tail is None:
+            result = self._poll_read(retry)
+        else:
+            result = self._frame_read(retry)
+
+        if len(result) == 0:
+            raise IOError("can't read data after retrying %d times" % retry)
+
+        self._logger.info("recv: %s", result.hex(' ').upper())
+
+        return list(result)
+
+    def _poll_read(self, retry):
+        """
+        按波特率对应的延时轮询读取串口缓存中的所有数据
+        :param retry: type int, 重试次数
+        :return: 二进制数据bytearray
+        """
         count = 0
+        size = 0
         result = bytearray()
+        delay = self._rw_delay[self._supported_baudrate.index(self._instrument.baudrate)]
         while retry > count:
             size = self._instrument.inWaiting()
             if size == 0:
-                time.sleep(self._rw_delay[self._supported_baudrate.index(self._instrument.baudrate)])
+                time.sleep(delay)
                 count += 1
             else:
                 break
         while size > 0:
-            buff = bytearray(self._instrument.read(size))
-            result += buff
-            time.sleep(self._rw_delay[self._supported_baudrate.index(self._instrument.baudrate)])
+            result += self._instrument.read(size)
+            time.sleep(delay)
             size = self._instrument.inWaiting()
+        return result
 
-        if len(result) == 0:
-            raise IOError("can't read data after retrying %d times" % retry)
-
-        self._logger.info("recv: %s" % " ".join(["%02X" % i for i in result]))
-
-        return list(result)
+    def _frame_read(self, retry):
+        """
+        按帧读取, 阻塞在串口上直到收到完整的一帧(定长或帧尾), 超时时间为串口timeout
+        :param retry: type int, 连续超时未收到数据的最大次数
+        :return: 二进制数据bytearray
+        """
+        count = 0
+        result = bytearray()
+        while retry > count:
+            if self._frame_size is not None:
+                buff = self._instrument.read(self._frame_size - len(result))
+            else:
+                buff = self._instrument.read_until(self._frame_tail)
+            if len(buff) == 0:
+                count += 1
+                continue
+            result += buff
+            if self._frame_complete(result):
+                break
+        else:
+            if len(result) > 0:
+                raise IOError("incomplete frame: %s" % " ".join(["%02X" % i for i in result]))
+        return result
 
     def write(self, cmd, *args, **kwargs):
         """
@@ -87,8 +175,13 @@ class FrameInstrument(Instrument, ABC):
         :return: None
         """
         if cmd is not None:
-            self._logger.info("send: " + " ".join(["%02X" % i for i in cmd]))
-            self._instrument.write(bytearray(cmd))
+            if not isinstance(cmd, (bytes, bytearray)):
+                cmd = bytearray(cmd)
+            self._logger.info("send: %s", cmd.hex(' ').upper())
+            if self._frame_size is not None or self._frame_tail is not None:
+                # 丢弃上一次残留的数据, 保证读到的是本次命令的响应帧
+                self._instrument.reset_input_buffer()
+            self._instrument.write(cmd)
             # time.sleep(self._rw_delay[self._supported_baudrate.index(self._instrument.baudrate)])
 
     def query(self, cmd, *args, **kwargs):
@@ -98,17 +191,44 @@ class FrameInstrument(Instrument, ABC):
         :return: 二进制数据list
         """
         if cmd is not None:
-            self.write(cmd)
-            return self.read()
+            with self._lock:
+                self.write(cmd)
+                return self.read()
+
+    def _run(self, proc):
+        """
+        执行命令过程, 命令过程为生成器, 依次生成(方法名, 参数...)形式的I/O请求并接收请求结果,
+        生成器的返回值即为执行结果. 同步与异步(AsyncFrameInstrument)仪器共用同一命令过程
+        :param proc: (type generator) 命令过程
+        :return: 命令过程的返回值
+        """
+        try:
+            request = next(proc)
+            while True:
+                request = proc.send(getattr(self, request[0])(*request[1:]))
+        except StopIteration as e:
+            return e.value
 
-    def open(self, resource_name: str, reopen: bool = False):
+    @property
+    def bus(self):
+        return self._bus
+
+    def open(self, resource_name: Union[str, SerialBus], reopen: bool = False):
         """
         打开串口(帧协议)资源
-        :param resource_name: 串口资源名称
+        :param resource_name: 串口资源名称, 或者SerialBus总线对象(多台仪器共用一个串口)
         :param reopen: 是否重新打开
         :return: None
         :raise ResourceException
         """
+        if isinstance(resource_name, SerialBus):
+            self._bus = resource_name
+            self._lock = resource_name.lock
+            self._resource_name = resource_name.resource_name
+            self._instrument = resource_name.serial
+            return self._instrument
+        self._bus = None
+        self._lock = threading.RLock()
         try:
             if resource_name is None:
                 if self._resource_name is None:
@@ -129,4 +249,15 @@ class FrameInstrument(Instrument, ABC):
         except Exception as e:
             raise ResourceException(e)
 
-
+    def close(self):
+        """
+        关闭串口资源, 如果仪器在SerialBus总线上, 则只从总线上移除, 不关闭串口
+        """
+        if self._bus is not None:
+            self.cache_clear()
+            self._bus.release(self._address)
+            self._bus = None
+            self._instrument = None
+            self._resource_name = None
+        else:
+            super().close()
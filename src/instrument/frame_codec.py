@@ -0,0 +1,166 @@
+# -*- encoding: utf-8 -*-
+"""
+@File    : frame_codec.py
+@Time    : 2026/10/17 17:40
+@Author  : blockish
+@Email   : blockish@yeah.net
+"""
+__all__ = {
+    'FrameCodec',
+}
+
+import struct
+from typing import Union
+
+
+class FrameCodec:
+    """
+    帧协议编解码器, 每种协议只需声明一次帧结构:
+        帧头(1字节) [长度] 地址 命令字及数据(body) [填充] 校验和(1字节) [帧尾(1字节)]
+    编码时直接写入预分配的bytearray, 解码时通过memoryview校验帧头, 帧尾, 长度及校验和, 不产生中间list
+    """
+
+    def __init__(self,
+                 head: int,
+                 address_fmt: str = 'B',
+                 size: int = None,
+                 tail: int = None,
+                 length_fmt: str = None,
+                 length_adjust: int = 0,
+                 checksum_from: int = 0):
+        """
+        :param head: (type int) 帧头
+        :param address_fmt: (type str) 地址字段的struct格式, 如'B', '>H'
+        :param size: (type int) 定长帧的帧长度, 不足部分以0填充, 为None时为变长帧
+        :param tail: (type int) 帧尾, 为None时无帧尾
+        :param length_fmt: (type str) 长度字段的struct格式, 紧跟帧头, 为None时无长度字段
+        :param length_adjust: (type int) 长度字段值与帧总长度的差值, 即 长度字段值 = 帧总长度 + length_adjust
+        :param checksum_from: (type int) 校验和的起始字节索引, 校验和为从该字节到校验和之前所有字节之和的低8位
+        """
+        self._head = head
+        self._address = struct.Struct(address_fmt)
+        self._size = size
+        self._tail = tail
+        self._length = None if length_fmt is None else struct.Struct(length_fmt)
+        self._length_adjust = length_adjust
+        self._checksum_from = checksum_from
+        self._address_offset = 1 + (0 if self._length is None else self._length.size)
+        self._body_offset = self._address_offset + self._address.size
+        self._trailer_size = 1 if tail is None else 2
+        self._structs = {}
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def tail(self):
+        return self._tail
+
+    @property
+    def body_offset(self):
+        """命令字及数据在帧中的起始索引"""
+        return self._body_offset
+
+    def frame_size(self, body_size: int) -> int:
+        """
+        计算帧总长度
+        :param body_size: (type int) 命令字及数据的字节数
+        :return: (type int) 帧总长度
+        """
+        if self._size is not None:
+            return self._size
+        return self._body_offset + body_size + self._trailer_size
+
+    def encode(self, address: int, body: Union[bytes, bytearray, list, tuple]) -> bytearray:
+        """
+        编码一帧数据
+        :param address: (type int) 仪器地址
+        :param body: 命令字及数据
+        :return: (type bytearray) 编码后的帧
+        """
+        frame = bytearray(self.frame_size(len(body)))
+        self.encode_into(frame, address, body)
+        return frame
+
+    def encode_into(self, buffer: Union[bytearray, memoryview], address: int,
+                    body: Union[bytes, bytearray, list, tuple]) -> memoryview:
+        """
+        编码一帧数据到预分配的缓存中
+        :param buffer: (type bytearray or memoryview) 预分配的缓存, 长度不小于帧总长度
+        :param address: (type int) 仪器地址
+        :param body: 命令字及数据
+        :return: (type memoryview) 缓存中帧所在的部分
+        """
+        size = self.frame_size(len(body))
+        body_end = self._body_offset + len(body)
+        if body_end > size - self._trailer_size:
+            raise ValueError('frame body too long: %d bytes' % len(body))
+        frame = memoryview(buffer)[:size]
+        frame[0] = self._head
+        if self._length is not None:
+            self._length.pack_into(frame, 1, size + self._length_adjust)
+        self._address.pack_into(frame, self._address_offset, address)
+        frame[self._body_offset:body_end] = bytes(body)
+        if self._size is not None:
+            frame[body_end:size - self._trailer_size] = bytes(size - self._trailer_size - body_end)
+        checksum_index = size - self._trailer_size
+        frame[checksum_index] = self._checksum(frame, checksum_index)
+        if self._tail is not None:
+            frame[size - 1] = self._tail
+        return frame
+
+    def decode(self, frame: Union[bytes, bytearray, list]) -> memoryview:
+        """
+        校验并解码一帧数据
+        :param frame: 接收到的帧
+        :return: (type memoryview) 命令字及数据部分
+        :raise IOError: 帧头, 帧尾, 长度或校验和错误
+        """
+        if isinstance(frame, list):
+            frame = bytes(frame)
+        view = memoryview(frame)
+        size = len(view)
+        if size < self._body_offset + self._trailer_size:
+            raise IOError('frame too short: %d bytes' % size)
+        if view[0] != self._head:
+            raise IOError('frame head error: 0x%02X' % view[0])
+        if self._size is not None and size != self._size:
+            raise IOError('frame size error: %d, expect %d' % (size, self._size))
+        if self._tail is not None and view[size - 1] != self._tail:
+            raise IOError('frame tail error: 0x%02X' % view[size - 1])
+        if self._length is not None:
+            length = self._length.unpack_from(view, 1)[0]
+            if length != size + self._length_adjust:
+                raise IOError('frame length error: %d, frame size %d' % (length, size))
+        checksum_index = size - self._trailer_size
+        checksum = self._checksum(view, checksum_index)
+        if view[checksum_index] != checksum:
+            raise IOError('frame checksum error: 0x%02X, expect 0x%02X' % (view[checksum_index], checksum))
+        return view[self._body_offset:checksum_index]
+
+    def address(self, frame: Union[bytes, bytearray, memoryview]) -> int:
+        """
+        获取帧中的地址
+        :param frame: 帧数据
+        :return: (type int) 地址
+        """
+        return self._address.unpack_from(frame, self._address_offset)[0]
+
+    def unpack(self, fmt: str, frame: Union[bytes, bytearray, memoryview, list], offset: int = 0) -> tuple:
+        """
+        按struct格式一次性解析帧中的数据字段, struct对象按格式缓存
+        :param fmt: (type str) struct格式
+        :param frame: 帧数据
+        :param offset: (type int) 相对于命令字及数据起始位置的偏移
+        :return: (type tuple) 解析结果
+        """
+        fields = self._structs.get(fmt)
+        if fields is None:
+            fields = self._structs.setdefault(fmt, struct.Struct(fmt))
+        if isinstance(frame, list):
+            frame = bytes(frame)
+        return fields.unpack_from(frame, self._body_offset + offset)
+
+    def _checksum(self, frame: memoryview, end: int) -> int:
+        return sum(frame[self._checksum_from:end]) & 0xFF
@@ -1,2 +1,3 @@
 # -*- encoding: utf-8 -*-
 from .an8721p_frame import An8721pFrame
+from .an8721p_frame import AsyncAn8721pFrame
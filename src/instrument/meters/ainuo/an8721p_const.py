@@ -1,10 +1,15 @@
 # -*- encoding: utf-8 -*-
+from instrument.frame_codec import FrameCodec
 
 
 class An8721pCmd:
 
     BAUDRATE_TUPLE = (1200, 9600, 19200, 38400)
     RW_DELAY_TUPLE = (0.3, 0.3, 0.2, 0.2)
+    FRAME_HEAD = 0x7b               # 帧头
+    FRAME_TAIL = 0x7d               # 帧尾
+    # 帧编解码器: 帧头 帧长度(2字节, 大端) 地址 命令字(2字节) 数据 校验和(帧头后所有字节之和) 帧尾
+    CODEC = FrameCodec(head=FRAME_HEAD, address_fmt='B', tail=FRAME_TAIL, length_fmt='>H', checksum_from=1)
     SUCCESS = 0x00
     FAIL = 0x01
 
@@ -3,14 +3,61 @@ from constants import TUPLE_ON, TUPLE_OFF, ON
 from errors import ParamException
 from instrument import utils
 from instrument.frame import FrameInstrument
+from instrument.async_frame import AsyncFrameInstrument
 from .an8721p_const import An8721pCmd
 
 __all__ = {
     'An8721pFrame',
+    'AsyncAn8721pFrame',
 }
 
 
-class An8721pFrame(FrameInstrument):
+class An8721pProtocol:
+    """
+    AN8721P的帧构建, 解析及命令过程, 同步(An8721pFrame)与异步(AsyncAn8721pFrame)版本共用
+    """
+
+    def _params_query_proc(self, *names):
+        if 'nor' in names:
+            resp = yield 'query', self._cmd(An8721pCmd.NORMALS)
+            return utils.hex_to_value(resp[6:10], endian=utils.BIG_ENDIAN, magnif=100), \
+                utils.hex_to_value(resp[10:14], endian=utils.BIG_ENDIAN, magnif=10000), \
+                utils.hex_to_value(resp[14:22], endian=utils.BIG_ENDIAN, magnif=1000), \
+                utils.hex_to_value(resp[22:25], endian=utils.BIG_ENDIAN, magnif=1000), \
+                utils.hex_to_value(resp[25:28], endian=utils.BIG_ENDIAN, magnif=1000), \
+                utils.hex_to_value(resp[28:32], endian=utils.BIG_ENDIAN, magnif=1), \
+                utils.hex_to_value(resp[32:40], endian=utils.BIG_ENDIAN, magnif=100)
+        result = []
+        for name in names:
+            resp = yield 'query', self._cmd(An8721pCmd.QUERY_DICT.get(name))
+            result.append(self._parse_resp(resp, magnif=An8721pCmd.MAGNIFY_DICT.get(name)))
+        return result
+
+    def _frame_complete(self, frame):
+        """
+        Override(帧尾0x7d可能出现在数据或校验和中, 需结合帧头后2字节的帧长度判断)
+        """
+        if not frame.endswith(self._frame_tail):
+            return False
+        if len(frame) < An8721pCmd.CODEC.body_offset:
+            return False
+        return len(frame) >= int.from_bytes(frame[1:3], utils.BIG_ENDIAN)
+
+    def _cmd(self, cmd, param=None):
+        """构建命令"""
+        return An8721pCmd.CODEC.encode(self._address, (*cmd, *(param if param is not None else ())))
+
+    def _parse_resp(self, resp, magnif=1):
+        """解析结果"""
+        body = An8721pCmd.CODEC.decode(resp)
+        if len(body) < 2:
+            raise IOError('the data length is incorrect from serial')
+        result = int.from_bytes(body[2:], utils.BIG_ENDIAN) / magnif
+        self._logger.info('Execute command result: %s', result)
+        return result
+
+
+class An8721pFrame(An8721pProtocol, FrameInstrument):
     """
     Ainuo power meter model AN8721P
     """
@@ -19,7 +66,8 @@ class An8721pFrame(FrameInstrument):
         assert 0 < address < 255
         assert baudrate in An8721pCmd.BAUDRATE_TUPLE
         super().__init__(resource_name, address, baudrate, timeout,
-                         An8721pCmd.BAUDRATE_TUPLE, An8721pCmd.RW_DELAY_TUPLE)
+                         An8721pCmd.BAUDRATE_TUPLE, An8721pCmd.RW_DELAY_TUPLE,
+                         frame_tail=An8721pCmd.FRAME_TAIL)
 
     def idn(self):
         return 'AN8721P'
@@ -37,8 +85,8 @@ class An8721pFrame(FrameInstrument):
             param = (0x00, )
         else:
             raise ParamException('not support parameter %s' % on_off)
-        resp = self.query(self.__cmd(An8721pCmd.KEY_LOCK, param))
-        return An8721pCmd.SUCCESS == self.__parse_resp(resp, 1)
+        resp = self.query(self._cmd(An8721pCmd.KEY_LOCK, param))
+        return An8721pCmd.SUCCESS == self._parse_resp(resp, 1)
 
     def start(self):
         """
@@ -46,8 +94,8 @@ class An8721pFrame(FrameInstrument):
         :return:
             执行成功返回True, 否则返回False
         """
-        resp = self.query(self.__cmd(An8721pCmd.START))
-        return An8721pCmd.SUCCESS == self.__parse_resp(resp, 1)
+        resp = self.query(self._cmd(An8721pCmd.START))
+        return An8721pCmd.SUCCESS == self._parse_resp(resp, 1)
 
     def stop(self):
         """
@@ -55,8 +103,8 @@ class An8721pFrame(FrameInstrument):
         :return:
             执行成功返回True, 否则返回False
         """
-        resp = self.query(self.__cmd(An8721pCmd.STOP))
-        return An8721pCmd.SUCCESS == self.__parse_resp(resp, 1)
+        resp = self.query(self._cmd(An8721pCmd.STOP))
+        return An8721pCmd.SUCCESS == self._parse_resp(resp, 1)
 
     def clear(self):
         """
@@ -64,8 +112,8 @@ class An8721pFrame(FrameInstrument):
         :return:
             执行成功返回True, 否则返回False
         """
-        resp = self.query(self.__cmd(An8721pCmd.CLEAR))
-        return An8721pCmd.SUCCESS == self.__parse_resp(resp, 1)
+        resp = self.query(self._cmd(An8721pCmd.CLEAR))
+        return An8721pCmd.SUCCESS == self._parse_resp(resp, 1)
 
     def params_query(self, *names):
         """
@@ -90,20 +138,7 @@ class An8721pFrame(FrameInstrument):
                 当names中包含'nor', 返回值为 电压 电流 功率 功率因素 频率 时间 电能量 依次组成的tuple
                 否则返回以names中的值为顺序的查询值组成的list
         """
-        if 'nor' in names:
-            resp = self.query(An8721pCmd.NORMALS)
-            return utils.hex_to_value(resp[6:10], endian=utils.BIG_ENDIAN, magnif=100), \
-                utils.hex_to_value(resp[10:14], endian=utils.BIG_ENDIAN, magnif=10000), \
-                utils.hex_to_value(resp[14:22], endian=utils.BIG_ENDIAN, magnif=1000), \
-                utils.hex_to_value(resp[22:25], endian=utils.BIG_ENDIAN, magnif=1000), \
-                utils.hex_to_value(resp[25:28], endian=utils.BIG_ENDIAN, magnif=1000), \
-                utils.hex_to_value(resp[28:32], endian=utils.BIG_ENDIAN, magnif=1), \
-                utils.hex_to_value(resp[32:40], endian=utils.BIG_ENDIAN, magnif=100)
-        result = []
-        for name in names:
-            resp = self.query(An8721pCmd.QUERY_DICT.get(name))
-            result.append(self.__parse_resp(resp, magnif=An8721pCmd.MAGNIFY_DICT.get(name)))
-        return result
+        return self._run(self._params_query_proc(*names))
 
     def warning_buzzer(self, on_off):
         """
@@ -118,8 +153,8 @@ class An8721pFrame(FrameInstrument):
             param = (0x01,)
         else:
             raise ParamException('not support parameter: %s' % on_off)
-        resp = self.query(self.__cmd(An8721pCmd.WARNING_BUZZER, param))
-        return An8721pCmd.SUCCESS == self.__parse_resp(resp, 1)
+        resp = self.query(self._cmd(An8721pCmd.WARNING_BUZZER, param))
+        return An8721pCmd.SUCCESS == self._parse_resp(resp, 1)
 
     def warning_all_setting(self, group, volt_up, volt_low, volt_thr, curr_up, curr_low, curr_thr,
                             pow_up, pow_low, pow_thr, delay):
@@ -152,8 +187,8 @@ class An8721pFrame(FrameInstrument):
         param.extend(utils.value_to_hex(value=pow_thr, endian=utils.BIG_ENDIAN, size=3, magnif=100))
         param.extend(utils.value_to_hex(value=delay, endian=utils.BIG_ENDIAN, size=1, magnif=10))
 
-        resp = self.query(self.__cmd(An8721pCmd.WARNING_PARAMETERS, param))
-        return An8721pCmd.SUCCESS == self.__parse_resp(resp, 1)
+        resp = self.query(self._cmd(An8721pCmd.WARNING_PARAMETERS, param))
+        return An8721pCmd.SUCCESS == self._parse_resp(resp, 1)
 
     def warning_setting(self, group=None, volt_up=None, volt_low=None, volt_thr=None, curr_up=None, curr_low=None,
                         curr_thr=None, pow_up=None, pow_low=None, pow_thr=None, delay=None):
@@ -176,77 +211,77 @@ class An8721pFrame(FrameInstrument):
         count = 0
         if group is not None:
             param = (utils.value_to_hex(value=group, endian=utils.BIG_ENDIAN, size=1, magnif=1))
-            res = self.query(self.__cmd(An8721pCmd.WARNING_GROUP, param))
+            res = self.query(self._cmd(An8721pCmd.WARNING_GROUP, param))
             if An8721pCmd.SUCCESS == res:
                 count += 1
             else:
                 self._logger.warn('set warning group failed')
         if volt_up is not None:
             param = (utils.value_to_hex(value=volt_up, endian=utils.BIG_ENDIAN, size=2, magnif=100))
-            res = self.query(self.__cmd(An8721pCmd.WARNING_VOLTAGE_UPPER, param))
+            res = self.query(self._cmd(An8721pCmd.WARNING_VOLTAGE_UPPER, param))
             if An8721pCmd.SUCCESS == res:
                 count += 1
             else:
                 self._logger.warn('set warning voltage upper failed')
         if volt_low is not None:
             param = (utils.value_to_hex(value=volt_low, endian=utils.BIG_ENDIAN, size=2, magnif=100))
-            res = self.query(self.__cmd(An8721pCmd.WARNING_VOLTAGE_LOWER, param))
+            res = self.query(self._cmd(An8721pCmd.WARNING_VOLTAGE_LOWER, param))
             if An8721pCmd.SUCCESS == res:
                 count += 1
             else:
                 self._logger.warn('set warning voltage lower failed')
         if volt_thr is not None:
             param = (utils.value_to_hex(value=volt_thr, endian=utils.BIG_ENDIAN, size=2, magnif=100))
-            res = self.query(self.__cmd(An8721pCmd.WARNING_VOLTAGE_THRESHOLD, param))
+            res = self.query(self._cmd(An8721pCmd.WARNING_VOLTAGE_THRESHOLD, param))
             if An8721pCmd.SUCCESS == res:
                 count += 1
             else:
                 self._logger.warn('set warning voltage threshold failed')
         if curr_up is not None:
             param = (utils.value_to_hex(value=curr_up, endian=utils.BIG_ENDIAN, size=2, magnif=1000))
-            res = self.query(self.__cmd(An8721pCmd.WARNING_CURRENT_UPPER, param))
+            res = self.query(self._cmd(An8721pCmd.WARNING_CURRENT_UPPER, param))
             if An8721pCmd.SUCCESS == res:
                 count += 1
             else:
                 self._logger.warn('set warning current upper failed')
         if curr_low is not None:
             param = (utils.value_to_hex(value=curr_low, endian=utils.BIG_ENDIAN, size=2, magnif=1000))
-            res = self.query(self.__cmd(An8721pCmd.WARNING_CURRENT_LOWER, param))
+            res = self.query(self._cmd(An8721pCmd.WARNING_CURRENT_LOWER, param))
             if An8721pCmd.SUCCESS == res:
                 count += 1
             else:
                 self._logger.warn('set warning current lower failed')
         if curr_thr is not None:
             param = (utils.value_to_hex(value=curr_thr, endian=utils.BIG_ENDIAN, size=2, magnif=1000))
-            res = self.query(self.__cmd(An8721pCmd.WARNING_CURRENT_THRESHOLD, param))
+            res = self.query(self._cmd(An8721pCmd.WARNING_CURRENT_THRESHOLD, param))
             if An8721pCmd.SUCCESS == res:
                 count += 1
             else:
                 self._logger.warn('set warning current threshold failed')
         if pow_up is not None:
             param = (utils.value_to_hex(value=pow_up, endian=utils.BIG_ENDIAN, size=2, magnif=100))
-            res = self.query(self.__cmd(An8721pCmd.WARNING_POWER_UPPER, param))
+            res = self.query(self._cmd(An8721pCmd.WARNING_POWER_UPPER, param))
             if An8721pCmd.SUCCESS == res:
                 count += 1
             else:
                 self._logger.warn('set warning power upper failed')
         if pow_low is not None:
             param = (utils.value_to_hex(value=pow_low, endian=utils.BIG_ENDIAN, size=2, magnif=100))
-            res = self.query(self.__cmd(An8721pCmd.WARNING_POWER_LOWER, param))
+            res = self.query(self._cmd(An8721pCmd.WARNING_POWER_LOWER, param))
             if An8721pCmd.SUCCESS == res:
                 count += 1
             else:
                 self._logger.warn('set warning power lower failed')
         if pow_thr is not None:
             param = (utils.value_to_hex(value=pow_thr, endian=utils.BIG_ENDIAN, size=2, magnif=100))
-            res = self.query(self.__cmd(An8721pCmd.WARNING_POWER_THRESHOLD, param))
+            res = self.query(self._cmd(An8721pCmd.WARNING_POWER_THRESHOLD, param))
             if An8721pCmd.SUCCESS == res:
                 count += 1
             else:
                 self._logger.warn('set warning power threshold failed')
         if delay is not None:
             param = (utils.value_to_hex(value=delay, endian=utils.BIG_ENDIAN, size=1, magnif=10))
-            res = self.query(self.__cmd(An8721pCmd.WARNING_DELAY, param))
+            res = self.query(self._cmd(An8721pCmd.WARNING_DELAY, param))
             if An8721pCmd.SUCCESS == res:
                 count += 1
             else:
@@ -282,8 +317,8 @@ class An8721pFrame(FrameInstrument):
                                         else utils.raiser(ParamException('Parameter buzzer expect {ON|1|OFF|0}')),
                                         endian=utils.BIG_ENDIAN, size=1, magnif=1))
 
-        resp = self.query(self.__cmd(An8721pCmd.PARAMETERS, param))
-        return An8721pCmd.SUCCESS == self.__parse_resp(resp, 1)
+        resp = self.query(self._cmd(An8721pCmd.PARAMETERS, param))
+        return An8721pCmd.SUCCESS == self._parse_resp(resp, 1)
 
     def normal_setting(self, volt_r=None, curr_r=None, calc_m=None, calc_p=None, volt_ratio=None,
                        curr_ratio=None, curr_thr=None, e_time=None):
@@ -303,56 +338,56 @@ class An8721pFrame(FrameInstrument):
         count = 0
         if volt_r is not None:
             param = (utils.value_to_hex(value=volt_r, endian=utils.BIG_ENDIAN, size=1, magnif=1))
-            res = self.query(self.__cmd(An8721pCmd.VOLTAGE_RANGE, param))
+            res = self.query(self._cmd(An8721pCmd.VOLTAGE_RANGE, param))
             if An8721pCmd.SUCCESS == res:
                 count += 1
             else:
                 self._logger.warn('set voltage range failed')
         if curr_r is not None:
             param = (utils.value_to_hex(value=curr_r, endian=utils.BIG_ENDIAN, size=1, magnif=1))
-            res = self.query(self.__cmd(An8721pCmd.CURRENT_RANGE, param))
+            res = self.query(self._cmd(An8721pCmd.CURRENT_RANGE, param))
             if An8721pCmd.SUCCESS == res:
                 count += 1
             else:
                 self._logger.warn('set current range failed')
         if calc_m is not None:
             param = (utils.value_to_hex(value=calc_m, endian=utils.BIG_ENDIAN, size=1, magnif=1))
-            res = self.query(self.__cmd(An8721pCmd.CALCULATION_MODE, param))
+            res = self.query(self._cmd(An8721pCmd.CALCULATION_MODE, param))
             if An8721pCmd.SUCCESS == res:
                 count += 1
             else:
                 self._logger.warn('set calculator model failed')
         if calc_p is not None:
             param = (utils.value_to_hex(value=calc_p, endian=utils.BIG_ENDIAN, size=1, magnif=1))
-            res = self.query(self.__cmd(An8721pCmd.CALCULATION_PERIOD, param))
+            res = self.query(self._cmd(An8721pCmd.CALCULATION_PERIOD, param))
             if An8721pCmd.SUCCESS == res:
                 count += 1
             else:
                 self._logger.warn('set calculator period failed')
         if volt_ratio is not None:
             param = (utils.value_to_hex(value=volt_ratio, endian=utils.BIG_ENDIAN, size=2, magnif=10))
-            res = self.query(self.__cmd(An8721pCmd.VOLTAGE_RATIO, param))
+            res = self.query(self._cmd(An8721pCmd.VOLTAGE_RATIO, param))
             if An8721pCmd.SUCCESS == res:
                 count += 1
             else:
                 self._logger.warn('set voltage ratio failed')
         if curr_ratio is not None:
             param = (utils.value_to_hex(value=curr_ratio, endian=utils.BIG_ENDIAN, size=2, magnif=10))
-            res = self.query(self.__cmd(An8721pCmd.CURRENT_RATIO, param))
+            res = self.query(self._cmd(An8721pCmd.CURRENT_RATIO, param))
             if An8721pCmd.SUCCESS == res:
                 count += 1
             else:
                 self._logger.warn('set current ratio failed')
         if curr_thr is not None:
             param = (utils.value_to_hex(value=curr_thr, endian=utils.BIG_ENDIAN, size=2, magnif=1000))
-            res = self.query(self.__cmd(An8721pCmd.CURRENT_THRESHOLD, param))
+            res = self.query(self._cmd(An8721pCmd.CURRENT_THRESHOLD, param))
             if An8721pCmd.SUCCESS == res:
                 count += 1
             else:
                 self._logger.warn('set current threshold failed')
         if e_time is not None:
             param = (utils.value_to_hex(value=e_time, endian=utils.BIG_ENDIAN, size=4, magnif=1))
-            res = self.query(self.__cmd(An8721pCmd.TIME, param))
+            res = self.query(self._cmd(An8721pCmd.TIME, param))
             if An8721pCmd.SUCCESS == res:
                 count += 1
             else:
@@ -372,8 +407,8 @@ class An8721pFrame(FrameInstrument):
             param = (0x01,)
         else:
             raise ParamException('not support parameter: %s' % on_off)
-        resp = self.query(self.__cmd(An8721pCmd.ZERO_THRESHOLD, param))
-        return An8721pCmd.SUCCESS == self.__parse_resp(resp, 1)
+        resp = self.query(self._cmd(An8721pCmd.ZERO_THRESHOLD, param))
+        return An8721pCmd.SUCCESS == self._parse_resp(resp, 1)
 
     def volt_shield(self, volt):
         """
@@ -382,9 +417,9 @@ class An8721pFrame(FrameInstrument):
         :return:
             如果指令执行成功返回True,否则返回False
         """
-        resp = self.query(self.__cmd(An8721pCmd.VOLTAGE_SHIELD,
+        resp = self.query(self._cmd(An8721pCmd.VOLTAGE_SHIELD,
                                      utils.value_to_hex(volt, endian=utils.BIG_ENDIAN, size=3, magnif=100)))
-        return An8721pCmd.SUCCESS == self.__parse_resp(resp, 1)
+        return An8721pCmd.SUCCESS == self._parse_resp(resp, 1)
 
     def curr_shield(self, curr):
         """
@@ -395,52 +430,69 @@ class An8721pFrame(FrameInstrument):
         raise:
             IOException
         """
-        resp = self.query(self.__cmd(An8721pCmd.CURRENT_SHIELD,
+        resp = self.query(self._cmd(An8721pCmd.CURRENT_SHIELD,
                                      utils.value_to_hex(curr, endian=utils.BIG_ENDIAN, size=2, magnif=1)))
-        return An8721pCmd.SUCCESS == self.__parse_resp(resp, 1)
-
-    def __cmd(self, cmd, param=None):
-        """构建命令"""
-        param_len = 0 if param is None else len(param)
-        length = param_len + 8
-        res = [0x7b, ]
-        res.extend(utils.value_to_hex(length, endian=utils.BIG_ENDIAN, size=2, magnif=1))
-        res.append(self._address)
-        res.extend(cmd)
-        res.extend(param if param is not None else ())
-        count = 0
-        for i in range(len(res) - 1):
-            count = count + res[i + 1]
-        res.extend(utils.value_to_hex(value=count, endian=utils.BIG_ENDIAN, size=1, magnif=1))
-        res.append(0x7d)
-        return res
-
-    def __parse_resp(self, resp, magnif=1):
-        """解析结果"""
-        length = len(resp)
-        start = 6
-        end = length - 2
-        if end < start:
-            raise IOError()
-        result = utils.hex_to_value(resp[start:end], utils.BIG_ENDIAN, magnif)
-        self._logger.info('Execute command result: %s', result)
-        return result
-
-
-
-
-
-
-
-
-
-
+        return An8721pCmd.SUCCESS == self._parse_resp(resp, 1)
 
+class AsyncAn8721pFrame(An8721pProtocol, AsyncFrameInstrument):
+    """
+    AN8721P功率计的asyncio版本, 帧的构建及解析与同步版本共用(An8721pProtocol)
+    """
 
+    def __init__(self, resource_name, address=1, baudrate=9600, timeout=0.15):
+        assert 0 < address < 255
+        super().__init__(resource_name, address, baudrate, timeout, An8721pCmd.BAUDRATE_TUPLE,
+                         frame_tail=An8721pCmd.FRAME_TAIL)
 
+    async def idn(self):
+        return 'AN8721P'
 
+    async def remote(self, on_off):
+        """
+        Override(远程操作开关)
+        :param on_off: (type str) 可选值 {ON|1|OFF|0}
+        :return:
+            如果指令执行成功返回True,否则返回False
+        """
+        if on_off in TUPLE_ON:
+            param = (0x01, )
+        elif on_off in TUPLE_OFF:
+            param = (0x00, )
+        else:
+            raise ParamException('not support parameter %s' % on_off)
+        return await self._execute(An8721pCmd.KEY_LOCK, param)
 
+    async def start(self):
+        """
+        启动测量, 相当于按前面板的Start键
+        :return:
+            执行成功返回True, 否则返回False
+        """
+        return await self._execute(An8721pCmd.START)
 
+    async def stop(self):
+        """
+        停止测量, 相当于按前面板的Stop键
+        :return:
+            执行成功返回True, 否则返回False
+        """
+        return await self._execute(An8721pCmd.STOP)
 
+    async def clear(self):
+        """
+        清除测量值
+        :return:
+            执行成功返回True, 否则返回False
+        """
+        return await self._execute(An8721pCmd.CLEAR)
 
+    async def params_query(self, *names):
+        """
+        查询测量结果, 参见An8721pFrame.params_query
+        """
+        return await self._run(self._params_query_proc(*names))
 
+    async def _execute(self, cmd, param=None):
+        """执行控制或设置命令, 返回是否成功"""
+        resp = await self.query(self._cmd(cmd, param))
+        return An8721pCmd.SUCCESS == self._parse_resp(resp, 1)
@@ -7,12 +7,21 @@
 """
 __all__ = {
     'Md3058Scpi',
+    'Readings',
 }
 
+from collections import namedtuple
+
+from errors import InstrumentException
 from instrument import utils
+from instrument.const import ROOT_SEPARATOR
 from instrument.meters.rigol.md3058_scpi_const import *
+from instrument.response import nr3, nr3_array
 from instrument.scpi import ScpiInstrument
 
+# acquire的结果, values为numpy.ndarray, interval为采样间隔(S)
+Readings = namedtuple('Readings', ('values', 'interval'))
+
 
 class Md3058Scpi(ScpiInstrument):
     """
@@ -247,6 +256,14 @@ class Md3058Scpi(ScpiInstrument):
             self.write(Md3058RigolCmd.DICT_MEASURE_SET.get(name), value)
         return self.query(Md3058RigolCmd.DICT_MEASURE_GET.get(name))
 
+    def measure_value(self, name) -> float:
+        """
+        查询并解析测量值
+        :param name: (type str) 测量值名称, 如 dc_volt_value, ac_volt_value, 参考measure
+        :return: (type float) 测量值, 超量程为inf, 无效值为nan
+        """
+        return self.query_as(nr3, Md3058RigolCmd.DICT_MEASURE_GET.get(name))
+
     def measure_rate(self, mode, rate=None):
         """
         设置或查询测量模式下速率
@@ -323,6 +340,44 @@ class Md3058Scpi(ScpiInstrument):
             query_cmd = utils.contact_spci_cmd(query_cmd, Md3058RigolCmd.DICT_TRIGGER_GET.get(name))
         return self.query(query_cmd)
 
+    def acquire(self, count: int, source: str = 'SINGLE', inter: int = None, timeout: float = 10,
+                mode: str = None) -> Readings:
+        """
+        多点缓冲采集: 一次设置触发源及单次触发的采样数目并触发, 读数保存在仪器中,
+        采集完成后以一次FETCh?传输读取全部读数, 不再每个读数一次查询
+        :param count: (type int) 单次触发的采样数目
+        :param source: (type str) 触发源, 可选值为{SING|SINGLE|EXT}, SING(LE)时发送手动触发信号, EXT时等待外部触发
+        :param inter: (type int) 自动触发积分时间, 单位ms, 为None时不修改, 参考trigger_mode
+        :param timeout: (type float) 等待采集完成及传输的超时时间, 单位S
+        :param mode: (type str) 当前的测量功能, 可选值参考measure_rate, 用于由测量速率推算采样间隔
+        :return:
+            (type Readings) (values, interval):
+                values: (type numpy.ndarray of float64) count个读数, 超量程为inf, 无效值为nan
+                interval: (type float) 由测量速率推算的名义采样间隔(1 / 每秒读数), 单位S,
+                    mode为None时为None, 实际间隔还与自动调零, 量程等设置有关
+        """
+        write_cmd = None
+        for key, value in (('source', source), ('count', count), ('inter', inter)):
+            if value is not None:
+                write_cmd = utils.contact_spci_cmd(write_cmd, Md3058RigolCmd.DICT_TRIGGER_SET.get(key), value,
+                                                   sep=ROOT_SEPARATOR)
+        self.write(write_cmd)
+        interval = None
+        if mode is not None:
+            rate = self.query(Md3058RigolCmd.DICT_MEASURE_RATE_GET.get(mode)).strip().upper()
+            readings = Md3058RigolCmd.DICT_READING_RATE.get(rate[:1])
+            if readings is None:
+                raise InstrumentException('unknown measure rate: %r' % rate)
+            interval = 1 / readings
+        if source.upper() in Md3058RigolCmd.TUPLE_SOURCE_SINGLE:
+            self.manual_trigger()
+        self.wait_complete(timeout)
+        with self.visa_timeout(timeout):
+            values = self.query_as(nr3_array, Md3058RigolCmd.FETCH)
+        if len(values) != count:
+            raise InstrumentException('expect %d readings, got %d' % (count, len(values)))
+        return Readings(values, interval)
+
     def manual_trigger(self):
         """
         发送一个手动触发信号
@@ -47,6 +47,10 @@ class Md3058RigolCmd:
     POLAR = ':POLA'
     PULSE_WIDTH = ':PULS'
 
+    FETCH = 'FETC?'
+    TUPLE_SOURCE_SINGLE = ('SING', 'SINGLE')    # 手动(单次)触发源的短格式及长格式
+    DICT_READING_RATE = {'F': 123., 'M': 20., 'S': 2.5}    # 测量速率对应的每秒读数, 参考measure_rate
+
     CALCULATE = 'CALC'
     _FUNCTION = ':FUNC'
     STATISTIC = ':STAT'
@@ -1,2 +1,4 @@
 # -*- encoding: utf-8 -*-
 from .wt300e_scpi import Wt300eScpi
+from .recall import StoredRun
+from .integration import IntegrationSession
@@ -0,0 +1,158 @@
+# -*- encoding: utf-8 -*-
+"""
+@File    : integration.py
+@Time    : 2026/10/18 03:40
+@Author  : blockish
+@Email   : blockish@yeah.net
+"""
+__all__ = {
+    'IntegrationSession',
+    'IntegrationReading',
+}
+
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from errors import InstrumentException
+from instrument import utils
+from instrument.const import ROOT_SEPARATOR
+from .wt300e_scpi_const import Wt300eCmd
+
+TIME_ITEM = 'TIME'                  # 积分经过时间
+FUNCTIONS = ('WH', 'AH')            # 默认的积分功能: 有功电能, 电流安时
+
+# read的结果, values及delta与IntegrationSession.items一一对应
+IntegrationReading = namedtuple('IntegrationReading', ('timestamp', 'elapsed', 'values', 'delta'))
+
+
+class IntegrationSession:
+    """
+    WT300E积分(电能)会话: 启动/停止积分, 每次read只以FLOat读取一次累计值(经过时间, Wh, Ah等),
+    返回累计值及与上次读取之间的增量, 不需要在主机上对功率采样求和.
+    仪器重新上电或积分被复位后累计值从零开始, 检测到经过时间减小时把之前的累计值计入偏移, 运行总量保持连续;
+    断线重连后用attach绑定新的连接, 或用snapshot/restore在新进程中继续.
+    使用示例:
+    session = IntegrationSession(wt, elements=(1,), functions=('WH', 'WHP', 'WHM', 'AH'))
+    session.start(mode='NORMal')
+    while ...:
+        reading = session.read()
+        reading.elapsed, dict(zip(session.items, reading.values))
+    session.stop()
+    """
+
+    def __init__(self, meter, elements=(1,), functions=FUNCTIONS):
+        """
+        :param meter: (type Wt300eScpi) 功率计
+        :param elements: (type tuple) 元素, 可选值 {1|2|3|SIGMa}
+        :param functions: (type tuple of str) 积分功能, 如 WH, WHP, WHM, AH, AHP, AHM
+        """
+        self._items = tuple('%s,%s' % (function, element) for function in functions for element in elements)
+        self._meter = None
+        self._last = None                               # 上次读取的仪器原始累计值, 第0项为经过时间
+        self._offset = np.zeros(len(self._items) + 1)   # 仪器复位之前的累计值
+        self._timestamp = None
+        self.attach(meter)
+
+    @property
+    def items(self) -> tuple:
+        """累计值对应的数据项"""
+        return self._items
+
+    def attach(self, meter):
+        """
+        绑定(重新连接后的)功率计并重新设置FLOat输出的数据项, 不影响仪器中正在进行的积分
+        :param meter: (type Wt300eScpi) 功率计
+        :return: None
+        """
+        meter.numeric_float(TIME_ITEM, *self._items)
+        self._meter = meter
+
+    def start(self, mode: str = None, hour: int = None, minute: int = None, second: int = None, reset: bool = True):
+        """
+        开始积分
+        :param mode: (type str) 积分模式, 可选值 {NORMal|CONTinuous}, 为None时不修改
+        :param hour: (type int) 积分计时器小时位, 0~10000, 计时器均为None时不修改
+        :param minute: (type int) 积分计时器分钟位, 0~59
+        :param second: (type int) 积分计时器秒位, 0~59
+        :param reset: (type bool) 开始之前复位仪器的累计值及本会话的运行总量
+        :return: None
+        """
+        cmd = None
+        if mode is not None:
+            cmd = utils.contact_spci_cmd(cmd, Wt300eCmd.DICT_INTEGRATE_SET.get('mode'), mode, sep=ROOT_SEPARATOR)
+        if hour is not None or minute is not None or second is not None:
+            cmd = utils.contact_spci_cmd(cmd, Wt300eCmd.DICT_INTEGRATE_SET.get('timer'), hour or 0, minute or 0,
+                                         second or 0, sep=ROOT_SEPARATOR)
+        if reset:
+            cmd = utils.contact_spci_cmd(cmd, Wt300eCmd.DICT_INTEGRATE.get('reset'), sep=ROOT_SEPARATOR)
+            self._last = None
+            self._offset[:] = 0
+        cmd = utils.contact_spci_cmd(cmd, Wt300eCmd.DICT_INTEGRATE.get('start'), sep=ROOT_SEPARATOR)
+        self._meter.write(cmd)
+
+    def stop(self):
+        """
+        停止积分, 累计值保持
+        :return: None
+        """
+        self._meter.write(Wt300eCmd.DICT_INTEGRATE.get('stop'))
+
+    def state(self) -> str:
+        """
+        查询积分状态
+        :return: (type str) 积分状态, 如 RESet, READy, STARt, STOP, ERRor, TIMeup
+        """
+        return self._meter.query(Wt300eCmd.DICT_INTEGRATE.get('state')).strip()
+
+    def read(self) -> IntegrationReading:
+        """
+        读取一次累计值
+        :return: (type IntegrationReading) (timestamp, elapsed, values, delta):
+                timestamp: 主机时间(time.time()), 单位S
+                elapsed: 积分经过时间(含仪器复位之前的时间), 单位S
+                values: (type numpy.ndarray) 各数据项的运行总量
+                delta: (type numpy.ndarray) 与上次读取之间的增量, 第一次读取时等于values
+        """
+        raw = self._meter.numeric_float_values()
+        if len(raw) != len(self._items) + 1:
+            raise InstrumentException('integration items changed, call attach again')
+        previous = None if self._last is None else self._last + self._offset
+        if self._last is not None and raw[0] < self._last[0]:
+            # 经过时间减小, 仪器上的积分被复位(如重新上电), 之前的累计值计入偏移
+            self._offset += self._last
+        self._last = raw
+        self._timestamp = time.time()
+        total = raw + self._offset
+        delta = total if previous is None else total - previous
+        return IntegrationReading(self._timestamp, float(total[0]), total[1:], delta[1:])
+
+    def snapshot(self) -> dict:
+        """
+        会话状态, 可序列化为JSON保存, 用restore在新的进程中继续
+        :return: (type dict)
+        """
+        return {
+            'items': list(self._items),
+            'last': None if self._last is None else self._last.tolist(),
+            'offset': self._offset.tolist(),
+            'timestamp': self._timestamp,
+        }
+
+    @classmethod
+    def restore(cls, meter, snapshot: dict):
+        """
+        由snapshot恢复会话
+        :param meter: (type Wt300eScpi) 功率计
+        :param snapshot: (type dict) snapshot的返回值
+        :return: (type IntegrationSession)
+        """
+        session = cls.__new__(cls)
+        session._items = tuple(snapshot['items'])
+        session._meter = None
+        session._last = None if snapshot['last'] is None else np.asarray(snapshot['last'], dtype=np.float64)
+        session._offset = np.asarray(snapshot['offset'], dtype=np.float64)
+        session._timestamp = snapshot['timestamp']
+        session.attach(meter)
+        return session
@@ -0,0 +1,115 @@
+# -*- encoding: utf-8 -*-
+"""
+@File    : recall.py
+@Time    : 2026/10/18 03:10
+@Author  : blockish
+@Email   : blockish@yeah.net
+"""
+__all__ = {
+    'StoredRun',
+}
+
+import numpy as np
+
+from errors import InstrumentException
+from instrument import utils
+from instrument.const import ROOT_SEPARATOR
+from instrument.response import float_array
+from .wt300e_scpi_const import Wt300eCmd
+
+
+class StoredRun:
+    """
+    批量下载WT300E内部存储(STORe)的数字数据:
+    数据格式切换为FLOat, 每次传输把chunk个:RECall:NORMal:VALue?拼接为一条命令, 一次读取chunk个二进制块,
+    结果按块号写入预先分配的数组, 时间轴由存储间隔计算.
+    下载中断(如超时)后已下载的数据保留, 再次调用download从中断处继续.
+    存储的数据项为存储时:NUMeric:NORMal设置的数据项
+    使用示例:
+    run = StoredRun(wt, chunk=100)
+    while not run.complete:
+        try:
+            run.download()
+        except InstrumentException:
+            pass
+    run.times, run.values
+    """
+
+    def __init__(self, meter, chunk: int = 64, timeout: float = 10):
+        """
+        :param meter: (type Wt300eScpi) 功率计
+        :param chunk: (type int) 每次传输的块数
+        :param timeout: (type float) 每次传输的VISA超时时间, 单位S
+        """
+        self._meter = meter
+        self._chunk = chunk
+        self._timeout = timeout
+        items = meter.numeric_float()
+        self._blocks = int(meter.query(Wt300eCmd.DICT_RECALL_GET.get('number')))
+        self._period = meter.recall_period()
+        self._values = np.full((self._blocks, items), np.nan)
+        self._done = 0
+        self._interrupted = False
+
+    def __len__(self):
+        """存储的块数"""
+        return self._blocks
+
+    @property
+    def done(self) -> int:
+        """已下载的块数"""
+        return self._done
+
+    @property
+    def complete(self) -> bool:
+        return self._done >= self._blocks
+
+    @property
+    def period(self) -> float:
+        """存储间隔, 单位S"""
+        return self._period
+
+    @property
+    def times(self) -> np.ndarray:
+        """各块相对于第一块的时间, 单位S"""
+        return np.arange(self._blocks) * self._period
+
+    @property
+    def values(self) -> np.ndarray:
+        """数值, 形状为(块数, 数据项个数), 未下载的块为nan"""
+        return self._values
+
+    def download(self, stop: int = None) -> int:
+        """
+        从上次中断处继续下载
+        :param stop: (type int) 下载到第stop块(含), 默认最后一块
+        :return: (type int) 已下载的块数
+        :raise InstrumentException: 传输出错或超时, 已下载的数据保留, 可再次调用继续下载
+        """
+        meter = self._meter
+        stop = self._blocks if stop is None else min(stop, self._blocks)
+        if self._interrupted:
+            # 丢弃中断的传输中未读取的响应
+            meter.device_clear()
+            self._interrupted = False
+        items = self._values.shape[1]
+        try:
+            with meter.visa_timeout(self._timeout):
+                while self._done < stop:
+                    count = min(self._chunk, stop - self._done)
+                    cmd = None
+                    for nrf in range(self._done + 1, self._done + count + 1):
+                        cmd = utils.contact_spci_cmd(cmd, Wt300eCmd.DICT_RECALL_GET.get('normal'), nrf,
+                                                     sep=ROOT_SEPARATOR)
+                    meter.write(cmd)
+                    for index, block in enumerate(meter.read_blocks(count)):
+                        if len(block) != 4 * items:
+                            raise InstrumentException('block %d: expect %d items, got %d bytes'
+                                                      % (self._done + index + 1, items, len(block)))
+                        self._values[self._done + index] = float_array(block)
+                    self._done += count
+        except Exception as e:
+            self._interrupted = True
+            raise InstrumentException('recall interrupted after %d of %d blocks: %s'
+                                      % (self._done, self._blocks, e)) from e
+        return self._done
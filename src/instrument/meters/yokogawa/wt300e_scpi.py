@@ -1,17 +1,35 @@
 # -*- encoding: utf-8 -*-
 import time
+from collections import namedtuple
 
-from constants import TUPLE_ON_OFF
+import numpy as np
+from pyvisa.errors import VisaIOError
+
+from constants import TUPLE_OFF, TUPLE_ON_OFF
 from errors import InstrumentError
 from instrument import utils
-from instrument.const import Ieee488Cmd, EMPTY, COMMAS
-from .wt300e_scpi_const import Wt300eCmd
+from instrument.const import Ieee488Cmd, EMPTY, SPACE, COMMAS, ROOT_SEPARATOR
+from .wt300e_scpi_const import Wt300eCmd, NUMERIC_VALUES, STORE_INTERVAL
+from instrument.response import float_array
 from instrument.scpi import ScpiInstrument
 
 __all__ = {
     'Wt300eScpi',
+    'NumericUpdate',
+    'Harmonics',
 }
 
+UPDATE_BIT = 1      # 条件寄存器/扩展事件寄存器的UPD位(bit0), 数据更新期间为1, 下降沿表示更新完成
+
+# numeric_updates的每次更新
+NumericUpdate = namedtuple('NumericUpdate', ('update', 'timestamp', 'values', 'missed'))
+
+# harmonics的结果, values的形状为(len(items), len(orders))
+Harmonics = namedtuple('Harmonics', ('values', 'items', 'orders'))
+
+HARMONICS_TOTAL = 'TOTal'
+HARMONICS_DC = 'DC'
+
 
 class Wt300eScpi(ScpiInstrument):
     """
@@ -19,20 +37,30 @@ class Wt300eScpi(ScpiInstrument):
     """
     def __init__(self, resource_name, timeout=0):
         super().__init__(resource_name, timeout)
+        self.__float_items = None      # FLOat输出的数据项个数, 由numeric_float设置
+        self.__list_items = None       # FLOat输出的谐波列表数据项, 由harmonics_setup设置
+        self.__list_order = None
+
+    def cache_clear(self):
+        super().cache_clear()
+        self.__float_items = None
+        self.__list_items = None
 
     def remote(self, on_off=None):
+        if on_off in TUPLE_OFF:
+            self.cache_clear()
         if on_off in TUPLE_ON_OFF:
             return self.communicate_group('remote', remote=on_off)
         return self.communicate_group('remote')
 
-    def tst(self):
+    def tst(self, timeout=10):
         """
-        自检测试, (*TST命令为耗时操作)
+        自检测试, (*TST命令为耗时操作, 临时延长VISA超时时间等待仪器响应)
+        :param timeout: (type float) 自检测试的超时时间, 单位S
         :return: 自检测试状态, 非0为不通过, 具体查看仪器定义
         """
-        self.write(Ieee488Cmd.TST)
-        time.sleep(6)
-        return self.query()
+        with self.visa_timeout(timeout):
+            return self.query(Ieee488Cmd.TST)
 
     # aoutput group
 
@@ -194,12 +222,30 @@ class Wt300eScpi(ScpiInstrument):
         """
         write_cmd = None
         for key, value in values.items():
-            write_cmd = utils.contact_spci_cmd(write_cmd, Wt300eCmd.DICT_INPUT_VOLTAGE_SET.get(key), value)
+            if not self._cache_hit(Wt300eCmd.DICT_INPUT_VOLTAGE_SET.get(key), value):
+                write_cmd = utils.contact_spci_cmd(write_cmd, Wt300eCmd.DICT_INPUT_VOLTAGE_SET.get(key), value)
+        if write_cmd is not None:
+            self.write(write_cmd)
+            # 量程与自动量程等设置互相影响, 只保留本次写入的值, 之前的回读结果失效
+            for template in Wt300eCmd.DICT_INPUT_VOLTAGE_SET.values():
+                self._cache_put(template, None)
+            for key, value in values.items():
+                self._cache_put(Wt300eCmd.DICT_INPUT_VOLTAGE_SET.get(key), value)
+            self._cache_put('input_voltage', None)
 
         query_cmd = None
         for name in names:
             query_cmd = utils.contact_spci_cmd(query_cmd, Wt300eCmd.DICT_INPUT_VOLTAGE_GET.get(name))
-        return self.query(query_cmd)
+        if query_cmd is None:
+            return None
+        readback = self._cache_get('input_voltage', {})
+        result = readback.get(query_cmd)
+        if result is None:
+            result = self.query(query_cmd)
+            if self.cache():
+                readback[query_cmd] = result
+                self._cache_put('input_voltage', readback)
+        return result
 
     def input_current(self, *names, **values):
         """
@@ -384,8 +430,11 @@ class Wt300eScpi(ScpiInstrument):
             返回names中指定的查询值, 以分号(;)分割, 注意后面的换行字符'\n'
         """
         write_cmd = None
-        for key, value in values:
+        for key, value in values.items():
             write_cmd = utils.contact_spci_cmd(write_cmd, Wt300eCmd.DICT_INPUT_OTHERS_SET.get(key), value)
+        if write_cmd is not None:
+            # 波峰因数等设置会改变有效量程
+            self.cache_clear()
         self.write(write_cmd)
 
         query_cmd = None
@@ -548,7 +597,9 @@ class Wt300eScpi(ScpiInstrument):
         @return:
             格式化数据, 注意后面的换行字符'\n'
         """
-        if Wt300eCmd.REGEX_NUMERIC_FORMAT.match(fmt) is not None:
+        if fmt is not None and Wt300eCmd.REGEX_NUMERIC_FORMAT.match(fmt) is not None:
+            self.__float_items = None
+            self.__list_items = None
             self.write(Wt300eCmd.DICT_NUMERIC_SET.get('fmt'), fmt)
         return self.query(Wt300eCmd.DICT_NUMERIC_GET.get('fmt'))
 
@@ -582,6 +633,8 @@ class Wt300eScpi(ScpiInstrument):
         @return:
             返回names中指定的查询值, 以分号(;)分割, 注意后面的换行字符'\n'
         """
+        if len(values) > 0:
+            self.__float_items = None
         write_cmd = None
         for key, value in values.items():
             write_cmd = utils.contact_spci_cmd(write_cmd, Wt300eCmd.DICT_NUMERIC_NORMAL_SET.get(key), value)
@@ -603,6 +656,73 @@ class Wt300eScpi(ScpiInstrument):
         return self.query(utils.contact_spci_cmd(Wt300eCmd.DICT_NUMERIC_NORMAL_GET.get('header').format(nrf),
                                                  Wt300eCmd.DICT_NUMERIC_NORMAL_GET.get('value').format(nrf)))
 
+    def numeric_values(self, nrf=None) -> tuple:
+        """
+        查询并解析数字数据值
+        @param nrf: (type int) <NRf> = 1 to 255 (item number), 为None时查询:NUMeric:NORMal:NUMber设置的所有数据项
+        @return:
+            (type tuple of float) 数据值, 无数据(NAN)为nan, 超量程(INF)为inf
+        """
+        return self.query_as(NUMERIC_VALUES, Wt300eCmd.DICT_NUMERIC_NORMAL_GET.get('value'),
+                             EMPTY if nrf is None else nrf)
+
+    def numeric_float(self, *items) -> int:
+        """
+        切换为FLOat(IEEE单精度浮点)数字数据格式并设置数据项, 之后用numeric_float_values重复读取,
+        数据项只设置一次, 每次读取只传输一个定长二进制块, 不做文本解析
+        @param items: (type tuple of str) 按顺序输出的数据项, 格式参考numeric_normal的item<x>, 如 'U,1', 'P,SIGMa', 'I,1,3';
+                为空时使用仪器当前的数据项
+        @return:
+            (type int) 数据项的个数
+        """
+        with self.batch():
+            self.write(Wt300eCmd.DICT_NUMERIC_SET.get('fmt'), 'FLOat')
+            if len(items) > 0:
+                write_cmd = Wt300eCmd.DICT_NUMERIC_NORMAL_SET.get('number').format(len(items))
+                for index, item in enumerate(items):
+                    write_cmd = utils.contact_spci_cmd(
+                        write_cmd, Wt300eCmd.DICT_NUMERIC_NORMAL_SET.get('item%d' % (index + 1)), item,
+                        sep=ROOT_SEPARATOR)
+                self.write(write_cmd)
+                count = len(items)
+            else:
+                count = int(self.query(Wt300eCmd.DICT_NUMERIC_NORMAL_GET.get('number')))
+        self.__float_items = count
+        return count
+
+    def numeric_float_values(self, out=None) -> np.ndarray:
+        """
+        以FLOat格式查询numeric_float设置的所有数据项
+        @param out: (type numpy.ndarray) 保存结果的数组, 如记录数组的一行, 形状需为(数据项个数,)
+        @return:
+            (type numpy.ndarray of float64) 数据值, 形状固定为(数据项个数,), 无数据(NAN)为nan, 超量程(INF)为inf
+        """
+        if self.__float_items is None:
+            raise InstrumentError('FLOat output not configured, call numeric_float first')
+        self.write(Wt300eCmd.DICT_NUMERIC_NORMAL_GET.get('value'), EMPTY)
+        block = self.read_block()
+        if len(block) != 4 * self.__float_items:
+            raise InstrumentError('expect %d items, got %d bytes' % (self.__float_items, len(block)))
+        values = float_array(block)
+        if out is None:
+            return values
+        out[:] = values
+        return out
+
+    def numeric_float_records(self, count: int) -> np.ndarray:
+        """
+        以FLOat格式连续查询count次, 结果写入预先分配的数组
+        @param count: (type int) 查询次数
+        @return:
+            (type numpy.ndarray of float64) 形状为(count, 数据项个数)的数组, 每行为一次查询的数据值
+        """
+        if self.__float_items is None:
+            raise InstrumentError('FLOat output not configured, call numeric_float first')
+        records = np.empty((count, self.__float_items))
+        for row in records:
+            self.numeric_float_values(row)
+        return records
+
     def numeric_list(self, *names, **values):
         """
         设置和查询谐波测量数字列表数据输出相关参数
@@ -638,6 +758,8 @@ class Wt300eScpi(ScpiInstrument):
         @return:
             返回names中指定的查询值, 以分号(;)分割, 注意后面的换行字符'\n'
         """
+        if len(values) > 0:
+            self.__list_items = None
         write_cmd = None
         for key, value in values.items():
             write_cmd = utils.contact_spci_cmd(write_cmd, Wt300eCmd.DICT_NUMERIC_LIST_SET.get(key), value)
@@ -657,6 +779,58 @@ class Wt300eScpi(ScpiInstrument):
         """
         return self.query(Wt300eCmd.DICT_NUMERIC_LIST_GET.get('value'), nrf)
 
+    def numeric_list_float_values(self, nrf=1) -> np.ndarray:
+        """
+        以FLOat格式查询谐波测量数值列表数据, 需先用numeric_format('FLOat')或numeric_float切换格式
+        @param nrf: (type int) <NRf> = 1 to 32 (item number)
+        @return:
+            (type numpy.ndarray of float64) 谐波测量数值列表数据, 无数据(NAN)为nan, 超量程(INF)为inf
+        """
+        self.write(Wt300eCmd.DICT_NUMERIC_LIST_GET.get('value') + SPACE + '{}', nrf)
+        return float_array(self.read_block())
+
+    def harmonics_setup(self, *items, order: int = 50):
+        """
+        切换为FLOat数字数据格式并一次设置所有谐波测量数字列表数据项, 之后用harmonics一次传输读取全部数据项
+        使用示例:
+        wt.harmonics_setup(*('%s,%d' % (f, e) for f in ('U', 'I', 'P', 'PHIU', 'PHII') for e in (1, 2, 3)), order=50)
+        @param items: (type tuple of str) 数据项 '<Function>,<Element>', 1 to 32个, 格式参考numeric_list的item<x>
+        @param order: (type int) 最大输出谐波阶数, 1 to 50
+        @return:
+            None
+        """
+        if not 0 < len(items) <= 32:
+            raise InstrumentError('expect 1 to 32 harmonic items, got %d' % len(items))
+        write_cmd = utils.contact_spci_cmd(None, Wt300eCmd.DICT_NUMERIC_SET.get('fmt'), 'FLOat')
+        for key, value in (('number', len(items)), ('order', order), ('select', 'ALL')):
+            write_cmd = utils.contact_spci_cmd(write_cmd, Wt300eCmd.DICT_NUMERIC_LIST_SET.get(key), value,
+                                               sep=ROOT_SEPARATOR)
+        for index, item in enumerate(items):
+            write_cmd = utils.contact_spci_cmd(write_cmd, Wt300eCmd.DICT_NUMERIC_LIST_SET.get('item%d' % (index + 1)),
+                                               item, sep=ROOT_SEPARATOR)
+        self.write(write_cmd)
+        self.__list_items = items
+        self.__list_order = order
+
+    def harmonics(self) -> Harmonics:
+        """
+        以一次:NUMeric:LIST:VALue?二进制传输读取harmonics_setup设置的所有谐波测量数字列表数据
+        @return:
+            (type Harmonics) (values, items, orders):
+                values: (type numpy.ndarray of float64) 形状为(数据项个数, 阶数个数)的数值, 无数据(NAN)为nan
+                items: (type tuple of str) 各行的数据项
+                orders: (type tuple) 各列的阶数, 依次为'TOTal', 'DC', 1 ~ order
+        """
+        if self.__list_items is None:
+            raise InstrumentError('harmonic items not configured, call harmonics_setup first')
+        self.write(Wt300eCmd.DICT_NUMERIC_LIST_GET.get('value'))
+        values = float_array(self.read_block())
+        orders = (HARMONICS_TOTAL, HARMONICS_DC) + tuple(range(1, self.__list_order + 1))
+        if len(values) != len(self.__list_items) * len(orders):
+            raise InstrumentError('expect %d items x %d orders, got %d values'
+                                  % (len(self.__list_items), len(orders), len(values)))
+        return Harmonics(values.reshape(len(self.__list_items), len(orders)), self.__list_items, orders)
+
     def numeric_hold(self, on_off=None):
         """
         设置和查询数字数据保持功能的开/关(保持/释放)状态
@@ -725,6 +899,15 @@ class Wt300eScpi(ScpiInstrument):
         if int(self.recall_number()) > nrf:
             return self.query(':RECall:LIST:VALue? {}'.format(nrf))
 
+    def recall_period(self) -> float:
+        """
+        查询存储间隔并换算为秒, 即存储的相邻两个数据块之间的时间
+        @return:
+            (type float) 存储间隔, 单位S
+        """
+        interval = self.query_as(STORE_INTERVAL, Wt300eCmd.DICT_STORE_GET.get('interval'))
+        return interval.hour * 3600.0 + interval.minute * 60.0 + interval.second
+
     def recall_panel(self, nrf=1):
         """
         加载设置参数文件
@@ -759,15 +942,65 @@ class Wt300eScpi(ScpiInstrument):
             返回names中指定的查询值, 以分号(;)分割, 注意后面的换行字符'\n'
         """
         write_cmd = None
-        for key, value in values:
-            write_cmd = utils.contact_spci_cmd(Wt300eCmd.DICT_STATUS_SET.get(key), value)
+        for key, value in values.items():
+            write_cmd = utils.contact_spci_cmd(write_cmd, Wt300eCmd.DICT_STATUS_SET.get(key), value,
+                                               sep=ROOT_SEPARATOR)
         self.write(write_cmd)
 
         query_cmd = None
         for name in names:
-            query_cmd = utils.contact_spci_cmd(Wt300eCmd.DICT_STATUS_GET.get(name))
+            query_cmd = utils.contact_spci_cmd(query_cmd, Wt300eCmd.DICT_STATUS_GET.get(name), sep=ROOT_SEPARATOR)
         return self.query(query_cmd)
 
+    def numeric_updates(self, count: int = None, timeout: float = 10):
+        """
+        与数据更新同步的连续读取(生成器), 每次数据更新只读取一次:
+        传输过滤器1设为UPD位的下降沿(FALL), 每个周期用一条查询读取(清除)EESR, 以COMMunicate:WAIT等待更新完成
+        并再次读取(清除)EESR, 然后查询数值.
+        等待前读取的EESR中UPD位已置位, 说明上次读取数值期间已完成了一次更新, 该次更新未被单独读取, 可能遗漏;
+        等待超时时执行设备清除并重新等待, 之后的第一次更新同样标记为可能遗漏, 连续两次超时则抛出异常.
+        更新计数只按完成的等待周期累加, 不根据主机时间推算.
+        已用numeric_float配置FLOat输出时以二进制读取, 否则以文本解析.
+        需要环形缓冲时可用collections.deque(wt.numeric_updates(), maxlen=N)之类的方式消费
+        @param count: (type int) 读取的更新次数, 为None时一直读取直到生成器关闭
+        @param timeout: (type float) 等待每次更新的VISA超时时间, 单位S, 需大于数据更新间隔
+        @return:
+            (type generator of NumericUpdate) 每次更新的(update, timestamp, values, missed):
+                update: 更新计数(完成的等待周期数), 从1开始
+                timestamp: 更新完成后的主机时间(time.time()), 单位S
+                values: 数值, FLOat输出时为numpy.ndarray, 否则为tuple of float
+                missed: (type bool) 本次更新之前可能遗漏了更新(EESR的UPD位已置位或等待超时)
+        @raise InstrumentError: 连续两次等待超时
+        """
+        # 设置过滤器并清除之前的事件, 之后的第一次等待对应下一次更新
+        self.status_group('eesr', filter1='FALL')
+        eesr_cmd = Wt300eCmd.DICT_STATUS_GET.get('eesr')
+        wait_cmd = utils.contact_spci_cmd(eesr_cmd, Wt300eCmd.DICT_COMMUNICATE_SET.get('wait'), UPDATE_BIT,
+                                          sep=ROOT_SEPARATOR)
+        wait_cmd = utils.contact_spci_cmd(wait_cmd, eesr_cmd, sep=ROOT_SEPARATOR)
+        update = 0
+        timed_out = False
+        with self.visa_timeout(timeout):
+            while count is None or update < count:
+                try:
+                    before = int(self.query(wait_cmd).split(';')[0])
+                except VisaIOError as e:
+                    if timed_out:
+                        raise InstrumentError('waiting for data update error: %s' % e) from e
+                    self._logger.warning('waiting for update %d timed out, update(s) may be missed: %s',
+                                         update + 1, e)
+                    self.device_clear()
+                    timed_out = True
+                    continue
+                timestamp = time.time()
+                missed = timed_out or bool(before & UPDATE_BIT)
+                if missed:
+                    self._logger.warning('update(s) may be missed before update %d', update + 1)
+                timed_out = False
+                values = self.numeric_values() if self.__float_items is None else self.numeric_float_values()
+                update += 1
+                yield NumericUpdate(update, timestamp, values, missed)
+
     def store_state(self, on_off):
         """
         设置或查询存储开/关状态
@@ -791,10 +1024,10 @@ class Wt300eScpi(ScpiInstrument):
         if hour is not None \
                 or minute is not None \
                 or second is not None:
-            self.write(self.write(Wt300eCmd.DICT_STORE_SET.get('interval'),
-                                  0 if hour is None else hour,
-                                  0 if minute is None else minute,
-                                  0 if second is None else second))
+            self.write(Wt300eCmd.DICT_STORE_SET.get('interval'),
+                       0 if hour is None else hour,
+                       0 if minute is None else minute,
+                       0 if second is None else second)
         return self.query(Wt300eCmd.DICT_STORE_GET.get('interval'))
 
     def store_panel(self, nrf=1):
@@ -1,6 +1,29 @@
 # -*- encoding: utf-8 -*-
 from instrument import utils
-from instrument.const import SPACE, BRACE, INTERROGATION, COMMAS, IGNORE_CASE
+from instrument.const import EMPTY, SPACE, BRACE, INTERROGATION, COMMAS, IGNORE_CASE
+from instrument.response import ResponseParser, nr1, nr3
+
+# :NUMeric:NORMal:VALue?的数值, 以','分隔, 无数据为NAN, 超量程为INF
+NUMERIC_VALUES = ResponseParser(nr3, sep=COMMAS, repeat=True)
+# :STORe:INTerval?的存储间隔
+STORE_INTERVAL = ResponseParser(nr1, nr1, nr1, names=('hour', 'minute', 'second'), sep=COMMAS, name='StoreInterval')
+
+# _indexed中表示序号的占位符
+INDEX = object()
+
+
+def _indexed(key, count, *parts):
+    """
+    生成带序号的命令字典(类定义中的推导式无法访问类属性, 故以函数生成)
+    :param key: (type str) 字典键的模板, 如'item{}'
+    :param count: (type int) 序号个数, 序号从1开始
+    :param parts: (type tuple of str) 命令的各部分, 其中的INDEX替换为序号
+    :return: (type dict) {key.format(序号): 命令}
+    """
+    return {
+        key.format(i + 1): EMPTY.join(str(i + 1) if part is INDEX else part for part in parts)
+        for i in range(count)
+    }
 
 
 class Wt300eCmd:
@@ -33,6 +56,7 @@ class Wt300eCmd:
     RESET = ':RES'
 
     INPUT = 'INP'
+    VOLTAGE = ':VOLT'
     CURRENT = ':CURR'
     RANGE = ':RANG'
     AUTO = ':AUTO'
@@ -70,6 +94,23 @@ class Wt300eCmd:
     LIST = ':LIST'
     SELECT = ':SEL'
 
+    RATE = 'RATE'
+
+    RECALL = 'REC'
+
+    STORE = 'STOR'
+    INTERVAL = ':INT'
+    PANEL = ':PAN'
+
+    STATUS_GROUP = 'STAT'
+    CONDITION = ':COND'
+    EESE = ':EESE'
+    EESR = ':EESR'
+    ERROR = ':ERR'
+    QENABLE = ':QEN'
+    QMESSAGE = ':QMES'
+    SPOLL = ':SPOL'
+
     DICT_COMMUNICATE_SET = {
         'header': '{}{}{}{}'.format(COMMUNICATE, HEADER, SPACE, BRACE),
         'lockout': '{}{}{}{}'.format(COMMUNICATE, LOCKOUT, SPACE, BRACE),
@@ -87,18 +128,10 @@ class Wt300eCmd:
         'wait': '{}{}{}'.format(COMMUNICATE, WAIT, INTERROGATION),
     }
 
-    DICT_DISPLAY_SET = {
-        utils.dict_add({
-            'normal{}'.format(i + 1):
-                '{}{}{}{}{}{}{}{}'.format(DISPLAY, NORMAL, ITEM, i + 1, SPACE, BRACE, BRACE, BRACE)
-                for i in range(4)
-        }, {
-            'harmonic{}'.format(i + 1):
-                '{}{}{}{}{}{}{}{}'.format(DISPLAY, _HARMONICS, ITEM, i + 1, SPACE, BRACE, BRACE, BRACE)
-                for i in range(4)
-        },
-        )
-    }
+    DICT_DISPLAY_SET = utils.dict_add(
+        _indexed('normal{}', 4, DISPLAY, NORMAL, ITEM, INDEX, SPACE, BRACE, BRACE, BRACE),
+        _indexed('harmonic{}', 4, DISPLAY, _HARMONICS, ITEM, INDEX, SPACE, BRACE, BRACE, BRACE),
+    )
     DICT_DISPLAY_GET = {
         'normals': '{}{}{}'.format(DISPLAY, NORMAL, INTERROGATION),
         'harmonics': '{}{}{}'.format(DISPLAY, _HARMONICS, INTERROGATION),
@@ -129,6 +162,19 @@ class Wt300eCmd:
         'state': '{}{}{}'.format(INTEGRATE, STATE, INTERROGATION),
     }
 
+    DICT_INPUT_VOLTAGE_SET = {
+        'range': '{}{}{}{}{}'.format(INPUT, VOLTAGE, RANGE, SPACE, BRACE),
+        'auto': '{}{}{}{}{}'.format(INPUT, VOLTAGE, AUTO, SPACE, BRACE),
+        'conf': '{}{}{}{}{}'.format(INPUT, VOLTAGE, CONFIG, SPACE, BRACE),
+        'poj': '{}{}{}{}{}'.format(INPUT, VOLTAGE, PO_JUMP, SPACE, BRACE),
+    }
+    DICT_INPUT_VOLTAGE_GET = {
+        'range': '{}{}{}{}'.format(INPUT, VOLTAGE, RANGE, INTERROGATION),
+        'auto': '{}{}{}{}'.format(INPUT, VOLTAGE, AUTO, INTERROGATION),
+        'conf': '{}{}{}{}'.format(INPUT, VOLTAGE, CONFIG, INTERROGATION),
+        'poj': '{}{}{}{}'.format(INPUT, VOLTAGE, PO_JUMP, INTERROGATION),
+    }
+
     DICT_INPUT_CURRENT_SET = utils.dict_add({
             'range': '{}{}{}{}{}'.format(INPUT, CURRENT, RANGE, SPACE, BRACE),
             'auto': '{}{}{}{}{}'.format(INPUT, CURRENT, AUTO, SPACE, BRACE),
@@ -138,10 +184,7 @@ class Wt300eCmd:
             'ext_poj': '{}{}{}{}{}{}'.format(INPUT, CURRENT, EXT_SENSOR, PO_JUMP, SPACE, BRACE),
             'ratio': '{}{}{}{}{}{}'.format(INPUT, CURRENT, S_RATIO, ALL, SPACE, BRACE),
         },
-        {
-            'ratio_el{}'.format(i + 1):
-                '{}{}{}{}{}{}{}'.format(INPUT, CURRENT, S_RATIO, ELEMENT, i + 1, SPACE, BRACE) for i in range(3)
-        }
+        _indexed('ratio_el{}', 3, INPUT, CURRENT, S_RATIO, ELEMENT, INDEX, SPACE, BRACE)
     )
     DICT_INPUT_CURRENT_GET = utils.dict_add({
             'range': '{}{}{}{}'.format(INPUT, CURRENT, RANGE, INTERROGATION),
@@ -152,10 +195,7 @@ class Wt300eCmd:
             'ext_poj': '{}{}{}{}{}'.format(INPUT, CURRENT, EXT_SENSOR, PO_JUMP, INTERROGATION),
             'ratio': '{}{}{}{}'.format(INPUT, CURRENT, S_RATIO, INTERROGATION),
         },
-        {
-            'ratio_el{}'.format(i + 1):
-                '{}{}{}{}{}{}'.format(INPUT, CURRENT, S_RATIO, ELEMENT, i + 1, INTERROGATION) for i in range(3)
-        }
+        _indexed('ratio_el{}', 3, INPUT, CURRENT, S_RATIO, ELEMENT, INDEX, INTERROGATION)
     )
 
     DICT_INPUT_SCALING_SET = utils.dict_add({
@@ -164,18 +204,9 @@ class Wt300eCmd:
             'ct': '{}{}{}{}{}{}'.format(INPUT, SCALING, CT, ALL, SPACE, BRACE),
             'factor': '{}{}{}{}{}{}'.format(INPUT, SCALING, S_FACTOR, ALL, SPACE, BRACE),
         },
-        {
-            'vt_el{}'.format(i + 1):
-                '{}{}{}{}{}{}{}'.format(INPUT, SCALING, VT, ELEMENT, i + 1, SPACE, BRACE) for i in range(3)
-        },
-        {
-            'ct_el{}'.format(i + 1):
-                '{}{}{}{}{}{}{}'.format(INPUT, SCALING, CT, ELEMENT, i + 1, SPACE, BRACE) for i in range(3)
-        },
-        {
-            'factor_el{}'.format(i + 1):
-                '{}{}{}{}{}{}{}'.format(INPUT, SCALING, S_FACTOR, ELEMENT, i + 1, SPACE, BRACE) for i in range(3)
-        },
+        _indexed('vt_el{}', 3, INPUT, SCALING, VT, ELEMENT, INDEX, SPACE, BRACE),
+        _indexed('ct_el{}', 3, INPUT, SCALING, CT, ELEMENT, INDEX, SPACE, BRACE),
+        _indexed('factor_el{}', 3, INPUT, SCALING, S_FACTOR, ELEMENT, INDEX, SPACE, BRACE),
     )
     DICT_INPUT_SCALING_GET = utils.dict_add({
             'state': '{}{}{}{}'.format(INPUT, SCALING, STATE, INTERROGATION),
@@ -183,18 +214,9 @@ class Wt300eCmd:
             'ct': '{}{}{}{}{}'.format(INPUT, SCALING, CT, ALL, INTERROGATION),
             'factor': '{}{}{}{}'.format(INPUT, SCALING, S_FACTOR, INTERROGATION),
         },
-        {
-            'vt_el{}'.format(i + 1):
-                '{}{}{}{}{}{}'.format(INPUT, SCALING, VT, ELEMENT, i + 1, INTERROGATION) for i in range(3)
-        },
-        {
-            'ct_el{}'.format(i + 1):
-                '{}{}{}{}{}{}'.format(INPUT, SCALING, CT, ELEMENT, i + 1, INTERROGATION) for i in range(3)
-        },
-        {
-            'factor_el{}'.format(i + 1):
-                '{}{}{}{}{}{}'.format(INPUT, SCALING, S_FACTOR, ELEMENT, i + 1, INTERROGATION) for i in range(3)
-        },
+        _indexed('vt_el{}', 3, INPUT, SCALING, VT, ELEMENT, INDEX, INTERROGATION),
+        _indexed('ct_el{}', 3, INPUT, SCALING, CT, ELEMENT, INDEX, INTERROGATION),
+        _indexed('factor_el{}', 3, INPUT, SCALING, S_FACTOR, ELEMENT, INDEX, INTERROGATION),
     )
 
     DICT_INPUT_FILTER_SET = {
@@ -238,10 +260,7 @@ class Wt300eCmd:
             'delete': '{}{}{}{}{}'.format(NUMERIC, NORMAL, DELETE, SPACE, BRACE),
             'preset': '{}{}{}{}{}'.format(NUMERIC, NORMAL, PRESET, SPACE, BRACE),
         },
-        {
-            'item{}'.format(i + 1):
-                '{}{}{}{}{}{}'.format(NUMERIC, NORMAL, ITEM, i + 1, SPACE, BRACE) for i in range(255)
-        }
+        _indexed('item{}', 255, NUMERIC, NORMAL, ITEM, INDEX, SPACE, BRACE)
     )
     DICT_NUMERIC_NORMAL_GET = utils.dict_add({
             'number': '{}{}{}{}'.format(NUMERIC, NORMAL, NUMBER, INTERROGATION),
@@ -251,10 +270,7 @@ class Wt300eCmd:
             'header': '{}{}{}{}{}{}'.format(NUMERIC, NORMAL, HEADER, INTERROGATION, SPACE, BRACE),
             'value': '{}{}{}{}{}{}'.format(NUMERIC, NORMAL, VALUE, INTERROGATION, SPACE, BRACE),
         },
-        {
-            'item{}'.format(i + 1):
-                '{}{}{}{}{}'.format(NUMERIC, NORMAL, ITEM, i + 1, INTERROGATION) for i in range(255)
-        }
+        _indexed('item{}', 255, NUMERIC, NORMAL, ITEM, INDEX, INTERROGATION)
     )
 
     DICT_NUMERIC_LIST_SET = utils.dict_add({
@@ -265,10 +281,7 @@ class Wt300eCmd:
             'clear': '{}{}{}{}{}'.format(NUMERIC, LIST, CLEAR, SPACE, BRACE),
             'delete': '{}{}{}{}{}'.format(NUMERIC, LIST, DELETE, SPACE, BRACE),
         },
-        {
-            'item{}'.format(i + 1):
-                '{}{}{}{}{}{}'.format(NUMERIC, LIST, ITEM, i + 1, SPACE, BRACE) for i in range(32)
-        }
+        _indexed('item{}', 32, NUMERIC, LIST, ITEM, INDEX, SPACE, BRACE)
     )
     DICT_NUMERIC_LIST_GET = utils.dict_add({
             'number': '{}{}{}{}'.format(NUMERIC, LIST, NUMBER, INTERROGATION),
@@ -279,9 +292,47 @@ class Wt300eCmd:
             # 'delete': '{}{}{}{}'.format(NUMERIC, LIST, DELETE, INTERROGATION),
             'value': '{}{}{}{}'.format(NUMERIC, LIST, VALUE, INTERROGATION),
         },
-        {
-            'item{}'.format(i + 1):
-                '{}{}{}{}{}'.format(NUMERIC, LIST, ITEM, i + 1, INTERROGATION) for i in range(32)
-        }
+        _indexed('item{}', 32, NUMERIC, LIST, ITEM, INDEX, INTERROGATION)
+    )
+
+    DICT_RATE_SET = {
+        'time': '{}{}{}'.format(RATE, SPACE, BRACE),
+    }
+    DICT_RATE_GET = {
+        'time': '{}{}'.format(RATE, INTERROGATION),
+    }
+
+    DICT_STATUS_SET = utils.dict_add({
+            'eese': '{}{}{}{}'.format(STATUS_GROUP, EESE, SPACE, BRACE),
+            'qenable': '{}{}{}{}'.format(STATUS_GROUP, QENABLE, SPACE, BRACE),
+            'qmsg': '{}{}{}{}'.format(STATUS_GROUP, QMESSAGE, SPACE, BRACE),
+        },
+        _indexed('filter{}', 16, STATUS_GROUP, FILTER, INDEX, SPACE, BRACE)
+    )
+    DICT_STATUS_GET = utils.dict_add({
+            'cond': '{}{}{}'.format(STATUS_GROUP, CONDITION, INTERROGATION),
+            'eese': '{}{}{}'.format(STATUS_GROUP, EESE, INTERROGATION),
+            'eesr': '{}{}{}'.format(STATUS_GROUP, EESR, INTERROGATION),
+            'err': '{}{}{}'.format(STATUS_GROUP, ERROR, INTERROGATION),
+            'qenable': '{}{}{}'.format(STATUS_GROUP, QENABLE, INTERROGATION),
+            'qmsg': '{}{}{}'.format(STATUS_GROUP, QMESSAGE, INTERROGATION),
+            'spoll': '{}{}{}'.format(STATUS_GROUP, SPOLL, INTERROGATION),
+        },
+        _indexed('filter{}', 16, STATUS_GROUP, FILTER, INDEX, INTERROGATION)
     )
 
+    DICT_STORE_SET = {
+        'state': '{}{}{}{}'.format(STORE, STATE, SPACE, BRACE),
+        'interval': '{}{}{}{}{}{}{}{}'.format(STORE, INTERVAL, SPACE, BRACE, COMMAS, BRACE, COMMAS, BRACE),
+        'panel': '{}{}{}{}'.format(STORE, PANEL, SPACE, BRACE),
+    }
+    DICT_STORE_GET = {
+        'state': '{}{}{}'.format(STORE, STATE, INTERROGATION),
+        'interval': '{}{}{}'.format(STORE, INTERVAL, INTERROGATION),
+    }
+
+    DICT_RECALL_GET = {
+        'number': '{}{}{}'.format(RECALL, NUMBER, INTERROGATION),
+        'normal': '{}{}{}{}{}{}'.format(RECALL, NORMAL, VALUE, INTERROGATION, SPACE, BRACE),
+        'list': '{}{}{}{}{}{}'.format(RECALL, LIST, VALUE, INTERROGATION, SPACE, BRACE),
+    }
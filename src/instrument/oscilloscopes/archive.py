@@ -0,0 +1,206 @@
+# -*- encoding: utf-8 -*-
+"""
+@File    : archive.py
+@Time    : 2026/10/17 23:10
+@Author  : blockish
+@Email   : blockish@yeah.net
+"""
+__all__ = {
+    'WaveformWriter',
+    'WaveformFile',
+}
+
+import json
+import struct
+
+import numpy as np
+
+from errors import InstrumentException, ParamException
+from instrument.oscilloscopes.waveform import Preamble, Waveform
+
+# 波形存档文件格式(小端):
+#     MAGIC(8字节) | 头部长度(uint32) | 头部(JSON, 以空格补齐至header_size) | 采样码值 | 各段时间戳(float64, 可选)
+# 头部包含前导信息, 信号源, 仪器IDN, 设置快照, 数据偏移, 段数及每段点数, 采样码值按仪器传输的原始格式保存, 读取时直接映射
+MAGIC = b'PYIWFM01'
+PREFIX = struct.Struct('<8sI')
+
+
+class WaveformWriter:
+    """
+    波形存档写入, 仪器返回的原始数据块直接写入文件, 不解码也不复制
+    使用示例:
+    with WaveformWriter('ch1.wfm', preamble, source='CH1', idn=scope.idn()) as writer:
+        for ...:
+            writer.write(scope.read_block())
+    """
+
+    HEADER_SIZE = 4096      # 默认头部预留大小, 数据从该偏移开始, 便于按页映射
+
+    def __init__(self, path, preamble: Preamble, source: str = None, idn: str = None, settings: dict = None,
+                 header_size: int = HEADER_SIZE):
+        """
+        :param path: (type str) 文件路径
+        :param preamble: (type Preamble) 波形前导信息
+        :param source: (type str) 信号源
+        :param idn: (type str) 仪器IDN
+        :param settings: (type dict) 设置快照, 值需能够序列化为JSON
+        :param header_size: (type int) 头部预留大小, 含MAGIC及长度
+        """
+        self._header = {
+            'preamble': preamble.as_dict(),
+            'source': source,
+            'idn': None if idn is None else idn.strip(),
+            'settings': {} if settings is None else settings,
+            'dtype': '<i%d' % preamble.width if 'MSB' != preamble.byte_order else '>i%d' % preamble.width,
+            'offset': header_size,
+            'frames': None,
+            'points': 0,
+        }
+        self._header_size = header_size
+        self._timestamps = []
+        self._length = 0
+        self._file = open(path, 'wb')
+        self._write_header()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, err_type, err_val, err_tb):
+        self.close()
+
+    @property
+    def length(self):
+        """已写入的采样数据字节数"""
+        return self._length
+
+    def write(self, raw, timestamp: float = None):
+        """
+        追加采样码值数据, 分段存档时每次写入一段并给出该段的时间戳
+        :param raw: (type bytes-like) 采样码值数据(不含块头)
+        :param timestamp: (type float) 该段的时间戳, 单位S, 非分段存档时为None
+        :return: None
+        """
+        if timestamp is not None:
+            self._timestamps.append(timestamp)
+        self._file.write(raw)
+        self._length += len(raw)
+
+    def close(self):
+        """
+        写入时间戳并更新头部中的段数及点数
+        :return: None
+        """
+        if self._file.closed:
+            return
+        width = np.dtype(self._header['dtype']).itemsize
+        points = self._length // width
+        if len(self._timestamps) > 0:
+            self._header['frames'] = len(self._timestamps)
+            points //= len(self._timestamps)
+            self._file.write(np.asarray(self._timestamps, dtype='<f8').tobytes())
+        self._header['points'] = points
+        self._file.seek(0)
+        self._write_header()
+        self._file.close()
+
+    def _write_header(self):
+        header = json.dumps(self._header, ensure_ascii=False).encode()
+        if PREFIX.size + len(header) > self._header_size:
+            raise ParamException('header of %d bytes exceeds header_size %d' % (len(header), self._header_size))
+        self._file.write(PREFIX.pack(MAGIC, len(header)))
+        self._file.write(header.ljust(self._header_size - PREFIX.size))
+
+
+class WaveformFile:
+    """
+    波形存档读取, 采样码值及时间戳以numpy.memmap映射, 不读入内存;
+    waveform()只对选取的段解码
+    使用示例:
+    archive = WaveformFile('ch1.wfm')
+    archive.codes.shape -> (段数, 每段点数) 或 (点数,)
+    wave = archive.waveform(slice(0, 10))
+    """
+
+    def __init__(self, path, mode: str = 'r'):
+        """
+        :param path: (type str) 文件路径
+        :param mode: (type str) numpy.memmap的打开方式, 可选值 {r|r+|c}
+        """
+        with open(path, 'rb') as f:
+            magic, length = PREFIX.unpack(f.read(PREFIX.size))
+            if MAGIC != magic:
+                raise InstrumentException('%s is not a waveform archive: %r' % (path, magic))
+            self._header = json.loads(f.read(length))
+        offset = self._header['offset']
+        frames = self._header['frames']
+        points = self._header['points']
+        shape = (points,) if frames is None else (frames, points)
+        dtype = np.dtype(self._header['dtype'])
+        if points == 0:
+            # 空文件无法映射
+            self._codes = np.empty(shape, dtype=dtype)
+        else:
+            self._codes = np.memmap(path, dtype=dtype, mode=mode, offset=offset, shape=shape)
+        self._timestamps = None if frames is None else np.memmap(
+            path, dtype='<f8', mode=mode, offset=offset + self._codes.nbytes, shape=(frames,))
+        self._preamble = Preamble(**self._header['preamble'])
+
+    def __len__(self):
+        """每段的点数"""
+        return self._header['points']
+
+    def __repr__(self):
+        return '<WaveformFile: {} {} x {} points of {}>'.format(
+            self.source, self.frames, len(self), self._header['idn'])
+
+    @property
+    def header(self) -> dict:
+        return self._header
+
+    @property
+    def preamble(self) -> Preamble:
+        return self._preamble
+
+    @property
+    def source(self):
+        return self._header['source']
+
+    @property
+    def idn(self):
+        return self._header['idn']
+
+    @property
+    def settings(self) -> dict:
+        return self._header['settings']
+
+    @property
+    def frames(self) -> int:
+        """段数, 非分段存档为1"""
+        return 1 if self._timestamps is None else len(self._timestamps)
+
+    @property
+    def codes(self) -> np.memmap:
+        """采样码值, 分段存档时为二维数组(段数 x 每段点数)"""
+        return self._codes
+
+    @property
+    def timestamps(self):
+        """各段的时间戳, 非分段存档时为None"""
+        return self._timestamps
+
+    def waveform(self, frames=None) -> Waveform:
+        """
+        解码采样码值
+        :param frames: (type int or slice) 分段存档时需要解码的段, 默认全部
+        :return: (type Waveform) 波形
+        """
+        codes = self._codes
+        timestamps = self._timestamps
+        if timestamps is not None and frames is not None:
+            codes = codes[frames]
+            timestamps = timestamps[frames]
+            if codes.ndim == 1:
+                codes = codes[np.newaxis]
+                timestamps = timestamps[np.newaxis]
+        return self._preamble.waveform(codes.reshape(-1).view(np.uint8), self.source,
+                                       timestamps=None if timestamps is None else np.asarray(timestamps))
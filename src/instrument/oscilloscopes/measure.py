@@ -0,0 +1,435 @@
+# -*- encoding: utf-8 -*-
+"""
+@File    : measure.py
+@Time    : 2026/10/18 01:10
+@Author  : blockish
+@Email   : blockish@yeah.net
+"""
+__all__ = {
+    'WaveformMeasure',
+    'measure',
+}
+
+import re
+
+import numpy as np
+
+from errors import ParamException
+from instrument.oscilloscopes.waveform import Waveform
+
+REF_PERCENT = 'PERCent'
+REF_ABSOLUTE = 'ABSolute'
+METHOD_AUTO = 'AUTO'
+METHOD_HISTOGRAM = 'HIStogram'
+METHOD_MINMAX = 'MINMax'
+EDGE_RISE = 'RISe'
+EDGE_FALL = 'FALL'
+DIRECTION_FORWARDS = 'FORWards'
+DIRECTION_BACKWARDS = 'BACKWards'
+
+# AUTO方式下, 直方图众数所在区间的点数少于该比例时使用最大最小值
+AUTO_HISTOGRAM_RATIO = 0.05
+HISTOGRAM_BINS = 256
+
+
+def _match(value: str, mnemonic: str) -> bool:
+    """SCPI助记符匹配, 长短格式均可, 不区分大小写"""
+    value = value.upper()
+    return value == mnemonic.upper() or value == re.sub('[a-z]', '', mnemonic)
+
+
+class WaveformMeasure:
+    """
+    主机端波形测量, 与示波器的测量(MEASUrement)使用相同的参考电平定义, 参数名与Mdo3000Scpi.measure一致;
+    顶部/底部电平, 参考电平及边沿在第一次使用时计算并缓存, 同一波形的多项测量不重复计算.
+    测量值无法计算时(如没有完整周期)返回nan
+    使用示例:
+    meas = WaveformMeasure(scope.waveform_export('CH1'), ref_per_high=80, ref_per_low=20)
+    meas.rise(), meas.frequency(), meas.measure('PDUty')
+    meas.delay(WaveformMeasure(ch2), targ_edge='FALL')
+    """
+
+    # 测量类型(助记符) -> 方法名
+    TYPES = (
+        ('AMPlitude', 'amplitude'),
+        ('HIGH', 'high'),
+        ('LOW', 'low'),
+        ('MAXimum', 'maximum'),
+        ('MINImum', 'minimum'),
+        ('MEAN', 'mean'),
+        ('CMEan', 'cycle_mean'),
+        ('RMS', 'rms'),
+        ('CRMs', 'cycle_rms'),
+        ('PK2Pk', 'pk2pk'),
+        ('RISe', 'rise'),
+        ('FALL', 'fall'),
+        ('PERIod', 'period'),
+        ('FREQuency', 'frequency'),
+        ('PWIdth', 'positive_width'),
+        ('NWIdth', 'negative_width'),
+        ('PDUty', 'positive_duty'),
+        ('NDUty', 'negative_duty'),
+        ('POVershoot', 'positive_overshoot'),
+        ('NOVershoot', 'negative_overshoot'),
+        ('PEDGECount', 'rising_edges'),
+        ('NEDGECount', 'falling_edges'),
+        ('DELay', 'delay'),
+        ('PHAse', 'phase'),
+    )
+
+    def __init__(self, waveform: Waveform, ref_method: str = REF_PERCENT,
+                 ref_per_high: float = 90, ref_per_mid: float = 50, ref_per_low: float = 10,
+                 ref_abs_high: float = None, ref_abs_mid: float = None, ref_abs_low: float = None,
+                 targ_ref_per_mid: float = None, targ_ref_abs_mid: float = None, method: str = METHOD_AUTO):
+        """
+        :param waveform: (type Waveform) 波形, y轴为一维数组
+        :param ref_method: (type str) 参考电平方式, 可选值 {ABSolute|PERCent}
+        :param ref_per_high: (type float) PERCent方式的高参考电平, 相对于底部到顶部的百分比
+        :param ref_per_mid: (type float) PERCent方式的中参考电平
+        :param ref_per_low: (type float) PERCent方式的低参考电平
+        :param ref_abs_high: (type float) ABSolute方式的高参考电平, 单位同y轴
+        :param ref_abs_mid: (type float) ABSolute方式的中参考电平
+        :param ref_abs_low: (type float) ABSolute方式的低参考电平
+        :param targ_ref_per_mid: (type float) 作为延迟/相位测量的目标波形时, PERCent方式的中参考电平, 默认同ref_per_mid
+        :param targ_ref_abs_mid: (type float) 作为延迟/相位测量的目标波形时, ABSolute方式的中参考电平, 默认同ref_abs_mid
+        :param method: (type str) 顶部/底部电平的计算方法, 可选值 {AUTO|HIStogram|MINMax}
+        """
+        y = np.asarray(waveform.y, dtype=np.float64)
+        if y.ndim != 1:
+            raise ParamException('measure on one frame at a time, got y of shape %s' % (y.shape,))
+        self._waveform = waveform
+        self._y = y
+        self._ref_method = ref_method
+        self._refs = {
+            'per': (ref_per_high, ref_per_mid, ref_per_low),
+            'abs': (ref_abs_high, ref_abs_mid, ref_abs_low),
+        }
+        self._targ_ref_per_mid = ref_per_mid if targ_ref_per_mid is None else targ_ref_per_mid
+        self._targ_ref_abs_mid = ref_abs_mid if targ_ref_abs_mid is None else targ_ref_abs_mid
+        self._method = method
+        self._levels = None
+        self._refs_value = None
+        self._edges = None
+        self._targ_edges = None
+
+    @property
+    def waveform(self):
+        return self._waveform
+
+    def measure(self, meas_type: str, target=None, **kwargs) -> float:
+        """
+        按示波器的测量类型测量
+        :param meas_type: (type str) 测量类型, 参考TYPES, 长短格式均可, 如 'RISe', 'RIS', 'rise'
+        :param target: (type WaveformMeasure) DELay或PHAse测量的目标波形
+        :param kwargs: DELay测量的sour_edge, targ_edge, direction
+        :return: (type float) 测量值
+        """
+        for mnemonic, name in self.TYPES:
+            if _match(meas_type, mnemonic):
+                if name in ('delay', 'phase'):
+                    if target is None:
+                        raise ParamException('measurement %s requires a target' % meas_type)
+                    return getattr(self, name)(target, **kwargs)
+                return getattr(self, name)()
+        raise ParamException('unsupported measurement type %s' % meas_type)
+
+    """=============================== 电平 ==================================== """
+
+    def levels(self):
+        """
+        顶部及底部电平
+        :return: (type tuple of float) 顶部, 底部
+        """
+        if self._levels is None:
+            y = self._y
+            top, base = float(y.max()), float(y.min())
+            if not _match(self._method, METHOD_MINMAX) and top > base:
+                counts, bounds = np.histogram(y, bins=HISTOGRAM_BINS, range=(base, top))
+                half = HISTOGRAM_BINS // 2
+                upper = half + int(np.argmax(counts[half:]))
+                lower = int(np.argmax(counts[:half]))
+                threshold = 0 if _match(self._method, METHOD_HISTOGRAM) else AUTO_HISTOGRAM_RATIO * len(y)
+                # 取众数区间内采样的平均值, 不受区间宽度的量化影响
+                if counts[upper] > threshold:
+                    top = float(y[(y >= bounds[upper]) & (y <= bounds[upper + 1])].mean())
+                if counts[lower] > threshold:
+                    base = float(y[(y >= bounds[lower]) & (y <= bounds[lower + 1])].mean())
+            self._levels = top, base
+        return self._levels
+
+    def reference(self):
+        """
+        参考电平
+        :return: (type tuple of float) 高, 中, 低参考电平
+        """
+        if self._refs_value is None:
+            if _match(self._ref_method, REF_ABSOLUTE):
+                self._refs_value = self._refs['abs']
+                if None in self._refs_value:
+                    raise ParamException('ref_abs_high, ref_abs_mid and ref_abs_low required for ABSolute')
+            else:
+                top, base = self.levels()
+                self._refs_value = tuple(base + (top - base) * per / 100 for per in self._refs['per'])
+        return self._refs_value
+
+    def target_mid(self):
+        """作为目标波形时的中参考电平"""
+        if _match(self._ref_method, REF_ABSOLUTE):
+            if self._targ_ref_abs_mid is None:
+                raise ParamException('targ_ref_abs_mid or ref_abs_mid required for ABSolute')
+            return self._targ_ref_abs_mid
+        top, base = self.levels()
+        return base + (top - base) * self._targ_ref_per_mid / 100
+
+    """=============================== 边沿 ==================================== """
+
+    def _find_edges(self, high, mid, low):
+        """
+        以高/低参考电平为迟滞查找完整的边沿, 上升沿从最后一个低于低参考电平的点开始, 到第一个高于高参考电平的点结束
+        :return: (type dict) EDGE_RISE/EDGE_FALL -> (低参考电平时间, 中参考电平时间, 高参考电平时间)的数组, 单位为点
+        """
+        y = self._y
+        state = np.full(len(y), -1, dtype=np.int8)
+        state[y <= low] = 0
+        state[y >= high] = 1
+        index = np.flatnonzero(state >= 0)
+        edges = {}
+        if len(index) < 2:
+            return {EDGE_RISE: (np.empty(0),) * 3, EDGE_FALL: (np.empty(0),) * 3}
+        change = np.flatnonzero(np.diff(state[index]) != 0)
+        begin = index[change]           # 边沿前最后一个确定状态的点
+        end = index[change + 1]         # 边沿后第一个确定状态的点
+        rising = state[end] == 1
+        for edge, mask, sign in ((EDGE_RISE, rising, 1), (EDGE_FALL, ~rising, -1)):
+            a, b = begin[mask], end[mask]
+            edges[edge] = (self._cross(a, b, low if sign > 0 else high, sign),
+                           self._cross(a, b, mid, sign),
+                           self._cross(a, b, high if sign > 0 else low, sign))
+        return edges
+
+    def _cross(self, begin, end, level, sign):
+        """
+        在每个边沿[begin, end]内查找第一次穿越level的位置, 线性插值
+        :return: (type numpy.ndarray) 穿越位置, 单位为点
+        """
+        y = self._y
+        y0, y1 = y[:-1], y[1:]
+        if sign > 0:
+            crossing = np.flatnonzero((y0 <= level) & (y1 >= level) & (y0 < y1))
+        else:
+            crossing = np.flatnonzero((y0 >= level) & (y1 <= level) & (y0 > y1))
+        if len(crossing) == 0 or len(begin) == 0:
+            return np.empty(0)
+        position = np.searchsorted(crossing, begin)
+        position = crossing[np.minimum(position, len(crossing) - 1)]
+        position = np.clip(position, begin, end - 1)
+        y0, y1 = y[position], y[position + 1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fraction = np.where(y1 != y0, (level - y0) / (y1 - y0), 0.0)
+        return position + np.clip(fraction, 0.0, 1.0)
+
+    def edges(self, edge: str = EDGE_RISE):
+        """
+        完整边沿的参考电平穿越时间
+        :param edge: (type str) 边沿类型, 可选值 {RISe|FALL}
+        :return: (type tuple of numpy.ndarray) 穿越低, 中, 高参考电平的时间, 单位同x轴
+        """
+        if self._edges is None:
+            self._edges = self._find_edges(*self.reference())
+        return tuple(self._time(points) for points in self._edges[EDGE_RISE if _match(edge, EDGE_RISE) else EDGE_FALL])
+
+    def _target_edges(self, edge):
+        """作为目标波形时, 以目标中参考电平穿越的时间"""
+        if self._targ_edges is None:
+            high, mid, low = self.reference()
+            self._targ_edges = self._find_edges(max(high, self.target_mid()), self.target_mid(),
+                                                min(low, self.target_mid()))
+        return self._time(self._targ_edges[EDGE_RISE if _match(edge, EDGE_RISE) else EDGE_FALL][1])
+
+    def _time(self, points):
+        return self._waveform.x_zero + self._waveform.x_incr * points
+
+    def _cycle(self):
+        """
+        第一个完整周期: 相邻两个中参考电平上升穿越之间的点
+        :return: (type tuple) 开始时间, 下降沿中参考电平时间, 结束时间; 没有完整周期时为None
+        """
+        rise = self.edges(EDGE_RISE)[1]
+        fall = self.edges(EDGE_FALL)[1]
+        if len(rise) < 2:
+            return None
+        falls = fall[(fall > rise[0]) & (fall < rise[1])]
+        return rise[0], falls[0] if len(falls) > 0 else np.nan, rise[1]
+
+    """=============================== 幅度 ==================================== """
+
+    def high(self):
+        return self.levels()[0]
+
+    def low(self):
+        return self.levels()[1]
+
+    def amplitude(self):
+        top, base = self.levels()
+        return top - base
+
+    def maximum(self):
+        return float(self._y.max())
+
+    def minimum(self):
+        return float(self._y.min())
+
+    def pk2pk(self):
+        return float(self._y.max() - self._y.min())
+
+    def mean(self):
+        return float(self._y.mean())
+
+    def rms(self):
+        return float(np.sqrt(np.mean(np.square(self._y))))
+
+    def _cycle_slice(self):
+        cycle = self._cycle()
+        if cycle is None:
+            return None
+        start = int(np.ceil((cycle[0] - self._waveform.x_zero) / self._waveform.x_incr))
+        stop = int(np.floor((cycle[2] - self._waveform.x_zero) / self._waveform.x_incr)) + 1
+        return self._y[start:stop]
+
+    def cycle_mean(self):
+        y = self._cycle_slice()
+        return np.nan if y is None or len(y) == 0 else float(y.mean())
+
+    def cycle_rms(self):
+        y = self._cycle_slice()
+        return np.nan if y is None or len(y) == 0 else float(np.sqrt(np.mean(np.square(y))))
+
+    def positive_overshoot(self):
+        """正过冲, (最大值 - 顶部) / 幅度 * 100"""
+        amplitude = self.amplitude()
+        return np.nan if amplitude == 0 else (self.maximum() - self.high()) / amplitude * 100
+
+    def negative_overshoot(self):
+        """负过冲, (底部 - 最小值) / 幅度 * 100"""
+        amplitude = self.amplitude()
+        return np.nan if amplitude == 0 else (self.low() - self.minimum()) / amplitude * 100
+
+    """=============================== 时间 ==================================== """
+
+    def rise(self):
+        """第一个上升沿从低参考电平到高参考电平的时间"""
+        low, _, high = self.edges(EDGE_RISE)
+        return float(high[0] - low[0]) if len(low) > 0 else np.nan
+
+    def fall(self):
+        """第一个下降沿从高参考电平到低参考电平的时间"""
+        high, _, low = self.edges(EDGE_FALL)
+        return float(low[0] - high[0]) if len(low) > 0 else np.nan
+
+    def period(self):
+        """第一个完整周期的时间"""
+        cycle = self._cycle()
+        return np.nan if cycle is None else float(cycle[2] - cycle[0])
+
+    def frequency(self):
+        return 1 / self.period()
+
+    def positive_width(self):
+        """第一个正脉冲的中参考电平宽度"""
+        rise = self.edges(EDGE_RISE)[1]
+        fall = self.edges(EDGE_FALL)[1]
+        if len(rise) == 0:
+            return np.nan
+        fall = fall[fall > rise[0]]
+        return float(fall[0] - rise[0]) if len(fall) > 0 else np.nan
+
+    def negative_width(self):
+        """第一个负脉冲的中参考电平宽度"""
+        rise = self.edges(EDGE_RISE)[1]
+        fall = self.edges(EDGE_FALL)[1]
+        if len(fall) == 0:
+            return np.nan
+        rise = rise[rise > fall[0]]
+        return float(rise[0] - fall[0]) if len(rise) > 0 else np.nan
+
+    def positive_duty(self):
+        cycle = self._cycle()
+        return np.nan if cycle is None else float((cycle[1] - cycle[0]) / (cycle[2] - cycle[0]) * 100)
+
+    def negative_duty(self):
+        cycle = self._cycle()
+        return np.nan if cycle is None else float((cycle[2] - cycle[1]) / (cycle[2] - cycle[0]) * 100)
+
+    def rising_edges(self):
+        return len(self.edges(EDGE_RISE)[1])
+
+    def falling_edges(self):
+        return len(self.edges(EDGE_FALL)[1])
+
+    def delay(self, target, sour_edge: str = EDGE_RISE, targ_edge: str = EDGE_RISE,
+              direction: str = DIRECTION_FORWARDS):
+        """
+        延迟: 源波形第一个边沿的中参考电平到目标波形边沿的目标中参考电平的时间
+        :param target: (type WaveformMeasure) 目标波形
+        :param sour_edge: (type str) 源波形的边沿类型, 可选值 {FALL|RISe}
+        :param targ_edge: (type str) 目标波形的边沿类型, 可选值 {FALL|RISe}
+        :param direction: (type str) 查找目标边沿的方向, 可选值 {BACKWards|FORWards},
+                FORWards为源边沿之后的第一个目标边沿, BACKWards为源边沿之前的最后一个目标边沿
+        :return: (type float) 延迟时间
+        """
+        source = self.edges(sour_edge)[1]
+        edges = target._target_edges(targ_edge)
+        if len(source) == 0:
+            return np.nan
+        if _match(direction, DIRECTION_BACKWARDS):
+            edges = edges[edges <= source[0]]
+            return float(edges[-1] - source[0]) if len(edges) > 0 else np.nan
+        edges = edges[edges >= source[0]]
+        return float(edges[0] - source[0]) if len(edges) > 0 else np.nan
+
+    def phase(self, target):
+        """
+        相位: 源波形与目标波形第一个上升沿之间的延迟占源波形周期的角度, 单位度
+        :param target: (type WaveformMeasure) 目标波形
+        :return: (type float) 相位, 范围 -180~180
+        """
+        period = self.period()
+        delay = self.delay(target)
+        if np.isnan(period) or np.isnan(delay):
+            return np.nan
+        phase = delay / period * 360 % 360
+        return float(phase - 360 if phase > 180 else phase)
+
+
+def measure(waveforms: dict, measures, **refs) -> list:
+    """
+    以与Mdo3000Scpi.measure相同的测量字典在主机端测量, 测量个数没有限制, 不需要与示波器交互
+    使用示例:
+    waveforms = scope.waveform_export_sources(('CH1', 'CH2'))
+    measure(waveforms, [{'source': 'CH1', 'meas_type': 'RISe', 'ref_per_high': 80},
+                        {'source': 'CH1', 'meas_type': 'DELay', 'target': 'CH2', 'targ_edge': 'FALL'}])
+    :param waveforms: (type dict) 信号源 -> Waveform
+    :param measures: (type list or tuple of dict) 测量字典, 说明参考Mdo3000Scpi.measure, 其中state及gating无效
+    :param refs: 所有测量共用的参考电平设置, 如 ref_method, ref_per_high, method
+    :return: (type list of float) 各测量的值
+    """
+    edge_keys = ('sour_edge', 'targ_edge', 'direction')
+    ref_keys = ('ref_method', 'ref_per_high', 'ref_per_mid', 'ref_per_low', 'ref_abs_high', 'ref_abs_mid',
+                'ref_abs_low', 'targ_ref_per_mid', 'targ_ref_abs_mid', 'method')
+    cache = {}
+
+    def measurer(source, settings):
+        key = (source, tuple(sorted(settings.items())))
+        if key not in cache:
+            cache[key] = WaveformMeasure(waveforms[source], **settings)
+        return cache[key]
+
+    results = []
+    for item in measures:
+        settings = dict(refs)
+        settings.update({key: value for key, value in item.items() if key in ref_keys})
+        target = item.get('target')
+        target = None if target is None else measurer(target, settings)
+        kwargs = {key: value for key, value in item.items() if key in edge_keys}
+        results.append(measurer(item['source'], settings).measure(item['meas_type'], target, **kwargs))
+    return results
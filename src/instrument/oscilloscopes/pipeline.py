@@ -0,0 +1,320 @@
+# -*- encoding: utf-8 -*-
+"""
+@File    : pipeline.py
+@Time    : 2026/10/18 00:20
+@Author  : blockish
+@Email   : blockish@yeah.net
+"""
+__all__ = {
+    'Capture',
+    'CapturePipeline',
+}
+
+import queue
+import threading
+import time
+
+from base import Object
+from errors import InstrumentException, ParamException
+from instrument.template import CommandTemplate
+
+POLICY_BLOCK = 'block'      # 队列满时采集线程等待(背压)
+POLICY_DROP = 'drop'        # 队列满时丢弃新采集的数据
+TUPLE_POLICY = (POLICY_BLOCK, POLICY_DROP)
+
+_STOP = object()            # 结束标记
+SINGLE_CURVE = CommandTemplate('ACQuire:STATE ON;*WAI;:CURVe?')     # 单次序列采集并读取数据
+
+
+class Capture:
+    """
+    一次触发采集的数据, 在流水线各阶段之间传递, 波形在第一次访问时解码
+    """
+
+    def __init__(self, index: int, timestamp: float, raw: bytes, preamble, source: str):
+        """
+        :param index: (type int) 采集序号, 从0开始
+        :param timestamp: (type float) 收到数据的时间, 相对于流水线启动, 单位S
+        :param raw: (type bytes) 采样码值数据
+        :param preamble: (type Preamble) 前导信息
+        :param source: (type str) 信号源
+        """
+        self.index = index
+        self.timestamp = timestamp
+        self.raw = raw
+        self.preamble = preamble
+        self.source = source
+        self.result = None          # 各阶段可在此保存结果
+        self._waveform = None
+
+    def __repr__(self):
+        return '<Capture: {} #{} at {}s, {} bytes>'.format(self.source, self.index, self.timestamp, len(self.raw))
+
+    @property
+    def waveform(self):
+        """解码后的波形"""
+        if self._waveform is None:
+            self._waveform = self.preamble.waveform(self.raw, self.source)
+        return self._waveform
+
+
+class _Stage:
+    """流水线的一个处理阶段, 多个工作线程共用一个输入队列"""
+
+    def __init__(self, name, func, workers, queue_size):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.lock = threading.Lock()
+        self.running = workers
+        self.count = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.max_depth = 0
+
+    def statistics(self, elapsed):
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'busy': self.busy,
+            'throughput': self.count / elapsed if elapsed > 0 else 0.0,
+            'utilization': self.busy / (elapsed * self.workers) if elapsed > 0 else 0.0,
+            'max_depth': self.max_depth,
+        }
+
+
+class CapturePipeline(Object):
+    """
+    连续触发采集流水线: 采集线程循环执行单次序列采集并读取数据('ACQuire:STATE ON;*WAI;:CURVe?'),
+    数据经有界队列依次交给各处理阶段(解码, 测量, 保存等), 采集与处理并行执行.
+    每个阶段的函数接收上一阶段的返回值(第一阶段接收Capture), 返回None时该数据不再传递给后续阶段.
+    采集期间示波器只由采集线程访问.
+    使用示例:
+    scope.acquire(ON, stop_after='seq')
+    pipeline = CapturePipeline(scope, 'CH1', width=2, queue_size=16, period=0.01)
+    pipeline.stage(lambda capture: capture.waveform.y.max(), workers=2).stage(results.append)
+    pipeline.run(frames=10000)
+    print(pipeline.statistics())
+    """
+
+    def __init__(self, scope, source: str, start: int = 1, points: int = None, width: int = 1,
+                 queue_size: int = 8, policy: str = POLICY_BLOCK, period: float = None, timeout: float = 10,
+                 **kwargs):
+        """
+        :param scope: (type Mdo3000Scpi) 示波器
+        :param source: (type str) 信号源, 参考Mdo3000Scpi.waveform_export
+        :param start: (type int) 开始点
+        :param points: (type int) 点数, 不指定则到最后一个点
+        :param width: (type int) 每个采样点的字节数, 可选值 {1|2}
+        :param queue_size: (type int) 各阶段输入队列的大小
+        :param policy: (type str) 第一阶段队列满时的策略, 可选值 {block|drop}:
+                block: 采集线程等待, 等待期间的触发会丢失, 等待超过period的采集记为延迟(late)
+                drop: 丢弃新采集的数据, 记为丢弃(dropped)
+        :param period: (type float) 期望的触发周期, 单位S, 相邻两次采集的间隔超过该值时记为延迟, 为None时不统计
+        :param timeout: (type float) 每次等待触发及传输的超时时间, 单位S
+        """
+        super().__init__(**kwargs)
+        if policy not in TUPLE_POLICY:
+            raise ParamException('unsupported policy %s, expect one of %s' % (policy, TUPLE_POLICY))
+        self._scope = scope
+        self._source = source
+        self._start = start
+        self._points = points
+        self._width = width
+        self._queue_size = queue_size
+        self._policy = policy
+        self._period = period
+        self._timeout = timeout
+        self._stages = []
+        self._threads = []
+        self._stop_event = threading.Event()
+        self._error = None
+        self._origin = None
+        self._elapsed = 0.0
+        self._captured = 0
+        self._dropped = 0
+        self._late = 0
+        self._blocked = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, err_type, err_val, err_tb):
+        self.stop()
+        self.join()
+
+    def stage(self, func, workers: int = 1, name: str = None):
+        """
+        添加处理阶段, 需在start之前调用
+        :param func: (type callable) 处理函数, 参数为上一阶段的返回值
+        :param workers: (type int) 工作线程数, 大于1时同一阶段的数据处理顺序不确定
+        :param name: (type str) 阶段名称, 默认为函数名
+        :return: (type CapturePipeline) self, 可链式调用
+        """
+        if len(self._threads) > 0:
+            raise InstrumentException('can not add stage to a running pipeline')
+        name = getattr(func, '__name__', 'stage%d' % len(self._stages)) if name is None else name
+        self._stages.append(_Stage(name, func, workers, self._queue_size))
+        return self
+
+    def start(self, frames: int = None):
+        """
+        启动流水线
+        :param frames: (type int) 采集次数, 为None时一直采集直到调用stop
+        :return: None
+        """
+        if len(self._threads) > 0:
+            raise InstrumentException('pipeline is already running')
+        self._stop_event.clear()
+        for stage in self._stages:
+            stage.running = stage.workers
+        self._origin = time.perf_counter()
+        for index, stage in enumerate(self._stages):
+            for worker in range(stage.workers):
+                self._threads.append(threading.Thread(target=self._work, args=(index,),
+                                                      name='%s-%d' % (stage.name, worker), daemon=True))
+        self._threads.append(threading.Thread(target=self._capture, args=(frames,), name='capture', daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """
+        停止采集, 已采集的数据继续处理完成
+        :return: None
+        """
+        self._stop_event.set()
+
+    def join(self, timeout: float = None):
+        """
+        等待采集结束且所有阶段处理完成
+        :param timeout: (type float) 超时时间, 单位S
+        :return: (type dict) 统计信息, 参考statistics
+        :raise InstrumentException: 采集线程出错
+        """
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(deadline - time.perf_counter(), 0))
+        if any(thread.is_alive() for thread in self._threads):
+            raise InstrumentException('pipeline not finished after %ss' % timeout)
+        if len(self._threads) > 0:
+            self._elapsed = time.perf_counter() - self._origin
+        self._threads = []
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise InstrumentException('capture error: %s' % error) from error
+        return self.statistics()
+
+    def run(self, frames: int):
+        """
+        启动流水线并等待完成
+        :param frames: (type int) 采集次数
+        :return: (type dict) 统计信息, 参考statistics
+        """
+        self.start(frames)
+        return self.join()
+
+    def statistics(self) -> dict:
+        """
+        统计信息
+        :return: (type dict) 说明如下:
+                elapsed: 运行时间, 单位S
+                captured: 采集次数
+                dropped: 第一阶段队列满时丢弃的次数(policy为drop)
+                late: 相邻两次采集的间隔超过period的次数, 期间可能有触发丢失
+                blocked: 采集线程因队列满等待的总时间, 单位S
+                capture_rate: 采集速率, 次/S
+                stages: 阶段名 -> {count, errors, busy, throughput, utilization, max_depth}
+        """
+        elapsed = self._elapsed if len(self._threads) == 0 or self._origin is None \
+            else time.perf_counter() - self._origin
+        return {
+            'elapsed': elapsed,
+            'captured': self._captured,
+            'dropped': self._dropped,
+            'late': self._late,
+            'blocked': self._blocked,
+            'capture_rate': self._captured / elapsed if elapsed > 0 else 0.0,
+            'stages': {stage.name: stage.statistics(elapsed) for stage in self._stages},
+        }
+
+    def _capture(self, frames):
+        """采集线程"""
+        scope = self._scope
+        try:
+            stop = None if self._points is None else self._start + self._points - 1
+            preamble = scope.waveform_preamble(self._source, self._start, stop, self._width)
+            last = None
+            index = 0
+            with scope.visa_timeout(self._timeout):
+                while not self._stop_event.is_set() and (frames is None or index < frames):
+                    scope.write(SINGLE_CURVE)
+                    raw = scope.read_block()
+                    timestamp = time.perf_counter() - self._origin
+                    if self._period is not None and last is not None and timestamp - last > self._period:
+                        self._late += 1
+                    last = timestamp
+                    self._captured += 1
+                    self._put(Capture(index, timestamp, raw, preamble, self._source))
+                    index += 1
+        except Exception as e:
+            self._logger.error('capture error: %s', e)
+            self._error = e
+        finally:
+            self._finish(-1)
+
+    def _put(self, capture):
+        """将采集数据交给第一阶段"""
+        if len(self._stages) == 0:
+            return
+        stage = self._stages[0]
+        if POLICY_DROP == self._policy:
+            try:
+                stage.queue.put_nowait(capture)
+            except queue.Full:
+                self._dropped += 1
+        else:
+            begin = time.perf_counter()
+            stage.queue.put(capture)
+            self._blocked += time.perf_counter() - begin
+        stage.max_depth = max(stage.max_depth, stage.queue.qsize())
+
+    def _work(self, index):
+        """阶段工作线程"""
+        stage = self._stages[index]
+        target = self._stages[index + 1] if index + 1 < len(self._stages) else None
+        while True:
+            item = stage.queue.get()
+            if item is _STOP:
+                break
+            begin = time.perf_counter()
+            try:
+                result = stage.func(item)
+            except Exception as e:
+                self._logger.error('stage %s error: %s', stage.name, e)
+                with stage.lock:
+                    stage.errors += 1
+                continue
+            finally:
+                with stage.lock:
+                    stage.count += 1
+                    stage.busy += time.perf_counter() - begin
+            if target is not None and result is not None:
+                target.queue.put(result)
+                target.max_depth = max(target.max_depth, target.queue.qsize())
+        self._finish(index)
+
+    def _finish(self, index):
+        """
+        上游(采集线程为-1)的一个线程结束, 上游全部结束后通知下一阶段的所有工作线程结束
+        """
+        if index >= 0:
+            stage = self._stages[index]
+            with stage.lock:
+                stage.running -= 1
+                if stage.running > 0:
+                    return
+        if index + 1 < len(self._stages):
+            target = self._stages[index + 1]
+            for _ in range(target.workers):
+                target.queue.put(_STOP)
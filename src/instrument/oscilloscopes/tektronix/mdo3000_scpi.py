@@ -4,8 +4,13 @@ import warnings
 from datetime import datetime
 from typing import Union, Tuple
 
-from constants import TUPLE_ON, TUPLE_ON_OFF
+import numpy as np
+
+from constants import TUPLE_ON, TUPLE_OFF, TUPLE_ON_OFF
 from errors import InstrumentException, ParamException
+from instrument.const import ROOT_SEPARATOR, COMMAS
+from instrument.oscilloscopes.archive import WaveformFile, WaveformWriter
+from instrument.oscilloscopes.waveform import Preamble, Waveform
 from instrument.scpi import ScpiInstrument
 from .mdo3000_scpi_const import *
 
@@ -22,6 +27,13 @@ def ch_trans(ch):
     return ch
 
 
+def _deprecated_sleep(sleep):
+    """已弃用的sleep参数: 接受但忽略, 并给出警告"""
+    if sleep is not None:
+        warnings.warn('"sleep" is deprecated and ignored, the scope is waited with "timeout"',
+                      DeprecationWarning, stacklevel=3)
+
+
 class Mdo3000Scpi(ScpiInstrument):
 
     def __init__(self, resource_name, timeout=0):
@@ -30,8 +42,25 @@ class Mdo3000Scpi(ScpiInstrument):
         self.__analog_max_sample = None
         self.__analog_channels = None
         self.__record_length = None
+        self.__rec_len = None           # 当前记录长度, 导出波形时使用
+        self.__preambles = {}           # (信号源, 开始点, 结束点, 字节数) -> Preamble
+        self.__frames = None            # 分段采集的段数
+
+    def cache_clear(self):
+        super().cache_clear()
+        self._waveform_invalidate()
+
+    def _waveform_invalidate(self):
+        """
+        清除缓存的波形前导信息及记录长度, 水平, 垂直设置或采集模式改变后调用, 启停采集不影响缩放参数
+        :return: None
+        """
+        self.__rec_len = None
+        self.__preambles.clear()
 
     def remote(self, on_off):
+        if on_off in TUPLE_OFF:
+            self.cache_clear()
         self.write(Mdo3000Cmd.DICT_REMOTE.get(on_off))
         return self.query('LOCk?')
 
@@ -60,7 +89,7 @@ class Mdo3000Scpi(ScpiInstrument):
 
     """======================================================================================== """
 
-    def acquire(self, state, mode=None, stop_after=None, num=None, **fast_acq):
+    def acquire(self, state, mode=None, stop_after=None, num=None, frames=None, **fast_acq):
         """
         设置和查询采集相关参数
         :param state: (type str) 采集使能, 可选值 {ON|RUN|1|OFF|STOP|0}
@@ -68,6 +97,9 @@ class Mdo3000Scpi(ScpiInstrument):
         :param stop_after: (type str) 采集完成后策略, 可选值 {runs|seq}, 分别表示 运行, 序列
         :param num: (type int) 当mode为ave(平均)时, 表示平均计算的波形个数, 此时num范围0~512且为2的指数幂
                             当mode为env(平均)时, 表示平均计算的包络个数, 此时num范围1~2000, 大于2000表示无限个
+        :param frames: (type int) 连续单次采集的次数, 设置后采集完成后策略为序列(seq), 由waveform_frames依次采集,
+                            MDO3000不支持FastFrame(硬件分段采集), 每次都是一次独立的单次序列采集及一次命令往返,
+                            两次采集之间的触发会丢失
         :param fast_acq: (type dict): 快速采集设置, 字典说明如下:
                 fast_state: 快速采集模式使能, 可选值 {0|1|OFF|ON}
                 fast_pale: 快速采集模式的调色板, 可选值 {NORMal|TEMPErature|SPECTral|INVERTed}
@@ -85,6 +117,7 @@ class Mdo3000Scpi(ScpiInstrument):
 
         if mode in Mdo3000Cmd.TUPLE_ACQ_MODE:
             self.write(Mdo3000Cmd.ACQ_MODE_SET, mode)
+            self._waveform_invalidate()
 
             re_mode = self.query(Mdo3000Cmd.ACQ_MODE_GET)
             re_dict.update(mode=re_mode)
@@ -98,6 +131,13 @@ class Mdo3000Scpi(ScpiInstrument):
                 num = self.query(Mdo3000Cmd.ACQ_ENV_NUM_GET)
                 re_dict.update(num=num)
 
+        if frames is not None:
+            if frames < 1:
+                raise ParamException('frames must be a positive integer, not %s' % frames)
+            self.__frames = frames
+            stop_after = 'SEQuence'
+        re_dict.update(frames=self.__frames)
+
         if stop_after in Mdo3000Cmd.TUPLE_ACQ_STOP_AFTER:
             self.write(Mdo3000Cmd.ACQ_STOP_AFTER_SET, stop_after)
 
@@ -172,8 +212,8 @@ class Mdo3000Scpi(ScpiInstrument):
             return self.query(Mdo3000Cmd.AUTO_SET_ENABLE_GET)
         elif op_type in Mdo3000Cmd.TUPLE_AUTO_SET:
             self.write(Mdo3000Cmd.AUTO_SET_SET, op_type)
-            while self.is_busy():
-                time.sleep(0.1)
+            self.cache_clear()
+            self.wait_until(lambda: not self.is_busy())
 
     """======================================================================================== """
 
@@ -184,7 +224,7 @@ class Mdo3000Scpi(ScpiInstrument):
             (type bool): 'True\n'表示示波器正忙于处理一个执行时间很长的命令
                         'False\n'表示示波器不忙于处理执行时间较长的命令
         """
-        return '1\n' == self.query('BUSY?')
+        return '1\n' == self.query(Mdo3000Cmd.BUSY)
 
     """======================================================================================== """
 
@@ -226,37 +266,49 @@ class Mdo3000Scpi(ScpiInstrument):
         assert ch is not None, 'required a channel'
         if isinstance(ch, str):
             ch = ch_trans(ch)
-        cmd = None
-
+        settings = []
         if amp_en in TUPLE_ON_OFF:
-            cmd = utils.contact_spci_cmd(cmd, Mdo3000Cmd.CH_AMP_VOLT_EN_SET, ch, amp_en)
+            settings.append((Mdo3000Cmd.CH_AMP_VOLT_EN_SET, amp_en))
         if volt_fact is not None:
-            cmd = utils.contact_spci_cmd(cmd, Mdo3000Cmd.CH_AMP_VOLT_FACT_SET, ch, volt_fact)
+            settings.append((Mdo3000Cmd.CH_AMP_VOLT_FACT_SET, volt_fact))
         if bandwidth is not None:
-            cmd = utils.contact_spci_cmd(cmd, Mdo3000Cmd.CH_BANDWIDTH_SET, ch, bandwidth)
+            settings.append((Mdo3000Cmd.CH_BANDWIDTH_SET, bandwidth))
         if coup in Mdo3000Cmd.TUPLE_COUPING:
-            cmd = utils.contact_spci_cmd(cmd, Mdo3000Cmd.CH_COUPLING_SET, ch, coup)
+            settings.append((Mdo3000Cmd.CH_COUPLING_SET, coup))
         if deskew is not None:
-            cmd = utils.contact_spci_cmd(cmd, Mdo3000Cmd.CH_DESKEW_SET, ch, deskew)
+            settings.append((Mdo3000Cmd.CH_DESKEW_SET, deskew))
         if offset is not None:
-            cmd = utils.contact_spci_cmd(cmd, Mdo3000Cmd.CH_OFFSET_SET, ch, offset)
+            settings.append((Mdo3000Cmd.CH_OFFSET_SET, offset))
         if invert in TUPLE_ON_OFF:
-            cmd = utils.contact_spci_cmd(cmd, Mdo3000Cmd.CH_INVERT_SET, ch, invert)
+            settings.append((Mdo3000Cmd.CH_INVERT_SET, invert))
         if pos is not None:
-            cmd = utils.contact_spci_cmd(cmd, Mdo3000Cmd.CH_POSITION_SET, ch, pos)
+            settings.append((Mdo3000Cmd.CH_POSITION_SET, pos))
         if scale is not None:
-            cmd = utils.contact_spci_cmd(cmd, Mdo3000Cmd.CH_SCALE_SET, ch, scale)
+            settings.append((Mdo3000Cmd.CH_SCALE_SET, scale))
         if y_unit in TUPLE_Y_UNITS:
-            cmd = utils.contact_spci_cmd(cmd, Mdo3000Cmd.CH_YUNITS_SET, ch, '%s%s%s' % ('"', y_unit, '"'))
+            settings.append((Mdo3000Cmd.CH_YUNITS_SET, '%s%s%s' % ('"', y_unit, '"')))
         if term is not None:
-            cmd = utils.contact_spci_cmd(cmd, Mdo3000Cmd.CH_TERMINATION_SET, ch, term)
+            settings.append((Mdo3000Cmd.CH_TERMINATION_SET, term))
         if label is not None:
-            cmd = utils.contact_spci_cmd(cmd, Mdo3000Cmd.CH_LABEL_SET, ch, label)
-        # cmd = utils.contact_spci_cmd(cmd, Mdo3000Cmd.CH_INFO_GET, ch)
+            settings.append((Mdo3000Cmd.CH_LABEL_SET, label))
 
-        self.write(cmd)
-        time.sleep(0.5)
-        return self.query(Mdo3000Cmd.CH_INFO_GET, ch)
+        cmd = None
+        for template, value in settings:
+            if not self._cache_hit((template, ch), value):
+                cmd = utils.contact_spci_cmd(cmd, template, ch, value)
+        info_key = (Mdo3000Cmd.CH_INFO_GET, ch)
+        if cmd is None and self._cache_get(info_key) is not None:
+            return self._cache_get(info_key)
+
+        if cmd is not None:
+            self.write(cmd)
+            self.wait_complete()
+            self._waveform_invalidate()
+        info = self.query(Mdo3000Cmd.CH_INFO_GET, ch)
+        for template, value in settings:
+            self._cache_put((template, ch), value)
+        self._cache_put(info_key, info)
+        return info
 
     """======================================================================================== """
 
@@ -304,10 +356,10 @@ class Mdo3000Scpi(ScpiInstrument):
             if '1' == result:
                 if INITIALIZE == cal_op:
                     self.write(Mdo3000Cmd.PROBE_CALIBRATE_SET, ch, cal_op)
-                    time.sleep(2)
+                    self.wait_complete()
 
                 self.write(Mdo3000Cmd.PROBE_SET_DICT.get(PROBE_CALIBRATE), ch, EXECUTE)
-                time.sleep(5)
+                self.wait_complete(timeout=30)
                 return
             else:
                 warnings.warn('The probe of channel %s not support calibrate operation', ch)
@@ -317,7 +369,7 @@ class Mdo3000Scpi(ScpiInstrument):
 
         if PROBE_DEGAUSS in names:
             self.write(Mdo3000Cmd.PROBE_OPERATION_DICT.get(PROBE_DEGAUSS), ch)
-            time.sleep(2)
+            self.wait_complete()
         state = self.query(Mdo3000Cmd.PROBE_OPERATION_DICT.get(PROBE_DEGAUSS_STATE), ch)
         self._logger.debug('the state of degauss: %s', state)
         # 消磁
@@ -326,6 +378,9 @@ class Mdo3000Scpi(ScpiInstrument):
         for key, value in values.items():
             if key in Mdo3000Cmd.PROBE_SET_DICT and PROBE_CALIBRATE != key:
                 write_cmd = utils.contact_spci_cmd(write_cmd, Mdo3000Cmd.PROBE_SET_DICT.get(key), ch, value)
+        if write_cmd is not None:
+            # 探头参数会改变通道的缩放等设置
+            self.cache_clear()
         self.write(write_cmd)
         # 设置相关参数
 
@@ -467,7 +522,7 @@ class Mdo3000Scpi(ScpiInstrument):
 
     """======================================================================================== """
 
-    def measure(self, measures, upper=4, gating='SCREen', method='AUTO', sleep=.1, statistics=None):
+    def measure(self, measures, upper=4, gating='SCREen', method='AUTO', sleep=None, statistics=None, timeout=10.):
         """
         测量操作, 对应于示波器上添加测量, 此命令是耗时操作, 处理计算期间示波器无法接受其他指令
         :param measures: (type dict) 需要添加测量的字典, 说明如下:
@@ -510,7 +565,8 @@ class Mdo3000Scpi(ScpiInstrument):
                             HIStogram: 使用直方图统计最大最小值
                             MINMax:使用波形记录的最高值和最低值. 此选项最适合检查没有公共值的大而平的部分的波形, 如正弦波和三角波
                             AUTO: 示波器自动选择以上最佳的一种方式
-        :param sleep: (type float) 每次发送测量命令给示波器采样计算的延迟时间, 需要根据采集长度决定该时间
+        :param sleep: (type float) 已弃用, 原固定延时, 现由timeout等待仪器完成, 指定时忽略并警告
+        :param timeout: (type float) 等待示波器完成测量设置及采样计算的超时时间, 单位S, 需要根据采集长度决定该时间
         :param statistics: (type dict) 测量统计设置字典,可包含的键值说明如下:
                 mode (type str): (可选) 设置统计的状态, 可选值为 {OFF|ALL}
                 weight (type int): (可选) 设置测量统计的平均值和标准差取样次数, 范围 2~1000
@@ -519,35 +575,37 @@ class Mdo3000Scpi(ScpiInstrument):
             (type tuple of str): 返回每一个测量的 值, 最大值, 最小值, 平均值, 标准差, 单位(依次):以分号(;)分割,
                     测量统计的状态和取样次数:以分号(;)分割
         """
+        _deprecated_sleep(sleep)
         assert isinstance(measures, tuple) or isinstance(measures, list), \
             'the argument "measurements" must be a tuple or list of dict'
 
         if len(measures) > upper:
             self._logger.warning('size of measurement rather than upper limit %d', upper)
 
-        for i in range(upper):
-            self.write('MEASUrement:MEAS{}:STATE {}', i + 1, 'OFF')
-        self.write('MEASUrement:GATing {}', gating)
-        self.write('MEASUrement:METHod {}', method)
+        count = 0
+        with self.batch():
+            for i in range(upper):
+                self.write('MEASUrement:MEAS{}:STATE {}', i + 1, 'OFF')
+            self.write('MEASUrement:GATing {}', gating)
+            self.write('MEASUrement:METHod {}', method)
 
+            for measure in measures:
+                count = count + 1
+                if count > upper:
+                    # the size rather than 4, ignored all next #
+                    break
+                assert isinstance(measure, dict), 'the element of "measurements" must be a dict'
+
+                try:
+                    state = measure.get('state')
+                    assert state in TUPLE_ON_OFF, 'the state only be "on" or "off"'
+                    self.write('MEASUrement:MEAS{}:STATE {}', count, state)
+                    if state in TUPLE_ON:
+                        self.__set_meas_param(count, immed=False, **measure)
+                except InstrumentException as e:
+                    raise e
         query_cmd = None
-        count = 0
-        for measure in measures:
-            count = count + 1
-            if count > upper:
-                # the size rather than 4, ignored all next #
-                break
-            assert isinstance(measure, dict), 'the element of "measurements" must be a dict'
-
-            try:
-                state = measure.get('state')
-                assert state in TUPLE_ON_OFF, 'the state only be "on" or "off"'
-                self.write('MEASUrement:MEAS{}:STATE {}', count, state)
-                if state in TUPLE_ON:
-                    self.__set_meas_param(count, immed=False, **measure)
-            except InstrumentException as e:
-                raise e
-        time.sleep(sleep)
+        self.wait_complete(timeout)
         for i in range(count):
             val = i + 1
             query_cmd = utils.contact_spci_cmd(query_cmd,
@@ -557,13 +615,25 @@ class Mdo3000Scpi(ScpiInstrument):
                                                'MEASUrement:MEAS{}:MEAN?;:' +
                                                'MEASUrement:MEAS{}:STDdev?;:' +
                                                'MEASUrement:MEAS{}:UNIts?',
-                                               val, val, val, val, val, val)
+                                               val, val, val, val, val, val, sep=ROOT_SEPARATOR)
         self.write(query_cmd)
 
         return self.read(), self.measure_statistics(statistics)
 
     """======================================================================================== """
 
+    def measure_results(self, measures, **kwargs) -> list:
+        """
+        与measure相同, 返回解析后的测量结果
+        :param measures: (type list or tuple of dict) 参考measure
+        :param kwargs: measure的其他参数
+        :return:
+            (type list of MeasureResult): 每个测量的 value, maximum, minimum, mean, stddev(float, 无效值为nan), units(str)
+        """
+        return MEASURE_RESULT(self.measure(measures, **kwargs)[0])
+
+    """======================================================================================== """
+
     def measure_indicator(self, state, sleep) -> Union[None, Tuple]:
         """
         设置并读取测量指示器的值
@@ -620,7 +690,7 @@ class Mdo3000Scpi(ScpiInstrument):
 
     """======================================================================================== """
 
-    def measure_immed(self, gating='SCREen', method='AUTO', sleep=.1, **measure):
+    def measure_immed(self, gating='SCREen', method='AUTO', sleep=None, timeout=10., **measure):
         """
         立即测量操作, 此命令是耗时操作, 处理计算期间示波器无法接受其他指令
         :param gating: (type str) 测量选通设置, 可选值 {OFF|SCREen|CURSor}
@@ -631,7 +701,8 @@ class Mdo3000Scpi(ScpiInstrument):
                             HIStogram: 使用直方图统计最大最小值
                             MINMax:使用波形记录的最高值和最低值. 此选项最适合检查没有公共值的大而平的部分的波形, 如正弦波和三角波
                             AUTO: 示波器自动选择以上最佳的一种方式
-        :param sleep: (type float) 每次发送立即测量命令给示波器采样计算的延迟时间, 需要根据采集长度决定该时间
+        :param sleep: (type float) 已弃用, 原固定延时, 现由timeout等待仪器完成, 指定时忽略并警告
+        :param timeout: (type float) 等待立即测量结果的超时时间, 单位S, 需要根据采集长度决定该时间
         :param measure: (type dict) 立即测量设置字典, 说明如下:
                 source (type str): (必须指定) 需要添加的测量源, 可选值为 {CH<x>|REF<x>|MATH|BUS<x>|D<x>|RF_AMPlitude|RF_FREQuency|RF_PHASe}
                 meas_type (type str): (必须指定) 测量类型, 可选值
@@ -666,6 +737,7 @@ class Mdo3000Scpi(ScpiInstrument):
         :return:
             (type str) 返回当前立即测量的值和单位
         """
+        _deprecated_sleep(sleep)
         try:
             self.write('MEASUrement:GATing {}', gating)
             self.write('MEASUrement:METHod {}', method)
@@ -673,9 +745,8 @@ class Mdo3000Scpi(ScpiInstrument):
         except InstrumentException as e:
             raise e
 
-        self.write('MEASUrement:IMMed:VALue?;:MEASUrement:IMMed:UNIts?')
-        time.sleep(sleep)
-        return self.read()
+        with self.visa_timeout(timeout):
+            return self.query('MEASUrement:IMMed:VALue?;:MEASUrement:IMMed:UNIts?')
 
     """======================================================================================== """
 
@@ -788,6 +859,8 @@ class Mdo3000Scpi(ScpiInstrument):
         write_cmd = None
         for key, value in values.items():
             write_cmd = utils.contact_spci_cmd(write_cmd, Mdo3000Cmd.HORIZONTAL_SET_DICT.get(key), value)
+        if write_cmd is not None:
+            self._waveform_invalidate()
         self.write(write_cmd)
 
         query_cmd = None
@@ -854,19 +927,22 @@ class Mdo3000Scpi(ScpiInstrument):
 
     """======================================================================================== """
 
-    def screen_shot(self, f_path, f_type='PNG', inksaver='ON', sleep=1.):
+    def screen_shot(self, f_path, f_type='PNG', inksaver='ON', sleep=None, timeout=10.):
         """
         屏幕截取
         :param f_path: (type str) 屏幕截取的图片文件保存路径
         :param f_type: (type str) 屏幕截取的图片文件格式, MDO3000系列支持png, bmp and tif三种图片格式
         :param inksaver: (type str) 屏幕截取的图片省墨模式, 可选值{ON|OFF}
-        :param sleep: (type float) 屏幕截图时延迟时间
+        :param sleep: (type float) 已弃用, 原固定延时, 现由timeout等待仪器完成, 指定时忽略并警告
+        :param timeout: (type float) 等待截图数据的超时时间, 单位S
         :return:
             (type str): 保存的图片文件名(当前上位机日期时间, 不包含路径)
         """
+        _deprecated_sleep(sleep)
         self.write('SAVe:IMAGe:FILEFormat {};:SAVe:IMAGe:INKSaver {};:HARDCopy STARt', f_type, inksaver)
-        time.sleep(sleep)
-        img_data = self._instrument.read_raw()
+        # 截图数据就绪后才开始传输, 在延长的VISA超时时间内直接读取, 不使用固定延时
+        with self.visa_timeout(timeout):
+            img_data = self._instrument.read_raw()
 
         dt = datetime.now()
         file_name = dt.strftime("%Y%m%d%H%M%S%f.{}".format(f_type))
@@ -894,82 +970,235 @@ class Mdo3000Scpi(ScpiInstrument):
 
     """======================================================================================== """
 
-    def waveform_export(self, source, start=1, points=None):
+    def waveform_preamble(self, source, start=1, stop=None, width=1) -> Preamble:
+        """
+        设置导出波形的信号源, 范围及格式(DATa), 并获取波形的前导信息,
+        一次WFMOutpre?查询获取全部字段, 结果按(信号源, 开始点, 结束点, 字节数)缓存,
+        水平, 垂直或采集设置改变以及cache_clear()后重新查询; 通过write()直接修改这些设置时需先调用cache_clear()
+        :param source: (type str) 信号源, 参考waveform_export
+        :param start: (type int) 开始点
+        :param stop: (type int) 结束点, 不指定则为记录长度
+        :param width: (type int) 每个采样点的字节数, 可选值 {1|2}
+        :return:
+            (type Preamble): 前导信息
+        """
+        return self._waveform_preambles([source], start, stop, width)[0]
+
+    def _waveform_preambles(self, sources, start, stop, width):
+        """
+        设置导出波形的信号源(多个信号源以','分隔), 范围及格式, 并获取各信号源的前导信息,
+        没有缓存的信号源在一次查询中依次切换DATa:SOUrce并查询WFMOutpre?
+        :return:
+            (type list of Preamble): 与sources顺序一致的前导信息
+        """
+        if width not in (1, 2):
+            raise ParamException('unsupported data width %s, expect 1 or 2' % width)
+        stop = self._waveform_range(start, None)[1] if stop is None else stop
+        keys = [(source, start, stop, width) for source in sources]
+        missing = [key for key in keys if key not in self.__preambles]
+        data_cmd = 'DATa:SOUrce {};:DATa:START {};:DATa:STOP {};:DATa:ENCdg SRIBINARY;:DATa:WIDth {}'
+        if len(missing) > 0:
+            self.write(data_cmd, missing[0][0], start, stop, width)
+            query_cmd = 'HEADer ON;:WFMOutpre?'
+            for key in missing[1:]:
+                query_cmd = utils.contact_spci_cmd(query_cmd, 'DATa:SOUrce {};:WFMOutpre?', key[0],
+                                                   sep=ROOT_SEPARATOR)
+            response = self.query(utils.contact_spci_cmd(query_cmd, 'HEADer OFF', sep=ROOT_SEPARATOR))
+            preambles = Preamble.parse_all(response)
+            if len(preambles) != len(missing):
+                raise InstrumentException('expect %d waveform preambles, got %r' % (len(missing), response))
+            for key, preamble in zip(missing, preambles):
+                self._logger.debug('the preamble of %s: %r', key[0], preamble)
+                self.__preambles[key] = preamble
+        self.write(data_cmd, COMMAS.join(sources), start, stop, width)
+        return [self.__preambles[key] for key in keys]
+
+    def _waveform_range(self, start, points):
+        """
+        计算导出波形的结束点, 记录长度在设置改变之前只查询一次
+        :return:
+            (type tuple): 开始点, 结束点
+        """
+        if self.__rec_len is None:
+            self.__rec_len = int(self.horizontal_setting('rec_len'))
+            self._logger.info('The instrument record length is %d', self.__rec_len)
+        return start, self.__rec_len if points is None else min(start + points - 1, self.__rec_len)
+
+    def _waveform_prepare(self, source, start, points, width):
+        """
+        设置导出波形的信号源, 范围及格式, 并获取波形的前导信息,
+        在batch()中调用且前导信息已缓存时, 设置命令与随后的CURVe?合并为一次写入
+        :return:
+            (type int): 结束点
+            (type Preamble): 前导信息
+        """
+        start, stop = self._waveform_range(start, points)
+        return stop, self.waveform_preamble(source, start, stop, width)
+
+    def waveform_export(self, source, start=1, points=None, width=1) -> Waveform:
         """
         导出示波器当前波形采样的点
         :param source: (type str) 需要导出波形的信号源
             可选值 {CH<x>|MATH|REF<x>|BUS<x>|D<x>|RF_AMPlitude|RF_FREQuency|RF_PHASe|RF_NORMal|RF_AVErage| RF_MAXHold|RF_MINHold}
         :param start: (type int) 需要采集的开始点, 范围 1 ~ (记录长度-1), 默认从 1 开始
         :param points: (type int) 需要采集的点的个数, 范围 大于开始点 小于记录长度, 不指定则默认到最后一个点
+        :param width: (type int) 每个采样点的字节数(DATa:WIDth), 可选值 {1|2}, 2字节时分辨率更高(如平均或高分辨率采集模式)
+        :return:
+            (type Waveform): 波形数据, y轴为numpy数组, x轴在访问时计算, 单位见x_unit, y_unit
+        """
+        with self.batch():
+            stop, preamble = self._waveform_prepare(source, start, points, width)
+            self.write(Mdo3000Cmd.CURVE)
+        block = self.read_block()
+        if len(block) != (stop - start + 1) * preamble.width:
+            self._logger.error('error data length %d, not equal "points(%d) * width(%d)"',
+                               len(block), stop - start + 1, preamble.width)
+
+        waveform = preamble.waveform(block, source)
+        self._logger.info('waveform size: %d', len(waveform))
+        return waveform
+
+    def waveform_export_sources(self, sources, start=1, points=None, width=1) -> dict:
+        """
+        一次传输导出多个信号源的波形: DATa:SOUrce设置为'CH1,CH2,...', 一次CURVe?依次返回各信号源的数据块,
+        前导信息没有缓存时在一次查询中全部获取, 耗时约为逐个waveform_export的 1/信号源个数
+        :param sources: (type list or tuple of str) 需要导出波形的信号源, 如 ('CH1', 'CH2', 'CH3', 'CH4')
+        :param start: (type int) 需要采集的开始点, 默认从 1 开始
+        :param points: (type int) 需要采集的点的个数, 不指定则默认到最后一个点
+        :param width: (type int) 每个采样点的字节数, 可选值 {1|2}
         :return:
-            (type list): 采集点的x轴坐标单位(占一个元素) + x轴点的数据
-            (type list): 采集点的y轴坐标单位(占一个元素) + y轴点的数据
-        """
-        inst_points = int(self.horizontal_setting('rec_len'))
-        self._logger.info('The instrument record length is %d', inst_points)
-        if points is None \
-                or points > inst_points:
-            points = inst_points
-
-        _start = (start - 1)
-
-        cmd = 'DATa:SOUrce {};:DATa:START {};:DATa:STOP {};:DATa:ENCdg SRIBINARY;:HEADer OFF'
-        self.write(cmd, source, start, (points - _start))
-
-        # info = self.query('DATa?')
-        # self._logger.info('DATa: \n%s', info)
-        # info = self.query('WFMInpre?')
-        # self._logger.info('WFMInpre: \n%s', info)
-        # info = self.query('WFMOutpre?')
-        # self._logger.info('WFMOutpre: \n%s', info)
-
-        # 时间转换
-        x_unit = self.query('WFMOutpre:XUNit?')
-        x_zero = float(self.query('WFMOutpre:XZEro?'))
-        x_incr = float(self.query('WFMOutpre:XINcr?'))
-
-        y_unit = self.query('WFMOutpre:YUNit?')
-        y_zero = float(self.query('WFMOutpre:YZEro?'))
-        y_mult = float(self.query('WFMOutpre:YMUlt?'))
-
-        self.write('CURVe?')
-        data = self._instrument.read_raw()
-
-        # data start of '#' ascii is 0x23
-        data_start = data[0]
-        assert 0x23 == data_start, 'error start of data'
-
-        # numbers of data length ascii  - ascii(0)
-        data_len_num = data[1] - 0x30
-        self._logger.info('number of data length is %d', data_len_num)
-        # get data length, assert it equals points
-        data_len = 0
-        for i in range(data_len_num):
-            # calculator the actual length of data
-            data_len += (10 ** (data_len_num - i - 1)) * (data[i + 2] - 48)
-        if int(data_len) != points:
-            self._logger.error('error data length, not equal "points(%d)"', points)
-        #         assert int(data_len) != points, 'error data length, not equal "points(0x%s)"'%'%02x'%points
-
-        _data_len = len(data) - 1
-        data_end = data[_data_len]
-        if 0x0a != data_end:
-            self._logger.error('error end of data 0x%s, expect 0x0a', '%02x' % data_end)
-        #         assert 0x0a != data_end, 'error end of data 0x%s, expect 0x0a'%'%02x'%data_end
-
-        data_x = [x_unit]
-        data_y = [y_unit]
-
-        # the length of head
-        x = data_len_num + 2
-        for i in range(_data_len - x):
-            data_i = data[i + x]
-            data_x.append(x_zero + x_incr * i)
-            data_y.append(y_zero + y_mult * COMPLEMENT[data_i])
-        self._logger.info('data x size: %d', len(data_x))
-        self._logger.info('data y size: %d', len(data_y))
-
-        return data_x, data_y
+            (type dict): 信号源 -> Waveform, 按sources的顺序, 所有波形共用第一个信号源的时间轴
+        """
+        with self.batch():
+            start, stop = self._waveform_range(start, points)
+            preambles = self._waveform_preambles(sources, start, stop, width)
+            self.write(Mdo3000Cmd.CURVE)
+        blocks = self.read_blocks(len(sources))
+
+        waveforms = {}
+        for source, preamble, block in zip(sources, preambles, blocks):
+            if len(block) != (stop - start + 1) * preamble.width:
+                self._logger.error('error data length %d of %s, not equal "points(%d) * width(%d)"',
+                                   len(block), source, stop - start + 1, preamble.width)
+            waveforms[source] = preamble.waveform(block, source, time_base=preambles[0])
+        return waveforms
+
+    def waveform_frames(self, source, frames=None, start=1, points=None, width=1, timeout=10, path=None):
+        """
+        连续单次采集(不是硬件分段采集): 每次写入一条'ACQuire:STATE ON;*WAI;:CURVe?', 示波器触发并完成单次序列采集后
+        立即返回该次数据, 不需要轮询采集状态; 每次采集都是一次命令往返, 传输期间及两次采集之间的触发会丢失,
+        与CapturePipeline的采集循环相同; 各次数据读入同一缓存后一次解码为二维数组.
+        MDO3000没有FastFrame, 时间戳为上位机收到各次数据的时间(相对于调用开始), 不是触发时间, 精度受传输时间影响
+        使用示例:
+        scope.acquire(ON, mode='hir', frames=1000)
+        bursts = scope.waveform_frames('CH1', width=2)
+        bursts.y.shape -> (1000, 记录长度)
+        :param source: (type str) 需要导出波形的信号源, 参考waveform_export
+        :param frames: (type int) 采集次数, 默认为acquire(frames=N)设置的次数
+        :param start: (type int) 每段需要采集的开始点, 默认从 1 开始
+        :param points: (type int) 每段需要采集的点的个数, 不指定则默认到最后一个点
+        :param width: (type int) 每个采样点的字节数, 可选值 {1|2}, 高分辨率及平均模式下2字节才能保留全部分辨率
+        :param timeout: (type float) 每段等待触发及传输的超时时间, 单位S
+        :param path: (type str) 存档文件路径, 指定时各段数据直接写入存档(参考waveform_save), 内存占用与段数无关
+        :return:
+            (type Waveform): y轴为二维数组(段数 x 每段点数), timestamps为各段的时间戳, 单位S
+            (type WaveformFile): 指定path时返回存档
+        """
+        frames = self.__frames if frames is None else frames
+        if frames is None or frames < 1:
+            raise ParamException('frames of segmented acquisition required, set by acquire(frames=N)')
+        stop, preamble = self._waveform_prepare(source, start, points, width)
+        size = (stop - start + 1) * preamble.width
+        if path is None:
+            writer = None
+            buffer = memoryview(bytearray(size * frames))
+        else:
+            writer = WaveformWriter(path, preamble, source, self.info, self._waveform_snapshot())
+            buffer = None
+        timestamps = np.empty(frames, dtype=np.float64)
+
+        origin = time.perf_counter()
+        try:
+            with self.visa_timeout(timeout):
+                for index in range(frames):
+                    self.write(Mdo3000Cmd.SINGLE_CURVE)
+                    block = self.read_block()
+                    timestamps[index] = time.perf_counter() - origin
+                    if len(block) != size:
+                        raise InstrumentException(
+                            'error data length %d of frame %d, expect %d' % (len(block), index, size))
+                    if writer is None:
+                        buffer[index * size:(index + 1) * size] = block
+                    else:
+                        writer.write(block, timestamps[index])
+        finally:
+            if writer is not None:
+                writer.close()
+        self._logger.info('%d frames acquired in %fs', frames, time.perf_counter() - origin)
+        if writer is not None:
+            return WaveformFile(path)
+        return preamble.waveform(buffer, source, timestamps=timestamps)
+
+    def waveform_save(self, path, source, start=1, points=None, width=1, chunk_size=1000000,
+                      settings=None) -> WaveformFile:
+        """
+        分段导出波形并将仪器返回的原始数据块直接写入存档文件, 不解码, 内存占用只与chunk_size有关,
+        存档头部包含前导信息, IDN及设置快照, 读取时以numpy.memmap映射
+        使用示例:
+        archive = scope.waveform_save('ch1.wfm', 'CH1', width=2)
+        archive.codes[:1000], archive.waveform().y
+        :param path: (type str) 存档文件路径
+        :param source: (type str) 需要导出波形的信号源, 参考waveform_export
+        :param start: (type int) 需要采集的开始点, 默认从 1 开始
+        :param points: (type int) 需要采集的点的个数, 不指定则默认到最后一个点
+        :param width: (type int) 每个采样点的字节数, 可选值 {1|2}
+        :param chunk_size: (type int) 每次传输的点数
+        :param settings: (type dict) 需要额外记录的设置, 值需能够序列化为JSON
+        :return:
+            (type WaveformFile): 存档
+        """
+        stop, preamble = self._waveform_prepare(source, start, points, width)
+        snapshot = self._waveform_snapshot()
+        snapshot.update({} if settings is None else settings)
+        with WaveformWriter(path, preamble, source, self.info, snapshot) as writer:
+            for first in range(start, stop + 1, chunk_size):
+                last = min(first + chunk_size - 1, stop)
+                self.write('DATa:START {};:DATa:STOP {};:CURVe?', first, last)
+                writer.write(self.read_block())
+        self._logger.info('%d bytes saved to %s', writer.length, path)
+        return WaveformFile(path)
+
+    def _waveform_snapshot(self):
+        """
+        存档时记录的设置快照: 水平设置及采集模式
+        :return: (type dict) 设置名 -> 值
+        """
+        names = tuple(Mdo3000Cmd.HORIZONTAL_GET_DICT)
+        snapshot = dict(zip(names, self.horizontal_setting(*names).strip().split(';')))
+        snapshot['acq_mode'] = self.query(Mdo3000Cmd.ACQ_MODE_GET).strip()
+        return snapshot
+
+    def waveform_stream(self, source, start=1, points=None, width=1, chunk_size=1000000):
+        """
+        分段导出波形, 每次以DATa:START/DATa:STOP取chunk_size个点并立即解码,
+        适用于数百万点以上的记录长度, 内存占用只与chunk_size有关, 第一段数据在整个传输完成之前即可处理
+        使用示例:
+        for chunk in scope.waveform_stream('CH1', chunk_size=500000):
+            numpy.save(f, chunk.y)
+        :param source: (type str) 需要导出波形的信号源, 参考waveform_export
+        :param start: (type int) 需要采集的开始点, 默认从 1 开始
+        :param points: (type int) 需要采集的点的个数, 不指定则默认到最后一个点
+        :param width: (type int) 每个采样点的字节数, 可选值 {1|2}
+        :param chunk_size: (type int) 每段的点数
+        :return:
+            (type generator of Waveform): 依次生成每一段波形, 每段的x_zero为该段第一个点的时间
+        """
+        stop, preamble = self._waveform_prepare(source, start, points, width)
+        for first in range(start, stop + 1, chunk_size):
+            last = min(first + chunk_size - 1, stop)
+            self.write('DATa:START {};:DATa:STOP {};:CURVe?', first, last)
+            block = self.read_block()
+            yield preamble.waveform(block, source, first - start)
 
     """======================================================================================== """
 
@@ -989,7 +1218,7 @@ class Mdo3000Scpi(ScpiInstrument):
             query_cmd = utils.contact_spci_cmd(query_cmd, 'SELect:{}?', key)
 
         self.write(write_cmd)
-        time.sleep(0.5)
+        self.wait_complete()
         return self.query(query_cmd)
 
     """======================================================================================== """
@@ -1520,8 +1749,10 @@ class Mdo3000Scpi(ScpiInstrument):
             self.write('SAVe:SETUp {}', path)
         elif 'recall' == op:
             self.write('RECAll:SETUp {}', path)
+            self.cache_clear()
         elif 'recall_demo' == op:
             self.write('RECAll:SETUp:DEMO{}', path)
+            self.cache_clear()
         else:
             self._logger.warn('not supported save and recall operation')
 
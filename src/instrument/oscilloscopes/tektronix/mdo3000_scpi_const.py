@@ -2,6 +2,8 @@
 from constants import OFF, ZERO, ON, ONE, RUN, STOP
 from instrument import utils
 from instrument.const import INTERROGATION, EMPTY, BRACE, SPACE, COMMAS
+from instrument.response import ResponseParser, nr3, text
+from instrument.template import CommandTemplate
 
 from re import IGNORECASE as IGNORE_CASE
 
@@ -10,6 +12,11 @@ BLUE = 'blue'
 PURPLE = 'purple'
 GREEN = 'green'
 
+# MEASUrement:MEAS<x>的 值;最大值;最小值;平均值;标准差;单位, 多个测量依次排列
+MEASURE_RESULT = ResponseParser(nr3, nr3, nr3, nr3, nr3, text,
+                                names=('value', 'maximum', 'minimum', 'mean', 'stddev', 'units'),
+                                repeat=True, name='MeasureResult')
+
 SAMPLE = 'sam'
 # 采样
 PEAK = 'peak'
@@ -59,14 +66,16 @@ TUPLE_Y_UNITS = (
     'W/s', 'WA', 'WV', 'WW', 'WdB', 'Ws', 'dB', 'dB/A', 'dB/V', 'dB/W', 'dB/dB', 'dBA', 'dBV', 'dBW',
     'dBdB', 'day', 'degrees', 'div', 'hr', 'min', 'ohms', 'percent', 's')
 
-COMPLEMENT = [i if i < 0x80 else -(0xff - i + 1) for i in range(0xff + 1)]
-# 用于把补码转换为原码数字
-
 CHANNEL_COLOR_DICT = {YELLOW: 1, BLUE: 2, PURPLE: 3, GREEN: 4}
 
 
 class Mdo3000Cmd:
 
+    # 轮询及连续采集中频繁发送的常量命令
+    BUSY = CommandTemplate('BUSY?')
+    CURVE = CommandTemplate('CURVe?')
+    SINGLE_CURVE = CommandTemplate('ACQuire:STATE ON;*WAI;:CURVe?')
+
     ACQUIRE = 'ACQ'
     FAST_ACQUIRE = ':FASTA'
     PALETTE = ':PALE'
@@ -0,0 +1,253 @@
+# -*- encoding: utf-8 -*-
+"""
+@File    : waveform.py
+@Time    : 2026/10/17 21:30
+@Author  : blockish
+@Email   : blockish@yeah.net
+"""
+__all__ = {
+    'Preamble',
+    'Waveform',
+    'ieee_block',
+}
+
+import re
+
+import numpy as np
+
+from errors import InstrumentException
+
+
+def ieee_block(data: bytes) -> memoryview:
+    """
+    解析IEEE 488.2定长二进制块(#<n><length><data>[\\n]), 不复制数据
+    :param data: (type bytes) 仪器返回的原始数据
+    :return: (type memoryview) 数据部分
+    :raise InstrumentException: 块头错误或数据长度不足
+    """
+    view = memoryview(data)
+    if len(view) < 2 or 0x23 != view[0]:
+        raise InstrumentException('error start of binary block: %r' % bytes(view[:2]))
+    digits = view[1] - 0x30
+    if not 0 < digits <= 9:
+        raise InstrumentException('error length digits of binary block: %r' % bytes(view[:2]))
+    start = 2 + digits
+    length = int(bytes(view[2:start]))
+    if len(view) < start + length:
+        raise InstrumentException('binary block too short: %d bytes, expect %d' % (len(view) - start, length))
+    return view[start:start + length]
+
+
+class Waveform:
+    """
+    示波器波形数据, y轴数据为numpy数组, x轴(时间轴)在第一次访问时根据起点和间隔计算,
+    分段采集的波形y轴为二维数组(段数 x 每段点数), 各段共用同一x轴, timestamps为各段的时间戳
+    """
+
+    def __init__(self, y: np.ndarray, x_zero: float, x_incr: float, x_unit: str = 's', y_unit: str = 'V',
+                 source: str = None, timestamps: np.ndarray = None):
+        """
+        :param y: (type numpy.ndarray) y轴数据
+        :param x_zero: (type float) 第一个点的x轴坐标
+        :param x_incr: (type float) 相邻两点的x轴间隔
+        :param x_unit: (type str) x轴单位
+        :param y_unit: (type str) y轴单位
+        :param source: (type str) 波形的信号源
+        :param timestamps: (type numpy.ndarray) 分段采集时各段的时间戳, 单位S
+        """
+        self._y = y
+        self._x = None
+        self._x_zero = x_zero
+        self._x_incr = x_incr
+        self._x_unit = x_unit
+        self._y_unit = y_unit
+        self._source = source
+        self._timestamps = timestamps
+
+    @classmethod
+    def from_raw(cls, raw, width: int, y_mult: float, y_zero: float, y_off: float, x_zero: float, x_incr: float,
+                 x_unit: str = 's', y_unit: str = 'V', source: str = None, big_endian: bool = False,
+                 timestamps: np.ndarray = None):
+        """
+        由有符号二进制的采样码值创建波形, y = (码值 - y_off) * y_mult + y_zero
+        :param raw: (type bytes-like) 采样码值数据(不含块头)
+        :param width: (type int) 每个点的字节数, 可选值 {1|2}
+        :param y_mult: (type float) YMUlt
+        :param y_zero: (type float) YZEro
+        :param y_off: (type float) YOFf
+        :param big_endian: (type bool) 码值是否为大端, DATa:ENCdg为RIBinary时为大端, SRIbinary时为小端
+        :param timestamps: (type numpy.ndarray) 分段采集时各段的时间戳, 数据按段依次排列, 段数为len(timestamps)
+        :return: (type Waveform) 波形
+        """
+        if width not in (1, 2):
+            raise InstrumentException('unsupported data width %s' % width)
+        dtype = np.dtype('i%d' % width).newbyteorder('>' if big_endian else '<')
+        codes = np.frombuffer(raw, dtype=dtype, count=len(raw) // width)
+        y = (codes - y_off) * y_mult + y_zero
+        if timestamps is not None:
+            y = y.reshape(len(timestamps), -1)
+        return cls(y, x_zero, x_incr, x_unit, y_unit, source, timestamps)
+
+    def __len__(self):
+        """每段的点数"""
+        return self._y.shape[-1]
+
+    def __repr__(self):
+        return '<Waveform: {} {} x {} points, {} {}/pt from {} {}>'.format(
+            self._source, self.frames, len(self), self._x_incr, self._x_unit, self._x_zero, self._x_unit)
+
+    @property
+    def y(self) -> np.ndarray:
+        return self._y
+
+    @property
+    def x(self) -> np.ndarray:
+        """x轴(时间轴)数据, 第一次访问时计算"""
+        if self._x is None:
+            self._x = self._x_zero + self._x_incr * np.arange(len(self), dtype=np.float64)
+        return self._x
+
+    @property
+    def frames(self) -> int:
+        """段数, 非分段采集的波形为1"""
+        return 1 if self._y.ndim == 1 else self._y.shape[0]
+
+    @property
+    def timestamps(self):
+        """分段采集时各段的时间戳, 非分段采集的波形为None"""
+        return self._timestamps
+
+    @property
+    def x_zero(self):
+        return self._x_zero
+
+    @property
+    def x_incr(self):
+        return self._x_incr
+
+    @property
+    def x_unit(self):
+        return self._x_unit
+
+    @property
+    def y_unit(self):
+        return self._y_unit
+
+    @property
+    def source(self):
+        return self._source
+
+
+class Preamble:
+    """
+    波形前导信息(WFMOutpre?), 包含数据格式及x/y轴的缩放参数
+    """
+
+    # (助记符, 属性名, 类型), 助记符中的大写部分为短格式
+    FIELDS = (
+        ('BYT_Nr', 'width', int),
+        ('BIT_Nr', 'bits', int),
+        ('ENCdg', 'encoding', str),
+        ('BN_Fmt', 'bn_fmt', str),
+        ('BYT_Or', 'byte_order', str),
+        ('WFId', 'wfid', str),
+        ('NR_Pt', 'points', int),
+        ('PT_Fmt', 'pt_fmt', str),
+        ('XUNit', 'x_unit', str),
+        ('XINcr', 'x_incr', float),
+        ('XZEro', 'x_zero', float),
+        ('PT_Off', 'pt_off', int),
+        ('YUNit', 'y_unit', str),
+        ('YMUlt', 'y_mult', float),
+        ('YOFf', 'y_off', float),
+        ('YZEro', 'y_zero', float),
+    )
+    # 命令头(长短格式) -> (属性名, 类型)
+    LABELS = {label: (name, field_type) for mnemonic, name, field_type in FIELDS
+              for label in (mnemonic.upper(), re.sub('[a-z]', '', mnemonic))}
+    # 按引号外的分号分割字段
+    SPLIT = re.compile(r'(?:[^;"]|"[^"]*")+')
+
+    def __init__(self, **fields):
+        self.width = 1
+        self.bits = 8
+        self.encoding = None
+        self.bn_fmt = 'RI'
+        self.byte_order = 'LSB'
+        self.wfid = None
+        self.points = None
+        self.pt_fmt = 'Y'
+        self.x_unit = 's'
+        self.x_incr = 1.0
+        self.x_zero = 0.0
+        self.pt_off = 0
+        self.y_unit = 'V'
+        self.y_mult = 1.0
+        self.y_off = 0.0
+        self.y_zero = 0.0
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    def __repr__(self):
+        return '<Preamble: {}>'.format(', '.join('%s=%r' % (name, getattr(self, name)) for _, name, _ in self.FIELDS))
+
+    def as_dict(self) -> dict:
+        """
+        :return: (type dict) 属性名 -> 值, 可用Preamble(**dict)重新创建
+        """
+        return {name: getattr(self, name) for _, name, _ in self.FIELDS}
+
+    @classmethod
+    def parse(cls, response: str):
+        """
+        解析带命令头的WFMOutpre?响应(HEADer ON), 长短格式的命令头均可, 不依赖字段顺序,
+        如 ':WFMOUTPRE:BYT_NR 1;BIT_NR 8;ENCDG BINARY;...;YZERO 0.0E+0'
+        :param response: (type str) WFMOutpre?的响应
+        :return: (type Preamble) 前导信息
+        :raise InstrumentException: 响应为空
+        """
+        preambles = cls.parse_all(response)
+        if len(preambles) == 0:
+            raise InstrumentException('empty waveform preamble: %r' % response)
+        return preambles[0]
+
+    @classmethod
+    def parse_all(cls, response: str) -> list:
+        """
+        解析一次查询中依次返回的多个WFMOutpre?响应, 每个响应以带路径的命令头(如':WFMOUTPRE:BYT_NR')开始
+        :param response: (type str) 多个WFMOutpre?的响应, 以';'分隔
+        :return: (type list of Preamble) 前导信息
+        """
+        preambles = []
+        fields = None
+        for field in cls.SPLIT.findall(response.strip()):
+            label, _, value = field.strip().partition(' ')
+            if fields is None or label.startswith(':'):
+                fields = {}
+                preambles.append(fields)
+            item = cls.LABELS.get(label.rsplit(':', 1)[-1].upper())
+            if item is None:
+                continue
+            name, field_type = item
+            value = value.strip()
+            if str is field_type:
+                fields[name] = value.strip('"')
+            else:
+                fields[name] = field_type(float(value)) if int is field_type else float(value)
+        return [cls(**fields) for fields in preambles]
+
+    def waveform(self, raw, source: str = None, offset: int = 0, time_base=None,
+                 timestamps: np.ndarray = None) -> Waveform:
+        """
+        按前导信息解码采样码值
+        :param raw: (type bytes-like) 采样码值数据(不含块头)
+        :param source: (type str) 信号源
+        :param offset: (type int) 数据第一个点相对于前导信息中第一个点的偏移, 用于分段导出
+        :param time_base: (type Preamble) 提供x轴参数的前导信息, 多个信号源共用同一时间轴时使用, 默认为自身
+        :param timestamps: (type numpy.ndarray) 分段采集时各段的时间戳
+        :return: (type Waveform) 波形
+        """
+        time_base = self if time_base is None else time_base
+        return Waveform.from_raw(raw, self.width, self.y_mult, self.y_zero, self.y_off,
+                                 time_base.x_zero + time_base.x_incr * offset, time_base.x_incr, time_base.x_unit,
+                                 self.y_unit, source, big_endian='MSB' == self.byte_order, timestamps=timestamps)
@@ -0,0 +1,213 @@
+# -*- encoding: utf-8 -*-
+"""
+@File    : response.py
+@Time    : 2026/10/18 02:00
+@Author  : blockish
+@Email   : blockish@yeah.net
+"""
+__all__ = {
+    'nr1',
+    'nr2',
+    'nr3',
+    'boolean',
+    'text',
+    'Enumeration',
+    'ResponseParser',
+    'float_array',
+    'nr3_array',
+}
+
+import math
+import re
+from collections import namedtuple
+
+import numpy as np
+
+from errors import InstrumentException
+from instrument.const import SEMICOLON
+
+NAN_VALUE = 9.91e37         # SCPI非数值(NaN)
+OVERRANGE_VALUE = 9.9e37    # SCPI超量程(正负无穷)
+NAN_TEXTS = ('NAN', 'NONE', '---', '')
+INF_TEXTS = ('INF', '+INF', 'OVERLOAD', 'OL')
+
+
+def nr1(value: str) -> int:
+    """
+    NR1(整数)
+    :param value: (type str) 响应字段
+    :return: (type int) 整数
+    """
+    return int(value)
+
+
+def nr3(value: str) -> float:
+    """
+    NR2/NR3(浮点数), 9.91E+37及'NAN'为nan, 9.9E+37及'INF'为正负无穷
+    :param value: (type str) 响应字段
+    :return: (type float) 浮点数
+    """
+    try:
+        number = float(value)
+    except ValueError:
+        upper = value.strip().upper()
+        if upper in NAN_TEXTS:
+            return math.nan
+        if upper in INF_TEXTS:
+            return math.inf
+        if upper.startswith('-') and upper[1:] in INF_TEXTS:
+            return -math.inf
+        raise InstrumentException('invalid number: %r' % value)
+    if number == NAN_VALUE:
+        return math.nan
+    if abs(number) >= OVERRANGE_VALUE:
+        return math.copysign(math.inf, number)
+    return number
+
+
+nr2 = nr3
+
+
+def float_array(data, big_endian: bool = True):
+    """
+    把IEEE单精度浮点(FLOat)格式的二进制数据转换为numpy数组, 9.91E+37为nan, 9.9E+37为正负无穷
+    :param data: (type bytes-like) 二进制数据(不含块头)
+    :param big_endian: (type bool) 字节顺序是否为MSB在前
+    :return: (type numpy.ndarray of float64) 数值
+    """
+    values = np.frombuffer(data, dtype='>f4' if big_endian else '<f4').astype(np.float64)
+    return _sentinels(values, np.float32(NAN_VALUE), np.float32(OVERRANGE_VALUE))
+
+
+def nr3_array(response: str, sep: str = ','):
+    """
+    把以分隔符分隔的大量NR2/NR3数值(如多次读数)一次转换为numpy数组, 9.91E+37为nan, 9.9E+37为正负无穷
+    :param response: (type str) 查询的响应
+    :param sep: (type str) 分隔符
+    :return: (type numpy.ndarray of float64) 数值
+    """
+    response = response.strip()
+    if len(response) == 0:
+        return np.empty(0)
+    try:
+        values = np.array(response.split(sep), dtype=np.float64)
+    except ValueError:
+        values = np.array([nr3(field) for field in response.split(sep)], dtype=np.float64)
+    return _sentinels(values, NAN_VALUE, OVERRANGE_VALUE)
+
+
+def _sentinels(values, nan_value, overrange_value):
+    """把数组中的NaN及超量程值替换为nan及正负无穷"""
+    nan = values == nan_value
+    overrange = np.abs(values) >= overrange_value
+    values[overrange] = np.copysign(np.inf, values[overrange])
+    values[nan] = np.nan
+    return values
+
+
+def boolean(value: str) -> bool:
+    """
+    布尔值, {1|0|ON|OFF|TRUE|FALSE}
+    :param value: (type str) 响应字段
+    :return: (type bool)
+    """
+    upper = value.strip().upper()
+    if upper in ('1', 'ON', 'TRUE'):
+        return True
+    if upper in ('0', 'OFF', 'FALSE'):
+        return False
+    raise InstrumentException('invalid boolean: %r' % value)
+
+
+def text(value: str) -> str:
+    """
+    字符串, 去掉首尾空白及引号
+    :param value: (type str) 响应字段
+    :return: (type str)
+    """
+    return value.strip().strip('"\'')
+
+
+class Enumeration:
+    """
+    枚举值, 响应的长短格式均转换为给定的助记符, 如 Enumeration('SAMple', 'AVErage')('AVE') -> 'AVErage'
+    """
+
+    def __init__(self, *mnemonics):
+        self._labels = {}
+        for mnemonic in mnemonics:
+            self._labels[mnemonic.upper()] = mnemonic
+            self._labels[re.sub('[a-z]', '', mnemonic)] = mnemonic
+
+    def __call__(self, value: str) -> str:
+        upper = text(value).upper()
+        try:
+            return self._labels[upper]
+        except KeyError:
+            raise InstrumentException('invalid enumeration: %r, expect one of %s' % (value, set(self._labels.values())))
+
+
+class ResponseParser:
+    """
+    预编译的响应解析器, 按分隔符(引号内的分隔符除外)分割响应并依次转换每个字段,
+    在模块中为每个查询命令创建一次, 查询时直接调用.
+    使用示例:
+    MEASURE = ResponseParser(nr3, nr3, nr3, nr3, nr3, text,
+                             names=('value', 'maximum', 'minimum', 'mean', 'stddev', 'units'))
+    MEASURE('1.0E+0;2.0E+0;0;1.5;9.91E+37;"V"\\n') -> Record(value=1.0, ..., stddev=nan, units='V')
+    VALUES = ResponseParser(nr3, sep=',', repeat=True)
+    VALUES('1.0,NAN,INF\\n') -> (1.0, nan, inf)
+    """
+
+    def __init__(self, *converters, names=None, sep: str = SEMICOLON, repeat: bool = False, name: str = 'Record'):
+        """
+        :param converters: (type tuple of callable) 各字段的转换函数, 如 nr1, nr3, boolean, text, Enumeration(...)
+        :param names: (type tuple of str) 字段名, 指定时返回namedtuple
+        :param sep: (type str) 字段分隔符
+        :param repeat: (type bool) 响应包含多组字段, 为True时按converters循环转换,
+                只有一个转换函数时返回所有字段的tuple, 否则返回每组字段的list
+        :param name: (type str) namedtuple的类型名称
+        """
+        if len(converters) == 0:
+            raise InstrumentException('at least one converter required')
+        if names is not None and len(names) != len(converters):
+            raise InstrumentException('names %s not match %d converters' % (names, len(converters)))
+        self._converters = converters
+        self._record = None if names is None else namedtuple(name, names)
+        self._repeat = repeat
+        # 分隔符之后的引号个数为偶数时, 该分隔符不在引号内
+        self._split = re.compile(r'{0}(?=(?:[^"]*"[^"]*")*[^"]*$)'.format(re.escape(sep)))
+
+    def __call__(self, response: str):
+        """
+        :param response: (type str) 查询的响应
+        :return: 转换后的tuple(或namedtuple), repeat为True时参考__init__
+        :raise InstrumentException: 字段个数不匹配或者转换失败
+        """
+        fields = self.split(response)
+        size = len(self._converters)
+        if not self._repeat:
+            if len(fields) != size:
+                raise InstrumentException('expect %d fields, got %r' % (size, response))
+            return self._convert(fields)
+        if size == 1:
+            converter = self._converters[0]
+            return tuple(converter(field) for field in fields)
+        if len(fields) % size != 0:
+            raise InstrumentException('expect multiple of %d fields, got %r' % (size, response))
+        return [self._convert(fields[i:i + size]) for i in range(0, len(fields), size)]
+
+    def split(self, response: str) -> list:
+        """
+        分割响应, 保留空字段, 如'1,,2'分割为['1', '', '2']
+        :param response: (type str) 查询的响应
+        :return: (type list of str) 字段, 响应为空时返回空list
+        """
+        response = response.strip()
+        if len(response) == 0:
+            return []
+        return self._split.split(response)
+
+    def _convert(self, fields):
+        values = tuple(converter(field) for converter, field in zip(self._converters, fields))
+        return values if self._record is None else self._record(*values)
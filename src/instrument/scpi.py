@@ -5,19 +5,48 @@
 @Author  : blockish
 @Email   : blockish@yeah.net
 """
+import time
 from abc import ABC
-from instrument import Instrument
+from contextlib import contextmanager
+
+from instrument import Instrument, utils
+from pyvisa import constants as visa_constants
+from pyvisa.errors import VisaIOError
 from pyvisa.highlevel import ResourceManager
 
-from instrument.const import Ieee488Cmd, SPACE, INTERROGATION, EMPTY
+from instrument.const import Ieee488Cmd, SPACE, INTERROGATION, EMPTY, BRACE, ROOT_SEPARATOR, SEMICOLON, COMMAS
+from instrument.template import ENCODING, CommandTemplate, compile_template
 from errors import InstrumentException, ResourceException
 
+SYNC_OPC = 'opc'    # *OPC?查询, 所有操作完成后仪器才响应
+SYNC_STB = 'stb'    # 写入*OPC后以递增的间隔轮询*STB?的ESB位
+SYNC_SRQ = 'srq'    # 写入*OPC后等待VISA服务请求(SRQ)事件, 传输层不支持时退化为SYNC_STB
+TUPLE_SYNC = (SYNC_OPC, SYNC_STB, SYNC_SRQ)
+
+STB_ESB = 0x20      # 状态字节寄存器的标准事件汇总位
+ESR_OPC = 0x01      # 标准事件状态寄存器的操作完成位
+
+# 同步及状态轮询中频繁发送的常量命令, 编码后的字节只生成一次
+CMD_OPC = CommandTemplate(Ieee488Cmd.OPC.format(EMPTY))
+CMD_OPC_QUERY = CommandTemplate(Ieee488Cmd.OPC.format(INTERROGATION))
+CMD_ESR = CommandTemplate(Ieee488Cmd.ESR)
+CMD_STB = CommandTemplate(Ieee488Cmd.STB)
+
 
 class ScpiInstrument(Instrument, ABC):
 
     _rm = ResourceManager()
 
+    # 默认同步方式, 见wait_complete
+    SYNC = SYNC_OPC
+    POLL_INTERVAL = 0.005       # 状态轮询的初始间隔, 单位S
+    POLL_MAX_INTERVAL = 0.2     # 状态轮询的最大间隔, 单位S
+    # 仪器输入缓存长度, 批量写入时拼接后的单条命令不超过该长度
+    MAX_COMMAND_LENGTH = 1024
+
     def __init__(self, resource_name, timeout, **kwargs):
+        self._batch_depth = 0
+        self._pending = None
         super().__init__(resource_name, timeout, **kwargs)
 
     @staticmethod
@@ -67,36 +96,262 @@ class ScpiInstrument(Instrument, ABC):
     def write(self, cmd, *args, **kwargs):
         """
         写入命令
-        :param cmd: 命令内容
+        :param cmd: 命令内容, 字符串模板或CommandTemplate, 含替换字段的模板只解析一次, CommandTemplate常量命令直接发送缓存的字节
         :param args: 命令参数
         :param kwargs: 命令参数
         :return: None
         """
         if cmd is not None:
-            cmd = cmd.format(*args, **kwargs)
-            self._logger.info('Execute command: %s', cmd)
-            res = self._instrument.write(cmd)
-            self._logger.debug('write command info: %s', res)
-            # return res
+            template = compile_template(cmd)
+            if self._batch_depth > 0:
+                self._pending = self._coalesce(template(*args, **kwargs))
+                return
+            self._send(self._encode(template, *args, **kwargs))
+
+    def _encode(self, template, *args, **kwargs) -> bytes:
+        """
+        格式化命令模板并编码为可直接发送的字节, 包含VISA资源的写结束符
+        :param template: (type CommandTemplate) 命令模板
+        :return: (type bytes)
+        """
+        return template.encode(*args, termination=getattr(self._instrument, 'write_termination', EMPTY),
+                               encoding=getattr(self._instrument, 'encoding', ENCODING), **kwargs)
+
+    def _encode_text(self, cmd: str) -> bytes:
+        """
+        编码已格式化的命令(如批量写入拼接后的命令), 包含VISA资源的写结束符
+        :param cmd: (type str) 命令
+        :return: (type bytes)
+        """
+        return (cmd + getattr(self._instrument, 'write_termination', EMPTY)).encode(
+            getattr(self._instrument, 'encoding', ENCODING))
+
+    def _send(self, data: bytes):
+        self._logger.debug('Execute command: %r', data)
+        self._instrument.write_raw(data)
+
+    def _coalesce(self, cmd: str) -> str:
+        """
+        把命令拼接到待发送的命令之后, 超过MAX_COMMAND_LENGTH时先发送待发送的命令
+        :param cmd: (type str) 格式化后的命令
+        :return: (type str) 新的待发送命令
+        """
+        if self._pending is None:
+            return cmd
+        joined = utils.contact_spci_cmd(self._pending, BRACE, cmd, sep=ROOT_SEPARATOR)
+        if len(joined) <= self.MAX_COMMAND_LENGTH:
+            return joined
+        self._send(self._encode_text(self._pending))
+        return cmd
+
+    @contextmanager
+    def batch(self):
+        """
+        批量写入, 上下文中的写命令以';:'拼接后在尽可能少的VISA传输中发送, 可嵌套使用;
+        上下文中的查询和读操作之前会先发送待发送的命令(查询命令与待发送命令合并为一次传输),
+        正常退出上下文时发送剩余的命令, 上下文中抛出异常时丢弃尚未发送的命令(不发送不完整的设置)
+        使用示例:
+        with scope.batch():
+            scope.channel_setting(1, scale=0.5)
+            scope.horizontal(...)
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._pending = None
+            raise
+        self._batch_depth -= 1
+        if self._batch_depth == 0:
+            self.flush()
+
+    def flush(self):
+        """
+        发送批量写入中待发送的命令
+        :return: None
+        """
+        if self._pending is not None:
+            cmd, self._pending = self._pending, None
+            self._send(self._encode_text(cmd))
+
+    def device_clear(self):
+        """
+        设备清除(GPIB SDC/USBTMC INITIATE_CLEAR), 丢弃待发送的命令及仪器输出缓冲中未读取的响应,
+        用于超时等中断的传输之后恢复通信
+        :return: None
+        """
+        self._pending = None
+        self._instrument.clear()
 
     def read(self):
         """
         读命令
         :return: 设备返回的信息
         """
+        self.flush()
         return self._instrument.read()
 
+    def read_block(self) -> bytes:
+        """
+        读取IEEE 488.2定长二进制块(#<n><length><data>), 逐步解析块头后按长度读取数据,
+        不依赖结束符, 数据中可以包含任意字节
+        :return: (type bytes) 数据部分(不含块头及结束符)
+        :raise InstrumentException: 块头错误
+        """
+        return self.read_blocks(1)[0]
+
+    def read_blocks(self, count: int) -> list:
+        """
+        读取一次响应中依次返回的多个定长二进制块, 块之间以';'或','分隔, 最后一个块以'\n'结束,
+        如多个信号源的CURVe?
+        :param count: (type int) 块的个数
+        :return: (type list of bytes) 各块的数据部分
+        :raise InstrumentException: 块头错误
+        """
+        self.flush()
+        blocks = []
+        for index in range(count):
+            head = self._instrument.read_bytes(2)
+            if 0x23 != head[0] or not 0x30 < head[1] <= 0x39:
+                raise InstrumentException('error start of binary block: %r' % head)
+            length = int(self._instrument.read_bytes(head[1] - 0x30))
+            blocks.append(self._instrument.read_bytes(length))
+            end = self._instrument.read_bytes(1)
+            expect = (b'\n',) if index == count - 1 else (SEMICOLON.encode(), COMMAS.encode())
+            if end not in expect:
+                self._logger.error('error end of binary block %r, expect %r', end, expect)
+        return blocks
+
     def query(self, cmd, *args, **kwargs):
         """
         查询信息
-        :param cmd: 命令内容
+        :param cmd: 命令内容, 字符串模板或CommandTemplate, 参考write
         :param args: 命令参数
         :param kwargs: 命令参数
         :return: 设备返回的信息
         """
-        if cmd is not None:
-            cmd = cmd.format(*args, **kwargs)
-        return self._instrument.query(cmd)
+        if cmd is None:
+            self.flush()
+            return self._instrument.query(cmd)
+        template = compile_template(cmd)
+        if self._pending is not None:
+            cmd, self._pending = self._coalesce(template(*args, **kwargs)), None
+            self._send(self._encode_text(cmd))
+        else:
+            self._send(self._encode(template, *args, **kwargs))
+        delay = getattr(self._instrument, 'query_delay', 0)
+        if delay:
+            time.sleep(delay)
+        return self._instrument.read()
+
+    def query_as(self, parser, cmd, *args, **kwargs):
+        """
+        查询并解析响应
+        :param parser: (type callable) 响应解析器, 如 ResponseParser对象或 response.nr3
+        :param cmd: 命令内容
+        :param args: 命令参数
+        :param kwargs: 命令参数
+        :return: 解析后的值
+        """
+        return parser(self.query(cmd, *args, **kwargs))
+
+    @contextmanager
+    def visa_timeout(self, timeout: float):
+        """
+        临时修改VISA的I/O超时时间, 用于耗时较长的查询
+        :param timeout: (type float) 超时时间, 单位S
+        """
+        origin = self._instrument.timeout
+        self._instrument.timeout = timeout * 1000
+        try:
+            yield
+        finally:
+            self._instrument.timeout = origin
+
+    def wait_until(self, condition, timeout: float = 10):
+        """
+        轮询condition直到其返回True, 轮询间隔从POLL_INTERVAL开始倍增至POLL_MAX_INTERVAL,
+        仪器很快就绪时几乎没有等待, 耗时较长的操作也不会频繁占用总线
+        :param condition: (type callable) 无参数的判断函数, 通常包含一次查询
+        :param timeout: (type float) 超时时间, 单位S
+        :return: None
+        :raise InstrumentException: 超时
+        """
+        deadline = time.monotonic() + timeout
+        interval = self.POLL_INTERVAL
+        while not condition():
+            if time.monotonic() + interval > deadline:
+                raise InstrumentException('waiting for instrument timeout after %ss' % timeout)
+            time.sleep(interval)
+            interval = min(interval * 2, self.POLL_MAX_INTERVAL)
+
+    def wait_complete(self, timeout: float = 10, method: str = None):
+        """
+        等待之前发送的所有命令执行完成, 用于替代命令之后的固定延时
+        :param timeout: (type float) 超时时间, 单位S
+        :param method: (type str) 同步方式, 可选值 {opc|stb|srq}, 默认为类属性SYNC
+                opc: 发送*OPC?, 临时延长VISA超时时间等待响应
+                stb: 使能ESE的OPC位后写入*OPC, 轮询*STB?的ESB位
+                srq: 使能ESE的OPC位及SRE的ESB位后写入*OPC, 等待VISA服务请求事件,
+                    传输层(如串口, socket)不支持时退化为stb
+                stb及srq会读取并清除ESR, 等待期间临时修改的ESE及SRE在返回前恢复为原来的值
+        :return: None
+        :raise InstrumentException: 超时或同步方式错误
+        """
+        method = self.SYNC if method is None else method
+        if method not in TUPLE_SYNC:
+            raise InstrumentException('unknown synchronization method "%s", expect one of %s' % (method, TUPLE_SYNC))
+        if SYNC_OPC == method:
+            try:
+                with self.visa_timeout(timeout):
+                    self.opc(True)
+            except VisaIOError as e:
+                raise InstrumentException('waiting for operation complete error: %s' % e)
+            return
+        self.esr()
+        ese = int(self.ese())
+        self.write(Ieee488Cmd.ESE, SPACE, ESR_OPC)
+        try:
+            if SYNC_SRQ == method:
+                if self._wait_srq(timeout):
+                    return
+            else:
+                self.opc()
+            self.wait_until(lambda: int(self.stb()) & STB_ESB, timeout)
+            self.esr()
+        finally:
+            self.write(Ieee488Cmd.ESE, SPACE, ese)
+
+    def _wait_srq(self, timeout: float) -> bool:
+        """
+        写入*OPC并等待服务请求事件, 返回前恢复SRE
+        :param timeout: (type float) 超时时间, 单位S
+        :return: (type bool) 传输层不支持服务请求事件时返回False(此时*OPC已写入)
+        """
+        event = visa_constants.EventType.service_request
+        try:
+            self._instrument.enable_event(event, visa_constants.EventMechanism.queue)
+        except (VisaIOError, NotImplementedError, AttributeError):
+            self.opc()
+            return False
+        sre = None
+        try:
+            sre = int(self.sre())
+            self.write(Ieee488Cmd.SRE, SPACE, STB_ESB)
+            self.opc()
+            try:
+                self._instrument.wait_on_event(event, int(timeout * 1000))
+            except VisaIOError as e:
+                raise InstrumentException('waiting for service request error: %s' % e)
+            self.stb()
+            self.esr()
+            return True
+        finally:
+            if sre is not None:
+                self.write(Ieee488Cmd.SRE, SPACE, sre)
+            self._instrument.disable_event(event, visa_constants.EventMechanism.queue)
 
     def initialize(self):
         """
@@ -143,7 +398,7 @@ class ScpiInstrument(Instrument, ABC):
         查询读取标准状态寄存器并清除它
         :return: 标准状态寄存器内容
         """
-        return self.query(Ieee488Cmd.ESR)
+        return self.query(CMD_ESR)
 
     def idn(self):
         """
@@ -160,9 +415,9 @@ class ScpiInstrument(Instrument, ABC):
         :return: 参见功能说明
         """
         if query is True:
-            return self.query(Ieee488Cmd.OPC, INTERROGATION)
+            return self.query(CMD_OPC_QUERY)
         else:
-            self.write(Ieee488Cmd.OPC, EMPTY)
+            self.write(CMD_OPC)
 
     def opt(self):
         """
@@ -184,7 +439,7 @@ class ScpiInstrument(Instrument, ABC):
         """
         if on_off is not None:
             self.write(Ieee488Cmd.PSC, SPACE, on_off)
-        return self.query(Ieee488Cmd, INTERROGATION, EMPTY)
+        return self.query(Ieee488Cmd.PSC, INTERROGATION, EMPTY)
 
     def rcl(self, nrf: int = 1):
         """
@@ -193,6 +448,7 @@ class ScpiInstrument(Instrument, ABC):
         :return: None
         """
         self.write(Ieee488Cmd.RCL, nrf)
+        self.cache_clear()
 
     def rst(self):
         """
@@ -200,6 +456,7 @@ class ScpiInstrument(Instrument, ABC):
         :return: None
         """
         self.write(Ieee488Cmd.RST)
+        self.cache_clear()
 
     def sav(self, nrf: int = 1):
         """
@@ -224,7 +481,7 @@ class ScpiInstrument(Instrument, ABC):
         查询状态寄存器值
         :return: 状态寄存器值
         """
-        return self.query(Ieee488Cmd.STB)
+        return self.query(CMD_STB)
 
     def trg(self):
         """
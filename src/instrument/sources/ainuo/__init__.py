@@ -1,3 +1,4 @@
 # -*- encoding: utf-8 -*-
 
 from .an97_frame import An97Frame
+from .an97_frame import AsyncAn97Frame
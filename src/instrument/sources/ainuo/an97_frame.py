@@ -2,10 +2,13 @@
 
 __all__ = {
     'An97Frame',
+    'AsyncAn97Frame',
 }
 
 from constants import TUPLE_ON, TUPLE_OFF
 from instrument.frame import FrameInstrument
+from instrument.async_frame import AsyncFrameInstrument
+from instrument.frame_codec import FrameCodec
 from instrument.utils import *
 
 
@@ -17,6 +20,11 @@ ERROR = 'ERROR'  # 错误状态
 
 BAUDRATE_TUPLE = (1200, 2400, 4800, 9600)
 RW_DELAY_TUPLE = (0.4, 0.3, 0.2, 0.14)      # 串口写和读取之间的延迟, 与波特率相关, 如果出现通讯超时, 修改对应延迟参数
+FRAME_HEAD = ord('{')  # 帧头
+FRAME_TAIL = ord('}')  # 帧尾
+# 帧编解码器: 帧头 长度(1字节, 不含长度, 校验和及帧尾) 地址(2字节, 大端) ASCII命令及参数 校验和(帧头后所有字节之和) 帧尾
+CODEC = FrameCodec(head=FRAME_HEAD, address_fmt='>H', tail=FRAME_TAIL, length_fmt='B', length_adjust=-3,
+                   checksum_from=1)
 STATUS_TUPLE = (STANDBY, PRESET, RUN, SETTING, ERROR)
 COMMAND_RESULT_DICT = {'=': 'Success', '!': 'Invalid', '?': 'Unsupported'}
 
@@ -30,11 +38,56 @@ CMD_MODEL = 'RMO'  # 获取仪器型号信息
 CMD_VER = 'RVE'  # 获取仪器软件版本
 
 
-class An97Frame(FrameInstrument):
+class An97Protocol:
+    """
+    AN97系列的帧构建及解析, 同步(An97Frame)与异步(AsyncAn97Frame)版本共用
+    """
+
+    def _frame_complete(self, frame):
+        """
+        Override(帧尾'}'可能出现在校验和中, 需结合帧头后1字节的帧长度判断, 帧长度不含帧头, 校验和及帧尾)
+        """
+        if not frame.endswith(self._frame_tail):
+            return False
+        if len(frame) < 2:
+            return False
+        return len(frame) >= frame[1] + 3
+
+    def _parse_resp(self, resp):
+        """解析获取的结果"""
+        body = CODEC.decode(resp)
+        start = 4
+        end = len(body) - 2
+        if end < start:
+            raise IOError('the data length is incorrect from serial')
+        exec_str = bytes(body[start:end]).decode('ascii', errors='replace')
+        self._logger.info('Execute command result: %s', exec_str)
+        sta = COMMAND_RESULT_DICT.get(exec_str)
+        return sta if sta is not None else exec_str
+
+    def _cmd(self, cmd_str, volt=None, freq=None, upper=None, lower=None, group=None, lock=None):
+        """构建命令"""
+        body = cmd_str + '='
+        if volt is not None:
+            body += '%04d,' % round(float('%.1f' % volt) * 10)
+        if freq is not None:
+            body += '%04d,' % round(float('%.1f' % freq) * 10)
+        if upper is not None:
+            body += '%02d,' % int(upper)
+        if lower is not None:
+            body += '%02d,' % int(lower)
+        if group is not None:
+            body += '%s,' % group
+        if lock is not None:
+            body += '%s*' % lock
+        return CODEC.encode(self._address, body.encode('ascii'))
+
+
+class An97Frame(An97Protocol, FrameInstrument):
 
     def __init__(self, resource_name, address=1, baudrate=9600, timeout=0.15):
         super().__init__(resource_name, address, baudrate, timeout,
-                         BAUDRATE_TUPLE, RW_DELAY_TUPLE)
+                         BAUDRATE_TUPLE, RW_DELAY_TUPLE, frame_tail=FRAME_TAIL)
         assert 0 < address < 255
         assert baudrate in self._supported_baudrate
 
@@ -52,13 +105,13 @@ class An97Frame(FrameInstrument):
             'Unsupported': 非法指令
         """
         if on_off in TUPLE_ON:
-            self.write(self.__cmd('CST'))
+            cmd = self._cmd('CST')
         elif on_off in TUPLE_OFF:
-            self.write(self.__cmd('CSP'))
+            cmd = self._cmd('CSP')
         else:
             raise ParamException('unsupported on_off string %s' % on_off)
-        response = self.read()
-        return self.__parse_resp(response)
+        response = self.query(cmd)
+        return self._parse_resp(response)
 
     def parameter(self, volt, freq, upper=5, lower=5, group=0, lock=1):
         """
@@ -75,8 +128,8 @@ class An97Frame(FrameInstrument):
             'Unsupported': 非法指令
         """
         self._logger.info('set parameter: %s, %s, %s, %s, %s, %s', volt, freq, upper, lower, group, lock)
-        response = self.query(self.__cmd('SNO', volt, freq, upper, lower, group, lock))
-        return self.__parse_resp(response)
+        response = self.query(self._cmd('SNO', volt, freq, upper, lower, group, lock))
+        return self._parse_resp(response)
 
     def status(self):
         """
@@ -89,9 +142,9 @@ class An97Frame(FrameInstrument):
             'ERROR': 错误
             'UNKNOWN': 未知状态, 可能仪器通讯出错
         """
-        response = self.query(self.__cmd('RTE'))
+        response = self.query(self._cmd('RTE'))
         try:
-            return STATUS_TUPLE[int(self.__parse_resp(response))]
+            return STATUS_TUPLE[int(self._parse_resp(response))]
         except ValueError:
             return 'UNKNOWN'
 
@@ -103,8 +156,8 @@ class An97Frame(FrameInstrument):
             'Invalid': 此状态下指令无效
             'Unsupported': 非法指令
         """
-        response = self.query(self.__cmd('RNT'))
-        return self.__parse_resp(response)
+        response = self.query(self._cmd('RNT'))
+        return self._parse_resp(response)
 
     def preset(self):
         """
@@ -114,8 +167,8 @@ class An97Frame(FrameInstrument):
             'Invalid': 此状态下指令无效
             'Unsupported': 非法指令
         """
-        response = self.query(self.__cmd('RNS'))
-        return self.__parse_resp(response)
+        response = self.query(self._cmd('RNS'))
+        return self._parse_resp(response)
 
     def _model(self):
         """
@@ -125,8 +178,8 @@ class An97Frame(FrameInstrument):
             'Invalid': 此状态下指令无效
             'Unsupported': 非法指令
         """
-        response = self.query(self.__cmd('RMO'))
-        return self.__parse_resp(response)
+        response = self.query(self._cmd('RMO'))
+        return self._parse_resp(response)
 
     def _version(self):
         """
@@ -136,67 +189,59 @@ class An97Frame(FrameInstrument):
             'Invalid': 此状态下指令无效
             'Unsupported': 非法指令
         """
-        response = self.query(self.__cmd('RVE'))
-        return self.__parse_resp(response)
+        response = self.query(self._cmd('RVE'))
+        return self._parse_resp(response)
 
-    def __parse_resp(self, resp):
-        """解析获取的结果"""
-        start = 8
-        end = len(resp) - 4
-        if end < start:
-            raise IOError('the data length is incorrect from serial')
-        exec_str = hex_list_to_str(resp[start:end])[0]
-        self._logger.info('Execute command result: %s', exec_str)
-        sta = COMMAND_RESULT_DICT.get(exec_str)
-        return sta if sta is not None else exec_str
+class AsyncAn97Frame(An97Protocol, AsyncFrameInstrument):
+    """
+    AN97系列交流电源的asyncio版本, 帧的构建及解析与同步版本共用(An97Protocol)
+    """
 
-    def __cmd(self, cmd_str, volt=None, freq=None, upper=None, lower=None, group=None, lock=None):
-        """构建命令"""
-        cmd = list()
-        cmd.append(ord('{'))
-        cmd.extend(value_to_hex(value=self._address, endian=BIG_ENDIAN, size=2, magnif=1))
-        cmd.extend(ord(x) for x in cmd_str)
-        cmd.append(ord('='))
-        if volt is not None:
-            volt = float('%.1f' % volt)
-            if volt < 100:
-                cmd.append(ord('0'))
-            if volt < 10:
-                cmd.append(ord('0'))
-            volt_str = str(volt).replace('.', '')
-            cmd.extend(ord(x) for x in volt_str)
-            cmd.append(ord(','))
-        if freq is not None:
-            freq = float('%.1f' % freq)
-            if freq < 100:
-                cmd.append(ord('0'))
-            freq_str = str(freq).replace('.', '')
-            cmd.extend(ord(x) for x in freq_str)
-            cmd.append(ord(','))
-        if upper is not None:
-            upper = int(upper)
-            if upper < 10:
-                cmd.append(ord('0'))
-            upper_str = str(upper)
-            cmd.extend(ord(x) for x in upper_str)
-            cmd.append(ord(','))
-        if lower is not None:
-            lower = int(lower)
-            if lower < 10:
-                cmd.append(ord('0'))
-            lower_str = str(lower)
-            cmd.extend(ord(x) for x in lower_str)
-            cmd.append(ord(','))
-        if group is not None:
-            cmd.append(ord(str(group)))
-            cmd.append(ord(','))
-        if lock is not None:
-            cmd.append(ord(str(lock)))
-            cmd.append(ord('*'))
-        cmd.insert(1, len(cmd))
-        count = 0
-        for i in range(len(cmd) - 1):
-            count = count + cmd[i + 1]
-        cmd.extend(value_to_hex(value=count, endian=BIG_ENDIAN, size=1, magnif=1))
-        cmd.append(ord('}'))
-        return cmd
+    def __init__(self, resource_name, address=1, baudrate=9600, timeout=0.15):
+        assert 0 < address < 255
+        super().__init__(resource_name, address, baudrate, timeout, BAUDRATE_TUPLE, frame_tail=FRAME_TAIL)
+
+    async def idn(self):
+        return '%s; %s' % (await self._execute('RMO'), await self._execute('RVE'))
+
+    async def output(self, on_off):
+        """
+        电源输出开关, 参见An97Frame.output
+        """
+        if on_off in TUPLE_ON:
+            return await self._execute('CST')
+        elif on_off in TUPLE_OFF:
+            return await self._execute('CSP')
+        raise ParamException('unsupported on_off string %s' % on_off)
+
+    async def parameter(self, volt, freq, upper=5, lower=5, group=0, lock=1):
+        """
+        设置输出电压频率等参数, 参见An97Frame.parameter
+        """
+        self._logger.info('set parameter: %s, %s, %s, %s, %s, %s', volt, freq, upper, lower, group, lock)
+        return await self._execute('SNO', volt, freq, upper, lower, group, lock)
+
+    async def status(self):
+        """
+        获取电源状态, 参见An97Frame.status
+        """
+        try:
+            return STATUS_TUPLE[int(await self._execute('RTE'))]
+        except ValueError:
+            return 'UNKNOWN'
+
+    async def result(self):
+        """
+        获取电源的输出参数, 参见An97Frame.result
+        """
+        return await self._execute('RNT')
+
+    async def preset(self):
+        """
+        获取电源的预设输出参数, 参见An97Frame.preset
+        """
+        return await self._execute('RNS')
+
+    async def _execute(self, cmd_str, *args):
+        """执行命令并解析结果"""
+        return self._parse_resp(await self.query(self._cmd(cmd_str, *args)))
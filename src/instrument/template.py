@@ -0,0 +1,145 @@
+# -*- encoding: utf-8 -*-
+"""
+@File    : template.py
+@Time    : 2026/10/18 04:20
+@Author  : blockish
+@Email   : blockish@yeah.net
+"""
+__all__ = {
+    'CommandTemplate',
+    'compile_template',
+}
+
+import re
+from string import Formatter
+
+from errors import ParamException
+from instrument.const import EMPTY
+
+ENCODING = 'ascii'
+
+
+class CommandTemplate:
+    """
+    预编译的命令模板: 创建时解析一次模板;
+    无参数的常量命令(如 *IDN?, BUSY?)预先生成命令字符串, 编码后的字节按结束符及编码缓存并重复使用;
+    可为每个参数指定类型校验, 参数不合法时在发送之前抛出ParamException.
+    类型校验说明:
+        None: 不校验
+        类型(如 int, float, str): 参数需为该类型的实例, float同时接受int
+        tuple/list/set: 可选值, 字符串不区分大小写
+        re.Pattern: 参数转换为字符串后需匹配该正则
+    使用示例:
+    WIDTH = CommandTemplate('DATa:WIDth {}', (1, 2))
+    WIDTH(2) -> 'DATa:WIDth 2'
+    WIDTH.encode(2, termination='\\n') -> b'DATa:WIDth 2\\n'
+    WIDTH(4) -> ParamException
+    """
+
+    __slots__ = ('_template', '_fields', '_types', '_format', '_text', '_bytes')
+
+    def __init__(self, template: str, *types):
+        """
+        :param template: (type str) 命令模板, 与str.format相同的格式
+        :param types: (type tuple) 依次对应模板中的各个位置参数的类型校验, 不指定时不校验
+        """
+        self._template = template
+        self._fields = tuple(field for _, field, _, _ in Formatter().parse(template) if field is not None)
+        if len(types) > 0 and len(types) != len(self._fields):
+            raise ParamException('%d types for %d fields of "%s"' % (len(types), len(self._fields), template))
+        self._types = tuple(self._compile_type(kind) for kind in types)
+        self._format = template.format
+        # 常量命令与str.format相同, 忽略多余的参数
+        self._text = template.format() if len(self._fields) == 0 else None
+        self._bytes = {}
+
+    def __repr__(self):
+        return '<CommandTemplate: {!r}>'.format(self._template)
+
+    def __call__(self, *args, **kwargs) -> str:
+        """
+        格式化命令
+        :return: (type str) 命令
+        :raise ParamException: 参数类型校验失败
+        """
+        if self._text is not None:
+            return self._text
+        if len(self._types) > 0:
+            self._check(args)
+        return self._format(*args, **kwargs)
+
+    @property
+    def template(self) -> str:
+        return self._template
+
+    @property
+    def constant(self) -> bool:
+        """是否为无参数的常量命令"""
+        return self._text is not None
+
+    def encode(self, *args, termination: str = EMPTY, encoding: str = ENCODING, **kwargs) -> bytes:
+        """
+        格式化并编码命令, 常量命令返回缓存的字节
+        :param termination: (type str) 添加在命令之后的结束符
+        :param encoding: (type str) 编码
+        :return: (type bytes) 可直接发送的命令
+        """
+        if self._text is None:
+            if len(self._types) > 0:
+                self._check(args)
+            return (self._format(*args, **kwargs) + termination).encode(encoding)
+        key = (termination, encoding)
+        data = self._bytes.get(key)
+        if data is None:
+            data = self._bytes[key] = (self._text + termination).encode(encoding)
+        return data
+
+    @staticmethod
+    def _compile_type(kind):
+        if isinstance(kind, (tuple, list, set, frozenset)):
+            return frozenset(value.upper() if isinstance(value, str) else value for value in kind)
+        return kind
+
+    def _check(self, args):
+        if len(args) != len(self._types):
+            raise ParamException('"%s" expect %d arguments, got %d' % (self._template, len(self._types), len(args)))
+        for index, (value, kind) in enumerate(zip(args, self._types)):
+            if kind is None:
+                continue
+            if isinstance(kind, frozenset):
+                valid = (value.upper() if isinstance(value, str) else value) in kind
+            elif isinstance(kind, re.Pattern):
+                valid = kind.match(str(value)) is not None
+            elif kind is float:
+                valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+            else:
+                valid = isinstance(value, kind)
+            if not valid:
+                raise ParamException('invalid argument %d of "%s": %r' % (index, self._template, value))
+
+
+MAX_TEMPLATES = 4096      # 缓存的含替换字段的模板个数上限
+MAX_CONSTANTS = 256       # 缓存的常量命令个数上限
+_templates = {}           # 命令字符串 -> CommandTemplate
+_counts = [0, 0]          # 已缓存的模板个数, 常量命令个数
+
+
+def compile_template(cmd) -> CommandTemplate:
+    """
+    获取命令模板对应的CommandTemplate, 字符串只解析一次, 常量命令同时缓存编码后的字节;
+    缓存满后不再加入新的字符串(不淘汰已缓存的), 调用方已格式化的动态命令不会挤出缓存中的模板及常量命令,
+    轮询等频繁发送的常量命令也可在模块中直接创建CommandTemplate
+    :param cmd: (type str or CommandTemplate) 命令模板
+    :return: (type CommandTemplate)
+    """
+    template = _templates.get(cmd)
+    if template is not None:
+        return template
+    if isinstance(cmd, CommandTemplate):
+        return cmd
+    template = CommandTemplate(cmd)
+    kind = 1 if template.constant else 0
+    if _counts[kind] < (MAX_CONSTANTS if kind else MAX_TEMPLATES):
+        _counts[kind] += 1
+        _templates[cmd] = template
+    return template
@@ -1,9 +1,8 @@
 # -*- encoding: utf-8 -*-
 import re
-import time
 
 from errors import ParamException
-from instrument.const import SEMICOLON
+from instrument.const import SEMICOLON, COLON, ASTERISK, ROOT_SEPARATOR
 
 BIG_ENDIAN = 'big'
 LITTLE_ENDIAN = 'little'
@@ -91,13 +90,25 @@ def raiser(e):
     raise e
 
 
-def contact_spci_cmd(cmd1, cmd2, *args, **kwargs):
+def contact_spci_cmd(cmd1, cmd2, *args, sep=SEMICOLON, **kwargs):
+    """
+    拼接SCPI命令
+    :param cmd1: (type str) 已拼接的命令, 为None时直接返回格式化后的cmd2
+    :param cmd2: (type str) 需要拼接的命令模板, 为None时直接返回cmd1
+    :param args: 命令参数
+    :param sep: (type str) 分隔符, 默认为';';
+            为ROOT_SEPARATOR(';:')时每条命令都从根节点开始解析, 通用命令(*开头)及以':'开头的命令前只添加';'
+    :param kwargs: 命令参数
+    :return: (type str) 拼接后的命令
+    """
     if cmd2 is None:
         return cmd1
+    cmd2 = cmd2.format(*args, **kwargs)
     if cmd1 is None:
-        return cmd2.format(*args, **kwargs)
-    cmd1 += SEMICOLON + cmd2.format(*args, **kwargs)
-    return cmd1
+        return cmd2
+    if ROOT_SEPARATOR == sep and cmd2[:1] in (ASTERISK, COLON):
+        sep = SEMICOLON
+    return cmd1 + sep + cmd2
 
 
 def set_query(obj, set_dict, get_dict, *names, **values):
@@ -110,8 +121,9 @@ def set_query(obj, set_dict, get_dict, *names, **values):
         #     query_cmd = contact_spci_cmd(query_cmd, get_dict.get(key))
         write_cmd = contact_spci_cmd(write_cmd, set_dict.get(key), value)
 
-    obj.write(write_cmd)
-    time.sleep(0.1)
+    if write_cmd is not None:
+        obj.write(write_cmd)
+        obj.wait_complete()
 
     query_cmd = None
     for name in names:
@@ -0,0 +1,130 @@
+# -*- encoding: utf-8 -*-
+"""
+@File    : async_frame_test.py
+@Time    : 2026/10/18 11:50
+@Author  : blockish
+@Email   : blockish@yeah.net
+"""
+import asyncio
+import fcntl
+import socket
+import struct
+import termios
+import time
+import unittest
+from unittest import mock
+
+import serial
+
+from instrument.sources.ainuo.an97_frame import CODEC, AsyncAn97Frame
+
+
+class SocketSerial:
+    """以socketpair模拟串口, 仪器端为peer, fileno可由事件循环的add_reader等待"""
+
+    def __init__(self, port=None, baudrate=9600, timeout=None):
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self._sock, self.peer = socket.socketpair()
+        self._sock.setblocking(False)
+        self.peer.setblocking(False)
+
+    def fileno(self):
+        return self._sock.fileno()
+
+    @property
+    def in_waiting(self):
+        return struct.unpack('i', fcntl.ioctl(self._sock.fileno(), termios.FIONREAD, b'\0\0\0\0'))[0]
+
+    def read(self, size=1):
+        try:
+            return self._sock.recv(size)
+        except BlockingIOError:
+            return b''
+
+    def write(self, data):
+        self._sock.sendall(bytes(data))
+        return len(data)
+
+    def reset_input_buffer(self):
+        while self.in_waiting > 0:
+            self._sock.recv(self.in_waiting)
+
+    def close(self):
+        self._sock.close()
+        self.peer.close()
+
+
+class AsyncFrameTest(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(serial, 'Serial', SocketSerial)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _run(self, timeout, main):
+        async def runner():
+            inst = AsyncAn97Frame('COM1', address=1, timeout=timeout)
+            try:
+                return await main(inst, inst._instrument.peer)
+            finally:
+                inst.close()
+        return asyncio.run(runner())
+
+    def test_length(self):
+        # 校验和恰好为'}', 收到前一部分时不能作为完整帧
+        frame = CODEC.encode(1, b'RVE=J')
+        self.assertEqual(ord('}'), frame[-2])
+
+        async def main(inst, peer):
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.01, peer.send, bytes(frame[:-1]))
+            loop.call_later(0.05, peer.send, bytes(frame[-1:]))
+            return await inst.query(CODEC.encode(1, b'RVE='))
+
+        self.assertEqual(list(frame), self._run(0.1, main))
+
+    def test_deadline(self):
+        async def silent(inst, peer):
+            return await inst.read(retry=3)
+
+        begin = time.perf_counter()
+        with self.assertRaisesRegex(IOError, "can't read"):
+            self._run(0.05, silent)
+        self.assertGreaterEqual(time.perf_counter() - begin, 0.15)
+        self.assertLess(time.perf_counter() - begin, 0.5)
+
+        async def partial(inst, peer):
+            peer.send(bytes(CODEC.encode(1, b'RVE=1')[:5]))
+            return await inst.read(retry=2)
+
+        with self.assertRaisesRegex(IOError, 'incomplete frame'):
+            self._run(0.05, partial)
+
+    def test_lock(self):
+        events = []
+
+        async def device(peer, count):
+            loop = asyncio.get_running_loop()
+            for index in range(count):
+                request = await loop.sock_recv(peer, 64)
+                events.append(('request', bytes(CODEC.decode(request))))
+                await asyncio.sleep(0.02)
+                await loop.sock_sendall(peer, bytes(CODEC.encode(1, b'RMO=%d**' % index)))
+                events.append(('response', index))
+
+        async def main(inst, peer):
+            task = asyncio.ensure_future(device(peer, 2))
+            results = await asyncio.gather(inst.query(CODEC.encode(1, b'RMO=')), inst.query(CODEC.encode(1, b'RVE=')))
+            await task
+            return results
+
+        first, second = self._run(0.5, main)
+        self.assertEqual(['request', 'response', 'request', 'response'], [event for event, _ in events])
+        self.assertEqual(b'RMO=0**', bytes(CODEC.decode(first)))
+        self.assertEqual(b'RMO=1**', bytes(CODEC.decode(second)))
+
+
+if __name__ == '__main__':
+    unittest.main()
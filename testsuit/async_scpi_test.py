@@ -0,0 +1,119 @@
+# -*- encoding: utf-8 -*-
+"""
+@File    : async_scpi_test.py
+@Time    : 2026/10/18 10:40
+@Author  : blockish
+@Email   : blockish@yeah.net
+"""
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from errors import InstrumentException
+from instrument.async_scpi import AsyncScpiInstrument
+from instrument.scpi import ScpiInstrument
+
+
+class FakeVisa:
+    """按查询命令依次返回预设的响应, 记录每条命令及执行的线程"""
+    timeout = 2000
+    write_termination = '\n'
+    encoding = 'ascii'
+    query_delay = 0
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.writes = []
+        self.threads = set()
+        self.last = None
+
+    def write_raw(self, data):
+        self.threads.add(threading.current_thread().name)
+        self.last = data.decode().strip()
+        self.writes.append(self.last)
+
+    def read(self):
+        values = self.responses.get(self.last, ['0'])
+        return (values.pop(0) if len(values) > 1 else values[0]) + '\n'
+
+    def close(self):
+        pass
+
+
+class FakeScpi(ScpiInstrument):
+
+    def __init__(self, responses=None):
+        self._responses = {} if responses is None else responses
+        self.active = 0
+        self.overlap = False
+        super().__init__('FAKE', 2)
+
+    def open(self, resource_name: str = None, reopen: bool = False):
+        self._resource_name = 'FAKE'
+        return FakeVisa(self._responses)
+
+    def slow(self, value):
+        self.active += 1
+        self.overlap = self.overlap or self.active > 1
+        time.sleep(0.02)
+        self.active -= 1
+        return value
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class AsyncScpiTest(unittest.TestCase):
+
+    def test_dispatch(self):
+        inst = FakeScpi({'X?': ['5']})
+        visa = inst._instrument
+        run(AsyncScpiInstrument(inst).query('X?'))
+        self.assertTrue(all(name.startswith('visa-io') for name in visa.threads))
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='fake-io') as executor:
+            visa.threads.clear()
+            self.assertEqual('5\n', run(AsyncScpiInstrument(inst, executor).query('X?')))
+            self.assertEqual({'fake-io_0'}, visa.threads)
+
+    def test_lock(self):
+        inst = FakeScpi()
+
+        async def main():
+            async_inst = AsyncScpiInstrument(inst)
+            return await asyncio.gather(*(async_inst.slow(i) for i in range(4)))
+
+        self.assertEqual([0, 1, 2, 3], run(main()))
+        self.assertFalse(inst.overlap)
+
+    def test_wait_complete(self):
+        # 第一次读取的是之前遗留的OPC位, 不能作为本次完成
+        inst = FakeScpi({'*ESR?': ['1', '0', '0', '17']})
+        async_inst = AsyncScpiInstrument(inst)
+        async_inst.POLL_INTERVAL = 0.001
+        self.assertEqual(0x11, run(async_inst.wait_complete(timeout=1)))
+        self.assertEqual(['*ESR?', '*OPC', '*ESR?', '*ESR?', '*ESR?'], inst._instrument.writes)
+
+    def test_timeout(self):
+        inst = FakeScpi({'BUSY?': ['1']})
+        async_inst = AsyncScpiInstrument(inst)
+        async_inst.POLL_INTERVAL = 0.01
+        async_inst.POLL_MAX_INTERVAL = 0.04
+        begin = time.perf_counter()
+        with self.assertRaises(InstrumentException):
+            run(async_inst.wait_idle(timeout=0.2))
+        self.assertLess(time.perf_counter() - begin, 0.5)
+        # 间隔 0.01, 0.02, 0.04, 0.04, ... 的退避, 0.2S内最多轮询约7次
+        self.assertLessEqual(len(inst._instrument.writes), 8)
+        self.assertGreaterEqual(len(inst._instrument.writes), 4)
+
+    def test_opc(self):
+        inst = FakeScpi({'*OPC?': ['1']})
+        self.assertEqual('1\n', run(AsyncScpiInstrument(inst).opc(True)))
+        self.assertEqual(['*OPC?'], inst._instrument.writes)
+
+
+if __name__ == '__main__':
+    unittest.main()
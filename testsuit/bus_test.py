@@ -0,0 +1,110 @@
+# -*- encoding: utf-8 -*-
+"""
+@File    : bus_test.py
+@Time    : 2026/10/18 11:20
+@Author  : blockish
+@Email   : blockish@yeah.net
+"""
+import unittest
+from unittest import mock
+
+import serial
+
+from errors import ParamException
+from instrument.bus import SerialBus
+from instrument.sources.ainuo.an97_frame import CODEC, An97Frame
+
+
+class FakeSerial:
+    """
+    模拟RS-485总线上的多台AN97: 按命令帧中的地址应答'<命令>=A<地址>**', 不在addresses中的地址不应答
+    """
+
+    def __init__(self, port=None, baudrate=9600, timeout=None):
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.is_open = True
+        self.addresses = set()
+        self.requests = []
+        self._buffer = bytearray()
+
+    def write(self, data):
+        body = bytes(CODEC.decode(bytes(data)))
+        address = int.from_bytes(data[2:4], 'big')
+        self.requests.append((address, body))
+        if address in self.addresses:
+            self._buffer += CODEC.encode(address, body[:3] + b'=A%d**' % address)
+        return len(data)
+
+    def read_until(self, expected=b'\n'):
+        end = self._buffer.find(expected)
+        end = len(self._buffer) if end < 0 else end + len(expected)
+        data, self._buffer = bytes(self._buffer[:end]), self._buffer[end:]
+        return data
+
+    def reset_input_buffer(self):
+        self._buffer.clear()
+
+    def close(self):
+        self.is_open = False
+
+
+class SerialBusTest(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(serial, 'Serial', FakeSerial)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.bus = SerialBus('COM3', baudrate=9600, timeout=0.01)
+        self.port = self.bus.serial
+        self.port.addresses.update((1, 2, 3))
+
+    def test_device(self):
+        first = self.bus.device(An97Frame, 1)
+        self.assertIs(first, self.bus.device(An97Frame, 1))
+        second = self.bus.device(An97Frame, 2)
+        self.assertEqual([first, second], self.bus.devices)
+        self.assertIs(self.bus.lock, first._lock)
+        self.assertIs(first._lock, second._lock)
+        self.assertIs(self.port, second._instrument)
+        self.assertEqual('A2', second._model())
+        self.assertEqual((2, b'RMO='), self.port.requests[-1])
+
+    def test_poll(self):
+        for address in (3, 1, 2, 4):
+            self.bus.device(An97Frame, address)
+        results = list(self.bus.poll('_model', cycles=2))
+        self.assertEqual([1, 2, 3, 4] * 2, [address for address, _ in results])
+        self.assertEqual(['A1', 'A2', 'A3'], [result for _, result in results[:3]])
+        # 不应答的仪器以异常作为结果, 不影响其他仪器的轮询
+        self.assertIsInstance(results[3][1], IOError)
+        self.assertEqual('A1', results[4][1])
+
+    def test_close(self):
+        first = self.bus.device(An97Frame, 1)
+        second = self.bus.device(An97Frame, 2)
+        first.close()
+        self.assertEqual([second], self.bus.devices)
+        self.assertTrue(self.port.is_open)
+        self.assertEqual('A2', second._model())
+        self.assertIsNot(first, self.bus.device(An97Frame, 1))
+        self.bus.close()
+        self.assertEqual([], self.bus.devices)
+        self.assertFalse(self.port.is_open)
+
+    def test_address(self):
+        device = self.bus.device(An97Frame, 1)
+        other = self.bus.device(An97Frame, 2)
+        device.address = 3
+        self.assertEqual([other, device], self.bus.devices)
+        self.assertIs(device, self.bus.device(An97Frame, 3))
+        self.assertEqual('A3', device._model())
+        with self.assertRaises(ParamException):
+            device.address = 2
+        self.assertEqual(3, device.address)
+        self.assertIsNot(device, self.bus.device(An97Frame, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+# -*- encoding: utf-8 -*-
+"""
+@File    : frame_codec_test.py
+@Time    : 2026/10/17 18:05
+@Author  : blockish
+@Email   : blockish@yeah.net
+"""
+import unittest
+
+from instrument.eloads.itech.it8500_frame_const import It85xxCmd
+from instrument.meters.ainuo.an8721p_const import An8721pCmd
+from instrument.sources.ainuo.an97_frame import CODEC as AN97_CODEC, FRAME_TAIL as AN97_TAIL, An97Protocol
+
+
+class FrameCodecTest(unittest.TestCase):
+
+    def test_it85xx(self):
+        frame = It85xxCmd.CODEC.encode(5, [It85xxCmd.CONTENT_1_GET, ])
+        self.assertEqual(It85xxCmd.FRAME_SIZE, len(frame))
+        self.assertEqual([0xAA, 5, 0x5f], list(frame[:3]))
+        self.assertEqual(sum(frame[:25]) & 0xFF, frame[25])
+        self.assertEqual(It85xxCmd.CONTENT_1_GET, It85xxCmd.CODEC.decode(frame)[0])
+
+    def test_it85xx_unpack(self):
+        body = bytes([It85xxCmd.CONTENT_1_GET]) + (12000).to_bytes(4, 'little') + \
+            (15000).to_bytes(4, 'little') + (18000).to_bytes(4, 'little') + bytes([0x08, 0x40, 0x00, 0, 0, 35, 3, 2, 1, 0])
+        frame = It85xxCmd.CODEC.encode(0, body)
+        self.assertEqual((12000, 15000, 18000, 0x08, 0x40, 35, 3, 2, 1),
+                         It85xxCmd.CODEC.unpack(It85xxCmd.CONTENT_1_FMT, frame, 1))
+
+    def test_an8721p(self):
+        frame = An8721pCmd.CODEC.encode(1, (*An8721pCmd.START, 0x01))
+        self.assertEqual([0x7b, 0x00, 0x09, 0x01, 0x0f, 0x00, 0x01, 0x1a, 0x7d], list(frame))
+        self.assertEqual([0x0f, 0x00, 0x01], list(An8721pCmd.CODEC.decode(frame)))
+
+    def test_an97(self):
+        frame = AN97_CODEC.encode(1, b'CST=')
+        self.assertEqual(b'{\x07\x00\x01CST=', bytes(frame[:-2]))
+        self.assertEqual((sum(frame[1:-2]) & 0xFF, ord('}')), (frame[-2], frame[-1]))
+        self.assertEqual(b'CST=', bytes(AN97_CODEC.decode(list(frame))))
+
+    def test_an97_frame_complete(self):
+        protocol = An97Protocol()
+        protocol._frame_tail = bytes([AN97_TAIL])
+        frame = AN97_CODEC.encode(1, b'RVE=J')
+        self.assertEqual(ord('}'), frame[-2])
+        self.assertFalse(protocol._frame_complete(frame[:-1]))
+        self.assertFalse(protocol._frame_complete(frame[:5]))
+        self.assertTrue(protocol._frame_complete(frame))
+
+    def test_invalid(self):
+        frame = An8721pCmd.CODEC.encode(1, An8721pCmd.STOP)
+        frame[-2] ^= 0xFF
+        self.assertRaises(IOError, An8721pCmd.CODEC.decode, frame)
+        self.assertRaises(IOError, It85xxCmd.CODEC.decode, bytes(25))
+        self.assertRaises(ValueError, It85xxCmd.CODEC.encode, 0, bytes(24))
+
+
+if __name__ == '__main__':
+    unittest.main()
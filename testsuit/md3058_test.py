@@ -0,0 +1,75 @@
+# -*- encoding: utf-8 -*-
+"""
+@File    : md3058_test.py
+@Time    : 2026/10/18 15:20
+@Author  : blockish
+@Email   : blockish@yeah.net
+"""
+import unittest
+
+import numpy as np
+
+from errors import InstrumentException
+from instrument.meters.rigol.md3058_scpi import Md3058Scpi
+
+
+class FakeVisa:
+    """按命令返回预设的响应, 记录每条命令"""
+    timeout = 2000
+    write_termination = '\n'
+    encoding = 'ascii'
+    query_delay = 0
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.writes = []
+
+    def write_raw(self, data):
+        self.writes.append(data.decode().strip())
+
+    def read(self):
+        return self.responses.get(self.writes[-1], '1') + '\n'
+
+    def close(self):
+        pass
+
+
+class FakeMd3058(Md3058Scpi):
+
+    def __init__(self, responses=None):
+        self._responses = {} if responses is None else responses
+        super().__init__('FAKE')
+
+    def open(self, resource_name: str = None, reopen: bool = False):
+        self._resource_name = 'FAKE'
+        return FakeVisa(self._responses)
+
+
+class AcquireTest(unittest.TestCase):
+
+    def test_acquire(self):
+        meter = FakeMd3058({'FETC?': '1.0E+00,-2.5E-01,9.9E+37', 'RATE:VOLT:DC?': 'M'})
+        readings = meter.acquire(3, inter=50, mode='dc_volt')
+        np.testing.assert_array_equal([1.0, -0.25, np.inf], readings.values)
+        self.assertAlmostEqual(1 / 20, readings.interval)
+        writes = meter._instrument.writes
+        self.assertEqual(['TRIG:SOUR SINGLE;:TRIG:SING 3;:TRIG:AUTO:INTE 50', 'RATE:VOLT:DC?',
+                          ':TRIGger:SINGle:TRIGgered', '*OPC?', 'FETC?'], writes)
+
+    def test_external(self):
+        meter = FakeMd3058({'FETC?': '1.0E+00,2.0E+00'})
+        readings = meter.acquire(2, source='EXT')
+        self.assertIsNone(readings.interval)
+        self.assertNotIn(':TRIGger:SINGle:TRIGgered', meter._instrument.writes)
+
+    def test_count(self):
+        meter = FakeMd3058({'FETC?': '1.0E+00,2.0E+00'})
+        with self.assertRaisesRegex(InstrumentException, 'expect 3 readings, got 2'):
+            meter.acquire(3)
+        meter = FakeMd3058({'RATE:VOLT:DC?': 'X'})
+        with self.assertRaises(InstrumentException):
+            meter.acquire(3, mode='dc_volt')
+
+
+if __name__ == '__main__':
+    unittest.main()
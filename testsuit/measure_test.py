@@ -0,0 +1,50 @@
+# -*- encoding: utf-8 -*-
+"""
+@File    : measure_test.py
+@Time    : 2026/10/18 01:40
+@Author  : blockish
+@Email   : blockish@yeah.net
+"""
+import unittest
+
+import numpy as np
+
+from errors import ParamException
+from instrument.oscilloscopes.measure import WaveformMeasure, measure
+from instrument.oscilloscopes.waveform import Waveform
+
+
+class MeasureTest(unittest.TestCase):
+
+    def setUp(self):
+        # 1MHz, 30%占空比, 20ns线性边沿, 0~3.3V的梯形波, 采样间隔1ns
+        phase = (np.arange(20000) * 1e-9 * 1e6) % 1
+        y = np.interp(phase, [0, 0.02, 0.3, 0.32, 1], [0, 3.3, 3.3, 0, 0])
+        self.pulse = Waveform(y, 0.0, 1e-9)
+
+    def test_pulse(self):
+        meas = WaveformMeasure(self.pulse)
+        self.assertAlmostEqual(3.3, meas.measure('AMPlitude'))
+        self.assertAlmostEqual(16e-9, meas.measure('RISe'))
+        self.assertAlmostEqual(16e-9, meas.measure('fall'))
+        self.assertAlmostEqual(1e6, meas.measure('FREQ'))
+        self.assertAlmostEqual(30, meas.measure('PDUty'))
+        self.assertAlmostEqual(3e-7, meas.measure('PWI'))
+        self.assertEqual(20, meas.measure('PEDGECount'))
+        self.assertAlmostEqual(12e-9, WaveformMeasure(self.pulse, ref_per_high=80, ref_per_low=20).rise())
+        self.assertRaises(ParamException, meas.measure, 'HITS')
+
+    def test_delay_phase(self):
+        t = np.arange(20000) * 1e-9
+        waveforms = {
+            'CH1': Waveform(np.sin(2 * np.pi * 1e6 * t), 0.0, 1e-9),
+            'CH2': Waveform(np.sin(2 * np.pi * 1e6 * t - np.pi / 4), 0.0, 1e-9),
+        }
+        phase, delay = measure(waveforms, [{'source': 'CH1', 'meas_type': 'PHAse', 'target': 'CH2'},
+                                           {'source': 'CH1', 'meas_type': 'DELay', 'target': 'CH2'}])
+        self.assertAlmostEqual(45, phase, places=6)
+        self.assertAlmostEqual(125e-9, delay)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+# -*- encoding: utf-8 -*-
+"""
+@File    : pipeline_test.py
+@Time    : 2026/10/18 09:30
+@Author  : blockish
+@Email   : blockish@yeah.net
+"""
+import threading
+import time
+import unittest
+from contextlib import contextmanager
+
+from errors import InstrumentException
+from instrument.oscilloscopes.pipeline import CapturePipeline
+
+
+class FakeScope:
+    """只实现流水线用到的接口, 每次read_block返回采集序号, delays及error_at用于模拟慢速触发和通讯错误"""
+
+    def __init__(self, delays=None, error_at=None):
+        self.delays = {} if delays is None else delays
+        self.error_at = error_at
+        self.writes = []
+        self.reads = 0
+        self.timeouts = []
+
+    def waveform_preamble(self, source, start, stop, width):
+        return (source, start, stop, width)
+
+    @contextmanager
+    def visa_timeout(self, timeout):
+        self.timeouts.append(timeout)
+        yield
+
+    def write(self, cmd, *args, **kwargs):
+        self.writes.append(cmd)
+
+    def read_block(self):
+        index = self.reads
+        self.reads += 1
+        if self.error_at == index:
+            raise IOError('read timeout')
+        time.sleep(self.delays.get(index, 0))
+        return bytes([index])
+
+
+class PipelineTest(unittest.TestCase):
+
+    def test_stages(self):
+        scope = FakeScope()
+        results = []
+        lock = threading.Lock()
+
+        def collect(value):
+            with lock:
+                results.append(value)
+
+        pipeline = CapturePipeline(scope, 'CH1', queue_size=2, timeout=3)
+        pipeline.stage(lambda capture: capture.raw[0], workers=2, name='index')
+        pipeline.stage(lambda index: index * 2, workers=3, name='double')
+        pipeline.stage(collect, workers=2)
+        stats = pipeline.run(frames=20)
+        self.assertEqual(list(range(0, 40, 2)), sorted(results))
+        self.assertEqual((20, 0, 0), (stats['captured'], stats['dropped'], stats['late']))
+        self.assertEqual({20}, {stage['count'] for stage in stats['stages'].values()})
+        self.assertEqual(20, len(scope.writes))
+        self.assertEqual([3], scope.timeouts)
+
+    def _gated(self, policy):
+        gate = threading.Event()
+        processed = []
+        scope = FakeScope()
+        pipeline = CapturePipeline(scope, 'CH1', queue_size=1, policy=policy)
+        pipeline.stage(lambda capture: gate.wait(5) and processed.append(capture.index))
+        pipeline.start(frames=10)
+        return gate, processed, scope, pipeline
+
+    def test_drop(self):
+        gate, processed, scope, pipeline = self._gated('drop')
+        deadline = time.perf_counter() + 5
+        while pipeline.statistics()['captured'] < 10 and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        gate.set()
+        stats = pipeline.join(5)
+        # 工作线程阻塞在第一个数据上, 队列只能再缓存一个, 其余的都被丢弃
+        self.assertEqual(10, stats['captured'])
+        self.assertLessEqual(len(processed), 2)
+        self.assertEqual(10, stats['dropped'] + len(processed))
+        self.assertEqual(0.0, stats['blocked'])
+
+    def test_block(self):
+        gate, processed, scope, pipeline = self._gated('block')
+        time.sleep(0.05)
+        self.assertLess(scope.reads, 10)
+        gate.set()
+        stats = pipeline.join(5)
+        self.assertEqual(list(range(10)), processed)
+        self.assertEqual((10, 0), (stats['captured'], stats['dropped']))
+        self.assertGreater(stats['blocked'], 0.0)
+
+    def test_late(self):
+        pipeline = CapturePipeline(FakeScope(delays={3: 0.3, 6: 0.3}), 'CH1', period=0.15)
+        pipeline.stage(lambda capture: None)
+        stats = pipeline.run(frames=8)
+        self.assertEqual(2, stats['late'])
+        self.assertEqual(8, stats['captured'])
+
+    def test_errors(self):
+        def stage(capture):
+            if capture.index == 1:
+                raise ValueError('bad capture')
+            return capture
+
+        results = []
+        pipeline = CapturePipeline(FakeScope(error_at=4), 'CH1')
+        pipeline.stage(stage, workers=2).stage(results.append)
+        pipeline.start(frames=10)
+        with self.assertRaises(InstrumentException) as context:
+            pipeline.join(5)
+        self.assertIsInstance(context.exception.__cause__, IOError)
+        stats = pipeline.statistics()
+        self.assertEqual(4, stats['captured'])
+        self.assertEqual((4, 1), (stats['stages']['stage']['count'], stats['stages']['stage']['errors']))
+        self.assertEqual([0, 2, 3], sorted(capture.index for capture in results))
+        # 错误只抛出一次
+        self.assertEqual(4, pipeline.join()['captured'])
+
+
+if __name__ == '__main__':
+    unittest.main()
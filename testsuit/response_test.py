@@ -0,0 +1,60 @@
+# -*- encoding: utf-8 -*-
+"""
+@File    : response_test.py
+@Time    : 2026/10/18 02:30
+@Author  : blockish
+@Email   : blockish@yeah.net
+"""
+import math
+import struct
+import unittest
+
+from errors import InstrumentException
+from instrument.response import Enumeration, ResponseParser, boolean, float_array, nr1, nr3, nr3_array, text
+
+
+class ResponseTest(unittest.TestCase):
+
+    def test_converters(self):
+        self.assertEqual(5, nr1('+5\n'))
+        self.assertEqual(-1.5e-3, nr3('-1.5E-3\n'))
+        self.assertTrue(math.isnan(nr3('9.91E+37')))
+        self.assertTrue(math.isnan(nr3('NAN')))
+        self.assertEqual(math.inf, nr3('9.9E+37'))
+        self.assertEqual(-math.inf, nr3('-INF'))
+        self.assertRaises(InstrumentException, nr3, 'abc')
+        self.assertTrue(boolean('ON\n'))
+        self.assertFalse(boolean('0'))
+        self.assertEqual('V', text('"V"\n'))
+        self.assertEqual('AVErage', Enumeration('SAMple', 'AVErage')('ave'))
+
+    def test_parser(self):
+        parser = ResponseParser(nr3, nr3, text, names=('value', 'mean', 'units'), repeat=True)
+        results = parser('1.0E+0;9.91E+37;"V;A";2;3;"s"\n')
+        self.assertEqual(2, len(results))
+        self.assertEqual((1.0, 'V;A'), (results[0].value, results[0].units))
+        self.assertTrue(math.isnan(results[0].mean))
+        self.assertEqual((1.0, math.inf), ResponseParser(nr3, sep=',', repeat=True)('1.0,INF\n'))
+        self.assertEqual((1, True), ResponseParser(nr1, boolean)('1;ON\n'))
+        self.assertRaises(InstrumentException, ResponseParser(nr1, boolean), '1;ON;2\n')
+        values = ResponseParser(nr3, sep=',', repeat=True)('1,,2\n')
+        self.assertEqual((1.0, 2.0), values[::2])
+        self.assertTrue(math.isnan(values[1]))
+        self.assertEqual(['"a,b"', '', 'c'], ResponseParser(text, sep=',', repeat=True).split('"a,b",,c'))
+        self.assertEqual([], ResponseParser(text, repeat=True).split('\n'))
+
+    def test_float_array(self):
+        values = float_array(struct.pack('>4f', 1.5, 9.91e37, 9.9e37, -9.9e37))
+        self.assertEqual(1.5, values[0])
+        self.assertTrue(math.isnan(values[1]))
+        self.assertEqual([math.inf, -math.inf], list(values[2:]))
+        self.assertEqual(-2.0, float_array(struct.pack('<f', -2.0), big_endian=False)[0])
+        values = nr3_array('1.0E-3,-9.9E+37,9.91E+37,OVERLOAD\n')
+        self.assertEqual(1e-3, values[0])
+        self.assertEqual(-math.inf, values[1])
+        self.assertTrue(math.isnan(values[2]))
+        self.assertEqual(math.inf, values[3])
+
+
+if __name__ == '__main__':
+    unittest.main()
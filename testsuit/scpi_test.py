@@ -0,0 +1,166 @@
+# -*- encoding: utf-8 -*-
+"""
+@File    : scpi_test.py
+@Time    : 2026/10/18 09:50
+@Author  : blockish
+@Email   : blockish@yeah.net
+"""
+import unittest
+
+from instrument.oscilloscopes.tektronix.mdo3000_scpi import Mdo3000Scpi
+from instrument.scpi import ScpiInstrument
+
+
+class FakeVisa:
+    """记录每次write_raw发送的数据, 读操作返回固定的响应"""
+    timeout = 2000
+    write_termination = '\n'
+    encoding = 'ascii'
+    query_delay = 0
+
+    def __init__(self):
+        self.writes = []
+
+    def write_raw(self, data):
+        self.writes.append(data)
+
+    def read(self):
+        return '1\n'
+
+    def close(self):
+        pass
+
+
+class FakeScpi(ScpiInstrument):
+
+    def __init__(self):
+        super().__init__('FAKE', 2)
+
+    def open(self, resource_name: str = None, reopen: bool = False):
+        self._resource_name = 'FAKE'
+        return FakeVisa()
+
+
+class FakeMdo3000(Mdo3000Scpi):
+
+    def open(self, resource_name: str = None, reopen: bool = False):
+        self._resource_name = 'FAKE'
+        return FakeVisa()
+
+
+class BatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.inst = FakeScpi()
+        self.writes = self.inst._instrument.writes
+
+    def test_join(self):
+        with self.inst.batch():
+            self.inst.write('CH{}:SCAle {}', 1, 0.5)
+            self.inst.write('*CLS')
+            self.inst.write(':HORizontal:SCAle {}', 1e-3)
+            self.inst.write('SELect:CH{} ON', 2)
+            self.assertEqual([], self.writes)
+        self.assertEqual([b'CH1:SCAle 0.5;*CLS;:HORizontal:SCAle 0.001;:SELect:CH2 ON\n'], self.writes)
+
+    def test_nested(self):
+        with self.inst.batch():
+            with self.inst.batch():
+                self.inst.write('A {}', 1)
+            self.assertEqual([], self.writes)
+            self.inst.write('B {}', 2)
+        self.assertEqual([b'A 1;:B 2\n'], self.writes)
+
+    def test_error(self):
+        with self.assertRaises(ValueError):
+            with self.inst.batch():
+                self.inst.write('MEASUrement:MEAS{}:STATE OFF', 1)
+                with self.inst.batch():
+                    self.inst.write('MEASUrement:GATing SCREen')
+                raise ValueError('invalid measure')
+        self.assertEqual([], self.writes)
+        self.inst.write('*CLS')
+        self.assertEqual([b'*CLS\n'], self.writes)
+        # 内层上下文的异常被外层捕获时, 外层正常退出仍发送全部命令
+        with self.inst.batch():
+            self.inst.write('A {}', 1)
+            try:
+                with self.inst.batch():
+                    self.inst.write('B {}', 2)
+                    raise ValueError('ignored')
+            except ValueError:
+                pass
+        self.assertEqual(b'A 1;:B 2\n', self.writes[-1])
+
+    def test_split(self):
+        self.inst.MAX_COMMAND_LENGTH = 20
+        with self.inst.batch():
+            for ch in range(1, 5):
+                self.inst.write('CH{}:SCAle {}', ch, 0.5)
+        self.assertEqual([b'CH1:SCAle 0.5\n', b'CH2:SCAle 0.5\n', b'CH3:SCAle 0.5\n', b'CH4:SCAle 0.5\n'],
+                         self.writes)
+        del self.writes[:]
+        self.inst.MAX_COMMAND_LENGTH = 30
+        with self.inst.batch():
+            for ch in range(1, 5):
+                self.inst.write('CH{}:SCAle {}', ch, 0.5)
+        self.assertEqual([b'CH1:SCAle 0.5;:CH2:SCAle 0.5\n', b'CH3:SCAle 0.5;:CH4:SCAle 0.5\n'], self.writes)
+        self.assertTrue(all(len(data) - 1 <= 30 for data in self.writes))
+
+    def test_query(self):
+        with self.inst.batch():
+            self.inst.write('CH{}:SCAle {}', 1, 0.5)
+            self.assertEqual('1\n', self.inst.query('CH{}:SCAle?', 1))
+            self.assertEqual([b'CH1:SCAle 0.5;:CH1:SCAle?\n'], self.writes)
+            self.inst.write('*CLS')
+            self.inst.read()
+            self.assertEqual(b'*CLS\n', self.writes[-1])
+            self.inst.write('*CLS')
+        self.assertEqual([b'CH1:SCAle 0.5;:CH1:SCAle?\n', b'*CLS\n', b'*CLS\n'], self.writes)
+
+    def test_unbatched(self):
+        self.inst.write('CH{}:SCAle {}', 1, 0.5)
+        self.inst.write('*CLS')
+        self.assertEqual([b'CH1:SCAle 0.5\n', b'*CLS\n'], self.writes)
+
+
+class CacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scope = FakeMdo3000('FAKE')
+        self.writes = self.scope._instrument.writes
+
+    def test_disabled(self):
+        self.scope.channel_setting(1, scale=0.5)
+        self.scope.channel_setting(1, scale=0.5)
+        self.assertEqual(2, self.writes.count(b'CH1:SCA 0.5\n'))
+
+    def test_hit(self):
+        self.assertTrue(self.scope.cache('ON'))
+        self.scope.channel_setting(1, scale=0.5)
+        self.assertEqual([b'CH1:SCA 0.5\n', b'*OPC?\n', b'CH1?\n'], self.writes)
+        del self.writes[:]
+        self.assertEqual('1\n', self.scope.channel_setting(1, scale=0.5))
+        self.assertEqual([], self.writes)
+        self.scope.channel_setting(1, scale=0.5, offset=0.1)
+        self.assertEqual(b'CH1:OFFS 0.1\n', self.writes[0])
+        del self.writes[:]
+        self.scope.channel_setting(2, scale=0.5)
+        self.assertEqual(b'CH2:SCA 0.5\n', self.writes[0])
+
+    def test_invalidate(self):
+        self.scope.cache('ON')
+        for reset in (self.scope.rst, self.scope.rcl, self.scope.cache_clear):
+            self.scope.channel_setting(1, scale=0.5)
+            reset()
+            del self.writes[:]
+            self.scope.channel_setting(1, scale=0.5)
+            self.assertEqual(b'CH1:SCA 0.5\n', self.writes[0])
+        self.assertFalse(self.scope.cache('OFF'))
+        del self.writes[:]
+        self.scope.channel_setting(1, scale=0.5)
+        self.assertEqual(b'CH1:SCA 0.5\n', self.writes[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+# -*- encoding: utf-8 -*-
+"""
+@File    : template_test.py
+@Time    : 2026/10/18 04:40
+@Author  : blockish
+@Email   : blockish@yeah.net
+"""
+import re
+import unittest
+
+from errors import ParamException
+from instrument.template import CommandTemplate, compile_template
+
+
+class TemplateTest(unittest.TestCase):
+
+    def test_constant(self):
+        idn = CommandTemplate('*IDN?')
+        self.assertIs(idn, compile_template(idn))
+        self.assertTrue(idn.constant)
+        self.assertEqual('*IDN?', idn(1))
+        data = idn.encode(termination='\n')
+        self.assertEqual(b'*IDN?\n', data)
+        self.assertIs(data, idn.encode(termination='\n'))
+        self.assertEqual('{x}', CommandTemplate('{{x}}')())
+
+    def test_compile(self):
+        template = compile_template('CH{}:SCAle {}')
+        self.assertIs(template, compile_template('CH{}:SCAle {}'))
+        self.assertEqual('CH1:SCAle 0.5', template(1, 0.5))
+        stb = compile_template('*STB?')
+        self.assertIs(stb, compile_template('*STB?'))
+        data = stb.encode(termination='\n')
+        self.assertEqual(b'*STB?\n', data)
+        self.assertIs(data, compile_template('*STB?').encode(termination='\n'))
+        # 已格式化的动态命令不会挤出缓存的常量命令
+        for index in range(1000):
+            self.assertEqual('CH1:SCAle %d' % index, compile_template('CH1:SCAle %d' % index)())
+        self.assertIs(stb, compile_template('*STB?'))
+
+    def test_typed(self):
+        width = CommandTemplate('DATa:WIDth {};:DATa:SOUrce {}', (1, 2), ('CH1', 'CH2'))
+        self.assertEqual(b'DATa:WIDth 2;:DATa:SOUrce ch1\n', width.encode(2, 'ch1', termination='\n'))
+        self.assertRaises(ParamException, width, 4, 'CH1')
+        self.assertRaises(ParamException, width, 1)
+        self.assertEqual('RATE 100MS', CommandTemplate('RATE {}', re.compile('^[0-9]+M?S$'))('100MS'))
+        self.assertEqual('VOLT 5', CommandTemplate('VOLT {}', float)(5))
+        self.assertRaises(ParamException, CommandTemplate('VOLT {}', float), '5')
+        self.assertRaises(ParamException, CommandTemplate, 'VOLT {}', float, float)
+
+
+if __name__ == '__main__':
+    unittest.main()
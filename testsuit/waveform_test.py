@@ -0,0 +1,150 @@
+# -*- encoding: utf-8 -*-
+"""
+@File    : waveform_test.py
+@Time    : 2026/10/17 21:50
+@Author  : blockish
+@Email   : blockish@yeah.net
+"""
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from errors import InstrumentException, ParamException
+from instrument.oscilloscopes.archive import WaveformFile, WaveformWriter
+from instrument.oscilloscopes.tektronix.mdo3000_scpi import Mdo3000Scpi
+from instrument.oscilloscopes.waveform import Preamble, Waveform, ieee_block
+
+
+class FakeVisa:
+    timeout = 2000
+    write_termination = '\n'
+    encoding = 'ascii'
+    query_delay = 0
+
+    def __init__(self):
+        self.writes = []
+
+    def write_raw(self, data):
+        self.writes.append(data)
+
+    def read(self):
+        # 记录长度等查询
+        return '1000\n'
+
+    def close(self):
+        pass
+
+
+class FakeMdo3000(Mdo3000Scpi):
+    """每次read_block依次返回blocks中的数据块"""
+
+    def __init__(self, blocks):
+        super().__init__('FAKE')
+        self.blocks = list(blocks)
+
+    def open(self, resource_name: str = None, reopen: bool = False):
+        self._resource_name = 'FAKE'
+        return FakeVisa()
+
+    def waveform_preamble(self, source, start=1, stop=None, width=1) -> Preamble:
+        return Preamble(width=width, y_mult=0.5, x_incr=1e-6)
+
+    def _waveform_snapshot(self):
+        return {'acq_mode': 'HIRes'}
+
+    def read_block(self) -> bytes:
+        return self.blocks.pop(0)
+
+
+class WaveformTest(unittest.TestCase):
+
+    def test_ieee_block(self):
+        self.assertEqual(b'\x01\x02\x03', bytes(ieee_block(b'#13\x01\x02\x03\n')))
+        self.assertRaises(InstrumentException, ieee_block, b'13\x01\x02\x03\n')
+        self.assertRaises(InstrumentException, ieee_block, b'#15\x01\x02\x03\n')
+
+    def test_from_raw(self):
+        codes = np.array([-128, -1, 0, 127], dtype='<i2')
+        waveform = Waveform.from_raw(codes.tobytes(), 2, y_mult=0.5, y_zero=1.0, y_off=-2, x_zero=-1e-3, x_incr=1e-6)
+        np.testing.assert_allclose([-62, 1.5, 2, 65.5], waveform.y)
+        np.testing.assert_allclose([-1e-3, -0.999e-3, -0.998e-3, -0.997e-3], waveform.x)
+        self.assertEqual(4, len(waveform))
+        waveform = Waveform.from_raw(bytes([0x80, 0xff, 0x00, 0x7f]), 1, 1.0, 0.0, 0.0, 0.0, 1.0)
+        np.testing.assert_array_equal([-128, -1, 0, 127], waveform.y)
+        waveform = Waveform.from_raw(bytes(range(6)), 1, 1.0, 0.0, 0.0, 0.0, 1.0, timestamps=np.array([0.0, 0.5]))
+        self.assertEqual((2, 3), (waveform.frames, len(waveform)))
+        np.testing.assert_array_equal([[0, 1, 2], [3, 4, 5]], waveform.y)
+        np.testing.assert_array_equal([0, 1, 2], waveform.x)
+
+    def test_preamble(self):
+        preamble = Preamble.parse(':WFMOUTPRE:BYT_NR 2;BIT_NR 16;ENCDG BINARY;BN_FMT RI;BYT_OR LSB;'
+                                  'WFID "Ch1, DC coupling; 100.0mV/div";NR_PT 4;PT_FMT Y;XUNIT "s";XINCR 1.0E-6;'
+                                  'XZERO -1.0E-3;PT_OFF 0;YUNIT "V";YMULT 0.5;YOFF -2.0E+0;YZERO 1.0E+0\n')
+        self.assertEqual((2, 4, 'Ch1, DC coupling; 100.0mV/div'), (preamble.width, preamble.points, preamble.wfid))
+        waveform = preamble.waveform(np.array([-128, -1, 0, 127], dtype='<i2').tobytes(), 'CH1', offset=2)
+        np.testing.assert_allclose([-62, 1.5, 2, 65.5], waveform.y)
+        self.assertAlmostEqual(-0.998e-3, waveform.x_zero)
+        preamble = Preamble.parse(':WFMO:BYT_N 1;BYT_O MSB;XIN 4.0E-9;YMU 0.04')
+        self.assertEqual((1, 'MSB', 4e-9, 0.04), (preamble.width, preamble.byte_order, preamble.x_incr, preamble.y_mult))
+        preambles = Preamble.parse_all(':WFMOUTPRE:BYT_NR 1;WFID "Ch1; x";YMULT 0.5;:WFMOUTPRE:BYT_NR 2;WFID "Ch2";YMULT 2\n')
+        self.assertEqual([(1, 'Ch1; x', 0.5), (2, 'Ch2', 2.0)], [(p.width, p.wfid, p.y_mult) for p in preambles])
+        self.assertRaises(InstrumentException, Preamble.parse, '\n')
+
+    def test_archive(self):
+        preamble = Preamble(width=2, y_mult=0.5, x_incr=1e-6)
+        frames = np.arange(-6, 6, dtype='<i2').reshape(3, 4)
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'ch1.wfm')
+            with WaveformWriter(path, preamble, 'CH1', 'TEKTRONIX,MDO3024\n', {'scale': 1e-3}) as writer:
+                for index, frame in enumerate(frames):
+                    writer.write(frame.tobytes(), index * 0.1)
+            archive = WaveformFile(path)
+            self.assertEqual(('CH1', 'TEKTRONIX,MDO3024', {'scale': 1e-3}), (archive.source, archive.idn, archive.settings))
+            np.testing.assert_array_equal(frames, archive.codes)
+            np.testing.assert_allclose([0, 0.1, 0.2], archive.timestamps)
+            waveform = archive.waveform(slice(1, 3))
+            np.testing.assert_allclose(frames[1:] * 0.5, waveform.y)
+            np.testing.assert_allclose([0.1, 0.2], waveform.timestamps)
+            del archive, waveform
+
+
+class FramesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.frames = np.arange(-12, 12, dtype='<i2').reshape(6, 4)
+
+    def test_frames(self):
+        scope = FakeMdo3000(frame.tobytes() for frame in self.frames)
+        scope.acquire(None, frames=6)
+        waveform = scope.waveform_frames('CH1', points=4, width=2)
+        self.assertEqual((6, 4), waveform.y.shape)
+        np.testing.assert_allclose(self.frames * 0.5, waveform.y)
+        self.assertEqual(6, len(waveform.timestamps))
+        self.assertTrue(np.all(np.diff(waveform.timestamps) >= 0))
+        self.assertGreaterEqual(waveform.timestamps[0], 0)
+        self.assertEqual(6, scope._instrument.writes.count(b'ACQuire:STATE ON;*WAI;:CURVe?\n'))
+
+    def test_archive(self):
+        scope = FakeMdo3000(frame.tobytes() for frame in self.frames)
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'frames.wfm')
+            archive = scope.waveform_frames('CH1', frames=6, points=4, width=2, path=path)
+            np.testing.assert_array_equal(self.frames, archive.codes)
+            self.assertEqual((6, {'acq_mode': 'HIRes'}), (archive.frames, archive.settings))
+            self.assertTrue(np.all(np.diff(archive.timestamps) >= 0))
+            del archive
+
+    def test_length(self):
+        blocks = [frame.tobytes() for frame in self.frames]
+        blocks[2] = blocks[2][:-2]
+        self.assertRaises(InstrumentException, FakeMdo3000(blocks).waveform_frames, 'CH1', 6, points=4, width=2)
+        with tempfile.TemporaryDirectory() as folder:
+            self.assertRaises(InstrumentException, FakeMdo3000(blocks).waveform_frames, 'CH1', 6, points=4, width=2,
+                              path=os.path.join(folder, 'frames.wfm'))
+        self.assertRaises(ParamException, FakeMdo3000(blocks).waveform_frames, 'CH1', points=4)
+
+
+if __name__ == '__main__':
+    unittest.main()
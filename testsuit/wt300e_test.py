@@ -0,0 +1,253 @@
+# -*- encoding: utf-8 -*-
+"""
+@File    : wt300e_test.py
+@Time    : 2026/10/18 14:10
+@Author  : blockish
+@Email   : blockish@yeah.net
+"""
+import unittest
+
+import numpy as np
+from pyvisa import constants as visa_constants
+from pyvisa.errors import VisaIOError
+
+from errors import InstrumentException
+from instrument.meters.yokogawa.integration import IntegrationSession
+from instrument.meters.yokogawa.recall import StoredRun
+from instrument.meters.yokogawa.wt300e_scpi import Wt300eScpi
+
+WAIT_CMD = 'STAT:EESR?;:COMM:WAIT 1;:STAT:EESR?'
+VALUE_CMD = 'NUM:NORM:VAL?'
+LIST_CMD = 'NUM:LIST:VAL?'
+
+
+def block(*values):
+    """以IEEE单精度浮点(MSB在前)组成定长二进制块响应"""
+    data = np.array(values, dtype='>f4').tobytes()
+    length = str(len(data)).encode()
+    return b'#%d%s%s\n' % (len(length), length, data)
+
+
+def blocks(*rows):
+    """一次响应中以';'分隔的多个定长二进制块"""
+    return b';'.join(block(*row)[:-1] for row in rows) + b'\n'
+
+
+def timeout_error():
+    return VisaIOError(visa_constants.StatusCode.error_timeout)
+
+
+class FakeVisa:
+    """
+    按命令依次返回预设的响应(最后一个重复使用), 响应为异常时读取时抛出, 为bytes时以read_bytes读取;
+    记录每条命令及设备清除的次数
+    """
+    timeout = 2000
+    write_termination = '\n'
+    encoding = 'ascii'
+    query_delay = 0
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.writes = []
+        self.clears = 0
+        self._response = None
+        self._buffer = b''
+
+    def write_raw(self, data):
+        self.writes.append(data.decode().strip())
+        values = self.responses.get(self.writes[-1], ['0'])
+        self._response = values.pop(0) if len(values) > 1 else values[0]
+        if isinstance(self._response, bytes):
+            self._buffer = self._response
+
+    def read(self):
+        if isinstance(self._response, Exception):
+            raise self._response
+        return self._response + '\n'
+
+    def read_bytes(self, count):
+        if isinstance(self._response, Exception):
+            raise self._response
+        data, self._buffer = self._buffer[:count], self._buffer[count:]
+        return data
+
+    def clear(self):
+        self.clears += 1
+
+    def close(self):
+        pass
+
+
+class FakeWt300e(Wt300eScpi):
+
+    def __init__(self, responses=None):
+        self._responses = {} if responses is None else responses
+        super().__init__('FAKE')
+
+    def open(self, resource_name: str = None, reopen: bool = False):
+        self._resource_name = 'FAKE'
+        return FakeVisa(self._responses)
+
+
+class NumericFloatTest(unittest.TestCase):
+
+    def test_values(self):
+        meter = FakeWt300e({VALUE_CMD: [block(1.5, 9.91e37), block(-2.0, 9.9e37), block(1.0)]})
+        with self.assertRaises(InstrumentException):
+            meter.numeric_float_values()
+        self.assertEqual(2, meter.numeric_float('U,1', 'P,1'))
+        self.assertEqual('NUM:FORM FLOat;:NUM:NORM:NUM 2;:NUM:NORM:ITEM1 U,1;:NUM:NORM:ITEM2 P,1',
+                         meter._instrument.writes[-1])
+        values = meter.numeric_float_values()
+        self.assertEqual((2,), values.shape)
+        self.assertEqual(1.5, values[0])
+        self.assertTrue(np.isnan(values[1]))
+        out = np.zeros((2, 2))
+        row = out[1]
+        self.assertIs(row, meter.numeric_float_values(row))
+        np.testing.assert_array_equal([[0, 0], [-2.0, np.inf]], out)
+        # 块长度与数据项个数不符
+        with self.assertRaises(InstrumentException):
+            meter.numeric_float_values()
+        # 切换回ASCii后需重新配置
+        meter.numeric_format('ASCii')
+        with self.assertRaises(InstrumentException):
+            meter.numeric_float_values()
+
+    def test_records(self):
+        meter = FakeWt300e({VALUE_CMD: [block(1, 2), block(3, 4), block(5, 6)]})
+        meter.numeric_float('U,1', 'I,1')
+        records = meter.numeric_float_records(3)
+        np.testing.assert_array_equal([[1, 2], [3, 4], [5, 6]], records)
+        self.assertEqual(3, meter._instrument.writes.count(VALUE_CMD))
+
+
+class HarmonicsTest(unittest.TestCase):
+
+    def test_harmonics(self):
+        # 2个数据项, 阶数为TOTal, DC, 1, 2, 3
+        meter = FakeWt300e({LIST_CMD: [block(*range(10)), block(*range(9))]})
+        with self.assertRaises(InstrumentException):
+            meter.harmonics()
+        meter.harmonics_setup('U,1', 'I,1', order=3)
+        self.assertEqual('NUM:FORM FLOat;:NUM:LIST:NUM 2;:NUM:LIST:ORD 3;:NUM:LIST:SEL ALL;'
+                         ':NUM:LIST:ITEM1 U,1;:NUM:LIST:ITEM2 I,1', meter._instrument.writes[-1])
+        harmonics = meter.harmonics()
+        self.assertEqual(('U,1', 'I,1'), harmonics.items)
+        self.assertEqual(('TOTal', 'DC', 1, 2, 3), harmonics.orders)
+        self.assertEqual((2, 5), harmonics.values.shape)
+        np.testing.assert_array_equal([5, 6, 7, 8, 9], harmonics.values[1])
+        self.assertEqual(2, harmonics.values[harmonics.items.index('U,1'), harmonics.orders.index(1)])
+        # 数值个数与数据项及阶数不符
+        with self.assertRaises(InstrumentException):
+            meter.harmonics()
+
+    def test_setup(self):
+        meter = FakeWt300e()
+        for items in ((), tuple('U,%d' % (index % 3 + 1) for index in range(33))):
+            with self.assertRaises(InstrumentException):
+                meter.harmonics_setup(*items)
+        self.assertEqual([], meter._instrument.writes)
+
+
+class NumericUpdatesTest(unittest.TestCase):
+
+    def test_updates(self):
+        # 第二个周期等待前EESR的UPD位已置位: 读取数值期间完成了一次更新, 计数仍只加1
+        meter = FakeWt300e({WAIT_CMD: ['0;1', '1;1', '0;1'], VALUE_CMD: ['1.0E+00,2.5E+00']})
+        updates = list(meter.numeric_updates(count=3))
+        self.assertEqual([1, 2, 3], [update.update for update in updates])
+        self.assertEqual([False, True, False], [update.missed for update in updates])
+        self.assertEqual((1.0, 2.5), updates[0].values)
+        writes = meter._instrument.writes
+        self.assertEqual(['STAT:FILT1 FALL', 'STAT:EESR?', WAIT_CMD, VALUE_CMD], writes[:4])
+        self.assertEqual(3, writes.count(WAIT_CMD))
+
+    def test_timeout(self):
+        meter = FakeWt300e({WAIT_CMD: [timeout_error(), '0;1', timeout_error()]})
+        updates = meter.numeric_updates()
+        first = next(updates)
+        self.assertEqual((1, True), (first.update, first.missed))
+        self.assertEqual(1, meter._instrument.clears)
+        # 连续两次超时
+        with self.assertRaises(InstrumentException):
+            next(updates)
+        self.assertEqual(2, meter._instrument.clears)
+
+
+
+class StoredRunTest(unittest.TestCase):
+
+    def test_resume(self):
+        # 5块, 每次传输2块, 第二次传输超时
+        cmd = 'REC:NORM:VAL? {};:REC:NORM:VAL? {}'
+        meter = FakeWt300e({
+            'NUM:FORM FLOat;:NUM:NORM:NUM?': ['2'], 'REC:NUM?': ['5'], 'STOR:INT?': ['0,0,2'],
+            cmd.format(1, 2): [blocks((1, 10), (2, 20))],
+            cmd.format(3, 4): [timeout_error(), blocks((3, 30), (4, 40))],
+            'REC:NORM:VAL? 5': [block(5, 50)],
+        })
+        run = StoredRun(meter, chunk=2)
+        self.assertEqual(5, len(run))
+        np.testing.assert_array_equal([0, 2, 4, 6, 8], run.times)
+        with self.assertRaises(InstrumentException):
+            run.download()
+        self.assertEqual((2, False), (run.done, run.complete))
+        self.assertTrue(np.isnan(run.values[2:]).all())
+        self.assertEqual(0, meter._instrument.clears)
+        # 先设备清除丢弃中断的响应, 再从第3块继续
+        self.assertEqual(5, run.download())
+        self.assertEqual(1, meter._instrument.clears)
+        self.assertTrue(run.complete)
+        np.testing.assert_array_equal([[1, 10], [2, 20], [3, 30], [4, 40], [5, 50]], run.values)
+        writes = meter._instrument.writes
+        self.assertEqual((1, 2), (writes.count(cmd.format(1, 2)), writes.count(cmd.format(3, 4))))
+        self.assertEqual(5, run.download())
+        self.assertEqual(1, meter._instrument.clears)
+
+
+
+class IntegrationSessionTest(unittest.TestCase):
+
+    def test_reset(self):
+        # 第三次读取前仪器积分被复位(重新上电), 经过时间从20S降为5S
+        meter = FakeWt300e({VALUE_CMD: [block(10, 1.0, 0.5), block(20, 2.0, 1.0), block(5, 0.25, 0.125),
+                                        block(15, 1.0, 0.5)]})
+        session = IntegrationSession(meter, functions=('WH', 'AH'))
+        self.assertEqual(('WH,1', 'AH,1'), session.items)
+        self.assertEqual('NUM:FORM FLOat;:NUM:NORM:NUM 3;:NUM:NORM:ITEM1 TIME;:NUM:NORM:ITEM2 WH,1;'
+                         ':NUM:NORM:ITEM3 AH,1', meter._instrument.writes[-1])
+        first = session.read()
+        self.assertEqual(10, first.elapsed)
+        np.testing.assert_array_equal([1.0, 0.5], first.delta)
+        session.read()
+        reset = session.read()
+        self.assertEqual(25, reset.elapsed)
+        np.testing.assert_array_equal([2.25, 1.125], reset.values)
+        np.testing.assert_array_equal([0.25, 0.125], reset.delta)
+        # 偏移在之后的读取中保持
+        snapshot = session.snapshot()
+        restored = IntegrationSession.restore(FakeWt300e({VALUE_CMD: [block(15, 1.0, 0.5)]}), snapshot)
+        for reading in (session.read(), restored.read()):
+            self.assertEqual(35, reading.elapsed)
+            np.testing.assert_array_equal([3.0, 1.5], reading.values)
+            np.testing.assert_array_equal([0.75, 0.375], reading.delta)
+
+    def test_start(self):
+        meter = FakeWt300e({VALUE_CMD: [block(10, 1.0, 0.5), block(2, 0.5, 0.25)]})
+        session = IntegrationSession(meter)
+        session.read()
+        session.start()
+        self.assertEqual('INTEG:RES;:INTEG:STAR', meter._instrument.writes[-1])
+        # 复位后重新计算, 不再计入之前的累计值
+        reading = session.read()
+        self.assertEqual(2, reading.elapsed)
+        np.testing.assert_array_equal([0.5, 0.25], reading.delta)
+        meter.numeric_float('U,1')
+        with self.assertRaises(InstrumentException):
+            session.read()
+
+
+if __name__ == '__main__':
+    unittest.main()